@@ -1,3 +1,4 @@
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -22,6 +23,17 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 
 
+# Partições por ano de despesa e votoindividual (ver tratamentoDados/particoes.py):
+# criadas pelas cargas, não pelos modelos, então o autogenerate as ignora
+PARTICAO_POR_ANO = re.compile(r"^(despesa|votoindividual)_\d{4}$")
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not PARTICAO_POR_ANO.match(name)
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +56,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -67,7 +80,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_name=include_name
         )
 
         with context.begin_transaction():
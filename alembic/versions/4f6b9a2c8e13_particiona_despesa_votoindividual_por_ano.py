@@ -0,0 +1,146 @@
+"""particiona_despesa_votoindividual_por_ano
+
+Revision ID: 4f6b9a2c8e13
+Revises: e3a8f5c21d47
+Create Date: 2026-10-19 09:18:52.406731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migracoes import colunas_gravaveis, particoes_por_ano, recriar_tabela
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6b9a2c8e13'
+down_revision: Union[str, None] = 'e3a8f5c21d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabela -> (chave de partição, expressão do ano, limites de uma partição)
+TABELAS = {
+    'despesa': ('ano', 'ano', "FROM ({ano}) TO ({proximo})"),
+    'votoindividual': ('data_hora_registro', 'EXTRACT(YEAR FROM data_hora_registro)::int',
+                       "FROM ('{ano}-01-01') TO ('{proximo}-01-01')"),
+}
+
+# Índices fora das constraints: (nome, tabela, colunas, único)
+INDICES_ANTIGOS = [
+    ('ix_despesa_id_deputado_cod_documento_parcela', 'despesa', ['id_deputado', 'cod_documento', 'parcela'], True),
+    ('ix_votoindividual_id_votacao_id_deputado', 'votoindividual', ['id_votacao', 'id_deputado'], True),
+    ('ix_votoindividual_id_deputado', 'votoindividual', ['id_deputado'], False),
+    ('ix_votoindividual_data_hora_registro', 'votoindividual', ['data_hora_registro'], False),
+    ('ix_votoindividual_ano', 'votoindividual', ['ano'], False),
+]
+# Chaves únicas passam a incluir a chave de partição
+INDICES_NOVOS = [
+    ('ix_despesa_id_deputado_cod_documento_parcela_ano', 'despesa', ['id_deputado', 'cod_documento', 'parcela', 'ano'], True),
+    ('ix_votoindividual_id_votacao_id_deputado_data_hora_registro', 'votoindividual', ['id_votacao', 'id_deputado', 'data_hora_registro'], True),
+    ('ix_votoindividual_id_deputado', 'votoindividual', ['id_deputado'], False),
+    ('ix_votoindividual_data_hora_registro', 'votoindividual', ['data_hora_registro'], False),
+    ('ix_votoindividual_ano', 'votoindividual', ['ano'], False),
+]
+CHAVES_ESTRANGEIRAS = [
+    ('despesa_id_deputado_fkey', 'despesa', 'deputado', 'id_deputado'),
+    ('votoindividual_id_deputado_fkey', 'votoindividual', 'deputado', 'id_deputado'),
+    ('votoindividual_id_votacao_fkey', 'votoindividual', 'sessaovotacao', 'id_votacao'),
+]
+
+# mv_alinhamento_partido (migração 9c4e2a7d1b58) depende de votoindividual
+VISAO_ALINHAMENTO = """
+    SELECT v.ano, p.id AS id_partido, p.sigla, p.nome_completo,
+           sum(CASE WHEN (v.tipo_voto = 'Sim' AND s.aprovacao = '1')
+                      OR (v.tipo_voto = 'Não' AND s.aprovacao = '0') THEN 1 ELSE 0 END) AS votos_alinhados,
+           count(v.id) AS votos_totais_decisivos
+    FROM partido p
+    JOIN deputado dep ON dep.id_partido = p.id
+    JOIN votoindividual v ON v.id_deputado = dep.id
+    JOIN sessaovotacao s ON s.id = v.id_votacao
+    WHERE v.tipo_voto IN ('Sim', 'Não') AND s.aprovacao IN ('1', '0') AND v.ano IS NOT NULL
+    GROUP BY v.ano, p.id, p.sigla, p.nome_completo
+"""
+
+
+def _recriar_tabela(tabela: str, particionada: bool) -> None:
+    # Com uma partição por ano presente nos dados (ver utils/migracoes.py)
+    chave, expressao_ano, limites = TABELAS[tabela]
+    colunas = colunas_gravaveis(tabela)
+    consulta = f"SELECT {colunas} FROM {tabela}"
+    if not particionada:
+        recriar_tabela(tabela, colunas, consulta)
+        return
+    anos = op.get_bind().execute(sa.text(f"SELECT DISTINCT {expressao_ano} FROM {tabela} ORDER BY 1")).scalars().all()
+    recriar_tabela(tabela, colunas, consulta, chave=chave, alteracoes=f"ALTER COLUMN {chave} SET NOT NULL",
+                   particoes=particoes_por_ano(tabela, anos, limites))
+
+
+def _recriar_visao_alinhamento() -> None:
+    op.execute(f"CREATE MATERIALIZED VIEW mv_alinhamento_partido AS {VISAO_ALINHAMENTO}")
+    op.create_index('ix_mv_alinhamento_partido_chave', 'mv_alinhamento_partido', ['ano', 'id_partido'], unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # data_hora_registro passa a ser chave: sem data no voto, vale a da sessão;
+    # votos sem nenhuma das duas não têm partição e são descartados
+    op.execute("""
+        UPDATE votoindividual v SET data_hora_registro = s.data_hora_registro
+        FROM sessaovotacao s
+        WHERE v.data_hora_registro IS NULL AND s.id = v.id_votacao
+    """)
+    op.execute("DELETE FROM votoindividual WHERE data_hora_registro IS NULL")
+    op.execute("DROP MATERIALIZED VIEW mv_alinhamento_partido")
+
+    for tabela in TABELAS:
+        _recriar_tabela(tabela, particionada=True)
+    for nome, tabela, referenciada, coluna in CHAVES_ESTRANGEIRAS:
+        op.create_foreign_key(nome, tabela, referenciada, [coluna], ['id'])
+    for nome, tabela, colunas, unico in INDICES_NOVOS:
+        op.create_index(nome, tabela, colunas, unique=unico)
+
+    _recriar_visao_alinhamento()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW mv_alinhamento_partido")
+
+    for tabela in TABELAS:
+        _recriar_tabela(tabela, particionada=False)
+    op.alter_column('votoindividual', 'data_hora_registro', existing_type=sa.DateTime(), nullable=True)
+    # Sem a chave de partição nas chaves únicas, repetições em anos diferentes
+    # não cabem: fica o recibo do ano mais recente e o primeiro voto gravado
+    op.execute("""
+        DELETE FROM despesa a
+        USING despesa b
+        WHERE a.id_deputado = b.id_deputado
+          AND a.cod_documento = b.cod_documento
+          AND a.parcela = b.parcela
+          AND a.ano < b.ano
+    """)
+    op.execute("""
+        DELETE FROM votoindividual a
+        USING votoindividual b
+        WHERE a.id_votacao = b.id_votacao
+          AND a.id_deputado = b.id_deputado
+          AND a.id > b.id
+    """)
+    # Resumo mensal e visões de despesa sem os recibos removidos
+    op.execute("DELETE FROM despesa_mensal")
+    op.execute("""
+        INSERT INTO despesa_mensal (id_deputado, ano, mes, tipo_despesa, total, quantidade, valor_minimo, valor_maximo)
+        SELECT id_deputado, ano, mes, tipo_despesa,
+               sum(valor_liquido), count(*), min(valor_liquido), max(valor_liquido)
+        FROM despesa
+        GROUP BY id_deputado, ano, mes, tipo_despesa
+    """)
+    op.execute("REFRESH MATERIALIZED VIEW mv_despesa_deputado")
+    op.execute("REFRESH MATERIALIZED VIEW mv_gasto_uf")
+    for nome, tabela, referenciada, coluna in CHAVES_ESTRANGEIRAS:
+        op.create_foreign_key(nome, tabela, referenciada, [coluna], ['id'])
+    for nome, tabela, colunas, unico in INDICES_ANTIGOS:
+        op.create_index(nome, tabela, colunas, unique=unico)
+
+    _recriar_visao_alinhamento()
@@ -0,0 +1,37 @@
+"""chave_natural_despesa
+
+Revision ID: 5d2c8e71a4f0
+Revises: 0e3357e8a920
+Create Date: 2026-10-18 11:26:04.381120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c8e71a4f0'
+down_revision: Union[str, None] = '0e3357e8a920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('despesa', sa.Column('cod_documento', sa.Integer(), nullable=True))
+    op.add_column('despesa', sa.Column('parcela', sa.Integer(), server_default='0', nullable=False))
+    # As despesas já carregadas ficam sem cod_documento e são substituídas,
+    # mês a mês, pelas versões com chave na próxima carga
+    op.create_index('ix_despesa_id_deputado_cod_documento_parcela', 'despesa', ['id_deputado', 'cod_documento', 'parcela'], unique=True)
+    # O índice único começa por id_deputado e já atende as buscas por deputado
+    op.drop_index(op.f('ix_despesa_id_deputado'), table_name='despesa')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_despesa_id_deputado'), 'despesa', ['id_deputado'], unique=False)
+    op.drop_index('ix_despesa_id_deputado_cod_documento_parcela', table_name='despesa')
+    op.drop_column('despesa', 'parcela')
+    op.drop_column('despesa', 'cod_documento')
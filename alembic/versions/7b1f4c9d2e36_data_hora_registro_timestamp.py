@@ -0,0 +1,50 @@
+"""data_hora_registro_timestamp
+
+Revision ID: 7b1f4c9d2e36
+Revises: 5d2c8e71a4f0
+Create Date: 2026-10-18 20:52:11.604318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1f4c9d2e36'
+down_revision: Union[str, None] = '5d2c8e71a4f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABELAS = ('sessaovotacao', 'votoindividual')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for tabela in TABELAS:
+        # Os textos gravados são ISO 8601 vindos da API; vazios viram NULL
+        op.alter_column(tabela, 'data_hora_registro',
+                   existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                   type_=postgresql.TIMESTAMP(),
+                   existing_nullable=True,
+                   postgresql_using="NULLIF(data_hora_registro, '')::timestamp")
+        op.add_column(tabela, sa.Column('ano', sa.SmallInteger(), sa.Computed('EXTRACT(YEAR FROM data_hora_registro)::smallint', persisted=True), nullable=True))
+        op.create_index(op.f(f'ix_{tabela}_data_hora_registro'), tabela, ['data_hora_registro'], unique=False)
+        op.create_index(op.f(f'ix_{tabela}_ano'), tabela, ['ano'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabela in TABELAS:
+        op.drop_index(op.f(f'ix_{tabela}_ano'), table_name=tabela)
+        op.drop_index(op.f(f'ix_{tabela}_data_hora_registro'), table_name=tabela)
+        op.drop_column(tabela, 'ano')
+        # Mesmo formato que as cargas gravavam: '2024-12-18T20:13:05'
+        op.alter_column(tabela, 'data_hora_registro',
+                   existing_type=postgresql.TIMESTAMP(),
+                   type_=sqlmodel.sql.sqltypes.AutoString(),
+                   existing_nullable=True,
+                   postgresql_using="to_char(data_hora_registro, 'YYYY-MM-DD\"T\"HH24:MI:SS')")
@@ -0,0 +1,63 @@
+"""visoes_materializadas_rankings
+
+Revision ID: 9c4e2a7d1b58
+Revises: 7b1f4c9d2e36
+Create Date: 2026-10-18 21:34:40.271953
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2a7d1b58'
+down_revision: Union[str, None] = '7b1f4c9d2e36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, consulta, colunas do índice único exigido pelo REFRESH ... CONCURRENTLY).
+# As cargas recriam as visões com as consultas de tratamentoDados/visoes_materializadas.py.
+VISOES = [
+    ('mv_despesa_deputado', """
+        SELECT id_deputado, sum(valor_liquido) AS total_despesas, count(*) AS quantidade
+        FROM despesa
+        GROUP BY id_deputado
+    """, ['id_deputado']),
+    ('mv_gasto_uf', """
+        SELECT d.ano, dep.sigla_uf,
+               sum(d.valor_liquido) AS total_gasto,
+               avg(d.valor_liquido) AS media_gasto,
+               count(d.id) AS quantidade,
+               count(DISTINCT dep.id) AS total_deputados
+        FROM deputado dep
+        JOIN despesa d ON d.id_deputado = dep.id
+        GROUP BY d.ano, dep.sigla_uf
+    """, ['ano', 'sigla_uf']),
+    ('mv_alinhamento_partido', """
+        SELECT v.ano, p.id AS id_partido, p.sigla, p.nome_completo,
+               sum(CASE WHEN (v.tipo_voto = 'Sim' AND s.aprovacao = '1')
+                          OR (v.tipo_voto = 'Não' AND s.aprovacao = '0') THEN 1 ELSE 0 END) AS votos_alinhados,
+               count(v.id) AS votos_totais_decisivos
+        FROM partido p
+        JOIN deputado dep ON dep.id_partido = p.id
+        JOIN votoindividual v ON v.id_deputado = dep.id
+        JOIN sessaovotacao s ON s.id = v.id_votacao
+        WHERE v.tipo_voto IN ('Sim', 'Não') AND s.aprovacao IN ('1', '0') AND v.ano IS NOT NULL
+        GROUP BY v.ano, p.id, p.sigla, p.nome_completo
+    """, ['ano', 'id_partido']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for nome, consulta, chave in VISOES:
+        op.execute(f"CREATE MATERIALIZED VIEW {nome} AS {consulta}")
+        op.create_index(f'ix_{nome}_chave', nome, chave, unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nome, _, _ in reversed(VISOES):
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {nome}")
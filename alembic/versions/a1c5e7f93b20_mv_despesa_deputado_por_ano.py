@@ -0,0 +1,47 @@
+"""mv_despesa_deputado_por_ano
+
+Revision ID: a1c5e7f93b20
+Revises: d2a6c4f8e190
+Create Date: 2026-10-20 14:12:48.903517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c5e7f93b20'
+down_revision: Union[str, None] = 'd2a6c4f8e190'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# mv_despesa_deputado (migração e3a8f5c21d47) passa a ter uma linha por ano:
+# (consulta, colunas do índice único)
+VISAO_NOVA = ("""
+    SELECT ano, id_deputado, sum(total) AS total_despesas, sum(quantidade)::bigint AS quantidade
+    FROM despesa_mensal
+    GROUP BY ano, id_deputado
+""", ['ano', 'id_deputado'])
+VISAO_ANTIGA = ("""
+    SELECT id_deputado, sum(total) AS total_despesas, sum(quantidade)::bigint AS quantidade
+    FROM despesa_mensal
+    GROUP BY id_deputado
+""", ['id_deputado'])
+
+
+def _recriar_visao(consulta: str, chave) -> None:
+    op.execute("DROP MATERIALIZED VIEW mv_despesa_deputado")
+    op.execute(f"CREATE MATERIALIZED VIEW mv_despesa_deputado AS {consulta}")
+    op.create_index('ix_mv_despesa_deputado_chave', 'mv_despesa_deputado', chave, unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _recriar_visao(*VISAO_NOVA)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recriar_visao(*VISAO_ANTIGA)
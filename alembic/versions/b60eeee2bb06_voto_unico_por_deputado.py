@@ -0,0 +1,39 @@
+"""voto_unico_por_deputado
+
+Revision ID: b60eeee2bb06
+Revises: fb1e6aad9410
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b60eeee2bb06'
+down_revision: Union[str, None] = 'fb1e6aad9410'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Remove votos repetidos de cargas anteriores, mantendo o primeiro gravado
+    op.execute("""
+        DELETE FROM votoindividual a
+        USING votoindividual b
+        WHERE a.id_votacao = b.id_votacao
+          AND a.id_deputado = b.id_deputado
+          AND a.id > b.id
+    """)
+    op.create_index('ix_votoindividual_id_votacao_id_deputado', 'votoindividual', ['id_votacao', 'id_deputado'], unique=True)
+    # O índice composto começa por id_votacao e já atende as buscas por sessão
+    op.drop_index(op.f('ix_votoindividual_id_votacao'), table_name='votoindividual')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_votoindividual_id_votacao'), 'votoindividual', ['id_votacao'], unique=False)
+    op.drop_index('ix_votoindividual_id_votacao_id_deputado', table_name='votoindividual')
@@ -0,0 +1,209 @@
+"""dominios_tipo_voto_sigla_tipo_despesa
+
+Revision ID: b7d3e91f4a62
+Revises: 4f6b9a2c8e13
+Create Date: 2026-10-19 15:42:07.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+from utils.migracoes import particoes_atuais, recriar_tabela
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e91f4a62'
+down_revision: Union[str, None] = '4f6b9a2c8e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Base das URIs que votoindividual guardava (tratamentoDados/cliente_http.py)
+URL_BASE_API = 'https://dadosabertos.camara.leg.br/api/v2'
+
+# Tabela particionada -> chave de partição (migração 4f6b9a2c8e13)
+PARTICIONADAS = {'despesa': 'ano', 'votoindividual': 'data_hora_registro'}
+
+# Índices fora das constraints: (nome, tabela, colunas, único)
+INDICES = [
+    ('ix_despesa_id_deputado_cod_documento_parcela_ano', 'despesa', ['id_deputado', 'cod_documento', 'parcela', 'ano'], True),
+    ('ix_votoindividual_id_votacao_id_deputado_data_hora_registro', 'votoindividual', ['id_votacao', 'id_deputado', 'data_hora_registro'], True),
+    ('ix_votoindividual_id_deputado', 'votoindividual', ['id_deputado'], False),
+    ('ix_votoindividual_data_hora_registro', 'votoindividual', ['data_hora_registro'], False),
+    ('ix_votoindividual_ano', 'votoindividual', ['ano'], False),
+]
+CHAVES_ESTRANGEIRAS = [
+    ('despesa_id_deputado_fkey', 'despesa', 'deputado', 'id_deputado'),
+    ('votoindividual_id_deputado_fkey', 'votoindividual', 'deputado', 'id_deputado'),
+    ('votoindividual_id_votacao_fkey', 'votoindividual', 'sessaovotacao', 'id_votacao'),
+]
+CHAVES_DOMINIOS = [
+    ('despesa_id_tipo_despesa_fkey', 'despesa', 'tipodespesa', 'id_tipo_despesa'),
+    ('votoindividual_id_tipo_voto_fkey', 'votoindividual', 'tipovoto', 'id_tipo_voto'),
+    ('votoindividual_id_sigla_partido_fkey', 'votoindividual', 'siglapartido', 'id_sigla_partido'),
+]
+
+# mv_alinhamento_partido depende de votoindividual.tipo_voto: (nova, antiga)
+VISAO_ALINHAMENTO = ("""
+    SELECT v.ano, p.id AS id_partido, p.sigla, p.nome_completo,
+           sum(CASE WHEN (t.descricao = 'Sim' AND s.aprovacao = '1')
+                      OR (t.descricao = 'Não' AND s.aprovacao = '0') THEN 1 ELSE 0 END) AS votos_alinhados,
+           count(v.id) AS votos_totais_decisivos
+    FROM partido p
+    JOIN deputado dep ON dep.id_partido = p.id
+    JOIN votoindividual v ON v.id_deputado = dep.id
+    JOIN tipovoto t ON t.id = v.id_tipo_voto
+    JOIN sessaovotacao s ON s.id = v.id_votacao
+    WHERE t.descricao IN ('Sim', 'Não') AND s.aprovacao IN ('1', '0') AND v.ano IS NOT NULL
+    GROUP BY v.ano, p.id, p.sigla, p.nome_completo
+""", """
+    SELECT v.ano, p.id AS id_partido, p.sigla, p.nome_completo,
+           sum(CASE WHEN (v.tipo_voto = 'Sim' AND s.aprovacao = '1')
+                      OR (v.tipo_voto = 'Não' AND s.aprovacao = '0') THEN 1 ELSE 0 END) AS votos_alinhados,
+           count(v.id) AS votos_totais_decisivos
+    FROM partido p
+    JOIN deputado dep ON dep.id_partido = p.id
+    JOIN votoindividual v ON v.id_deputado = dep.id
+    JOIN sessaovotacao s ON s.id = v.id_votacao
+    WHERE v.tipo_voto IN ('Sim', 'Não') AND s.aprovacao IN ('1', '0') AND v.ano IS NOT NULL
+    GROUP BY v.ano, p.id, p.sigla, p.nome_completo
+""")
+
+COLUNAS_DESPESA = 'id, id_deputado, ano, mes, valor_liquido, tipo_documento, url_documento, nome_fornecedor, cod_documento, parcela'
+COLUNAS_VOTO = 'id, id_votacao, id_deputado, data_hora_registro'
+
+
+def _recriar_tabela(tabela: str, alteracoes: str, colunas: str, consulta: str) -> None:
+    # A tabela (com as partições) é reescrita com as colunas novas já
+    # preenchidas: um ADD COLUMN seguido de UPDATE deixaria o texto antigo
+    # ocupando as páginas até um VACUUM FULL
+    recriar_tabela(tabela, colunas, consulta, chave=PARTICIONADAS[tabela], alteracoes=alteracoes,
+                   particoes=particoes_atuais(tabela))
+
+
+def _recriar_restricoes(chaves_estrangeiras) -> None:
+    for nome, tabela, referenciada, coluna in chaves_estrangeiras:
+        op.create_foreign_key(nome, tabela, referenciada, [coluna], ['id'])
+    for nome, tabela, colunas, unico in INDICES:
+        op.create_index(nome, tabela, colunas, unique=unico)
+
+
+def _recriar_despesa_mensal(removida: str, nova: sa.Column, expressao: str) -> None:
+    # O resumo é derivado de despesa (que aqui tem id_tipo_despesa): é
+    # esvaziado, muda a chave e é recalculado
+    op.execute("TRUNCATE despesa_mensal")
+    op.drop_column('despesa_mensal', removida)
+    op.add_column('despesa_mensal', nova)
+    op.create_primary_key('despesa_mensal_pkey', 'despesa_mensal', ['id_deputado', 'ano', 'mes', nova.name])
+    op.execute(f"""
+        INSERT INTO despesa_mensal (id_deputado, ano, mes, {nova.name}, total, quantidade, valor_minimo, valor_maximo)
+        SELECT d.id_deputado, d.ano, d.mes, {expressao},
+               sum(d.valor_liquido), count(*), min(d.valor_liquido), max(d.valor_liquido)
+        FROM despesa d
+        JOIN tipodespesa t ON t.id = d.id_tipo_despesa
+        GROUP BY d.id_deputado, d.ano, d.mes, {expressao}
+    """)
+
+
+def _criar_visao_alinhamento(consulta: str) -> None:
+    op.execute(f"CREATE MATERIALIZED VIEW mv_alinhamento_partido AS {consulta}")
+    op.create_index('ix_mv_alinhamento_partido_chave', 'mv_alinhamento_partido', ['ano', 'id_partido'], unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tipovoto',
+    sa.Column('id', sa.SmallInteger(), nullable=False),
+    sa.Column('descricao', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('descricao')
+    )
+    op.create_table('siglapartido',
+    sa.Column('id', sa.SmallInteger(), nullable=False),
+    sa.Column('sigla', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sigla')
+    )
+    op.create_table('tipodespesa',
+    sa.Column('id', sa.SmallInteger(), nullable=False),
+    sa.Column('descricao', sqlmodel.sql.sqltypes.AutoString(length=300), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('descricao')
+    )
+    op.execute("INSERT INTO tipovoto (descricao) SELECT DISTINCT tipo_voto FROM votoindividual ORDER BY 1")
+    op.execute("""
+        INSERT INTO siglapartido (sigla)
+        SELECT DISTINCT sigla_partido_deputado FROM votoindividual WHERE sigla_partido_deputado IS NOT NULL ORDER BY 1
+    """)
+    op.execute("INSERT INTO tipodespesa (descricao) SELECT DISTINCT tipo_despesa FROM despesa ORDER BY 1")
+
+    op.execute("DROP MATERIALIZED VIEW mv_alinhamento_partido")
+    # As URIs do deputado e da sessão não são copiadas: a API as monta a partir dos ids
+    _recriar_tabela(
+        'votoindividual',
+        "DROP COLUMN tipo_voto, DROP COLUMN sigla_partido_deputado, DROP COLUMN uri_deputado, DROP COLUMN uri_sessao_votacao, "
+        "ADD COLUMN id_tipo_voto smallint NOT NULL, ADD COLUMN id_sigla_partido smallint",
+        f"{COLUNAS_VOTO}, id_tipo_voto, id_sigla_partido",
+        f"""
+        SELECT {', '.join('v.' + coluna for coluna in COLUNAS_VOTO.split(', '))}, t.id, s.id
+        FROM votoindividual v
+        JOIN tipovoto t ON t.descricao = v.tipo_voto
+        LEFT JOIN siglapartido s ON s.sigla = v.sigla_partido_deputado
+        """,
+    )
+    _recriar_tabela(
+        'despesa',
+        "DROP COLUMN tipo_despesa, ADD COLUMN id_tipo_despesa smallint NOT NULL",
+        f"{COLUNAS_DESPESA}, id_tipo_despesa",
+        f"""
+        SELECT {', '.join('d.' + coluna for coluna in COLUNAS_DESPESA.split(', '))}, t.id
+        FROM despesa d
+        JOIN tipodespesa t ON t.descricao = d.tipo_despesa
+        """,
+    )
+    _recriar_restricoes(CHAVES_ESTRANGEIRAS + CHAVES_DOMINIOS)
+
+    _recriar_despesa_mensal('tipo_despesa', sa.Column('id_tipo_despesa', sa.SmallInteger(), nullable=False), 't.id')
+    op.create_foreign_key('despesa_mensal_id_tipo_despesa_fkey', 'despesa_mensal', 'tipodespesa', ['id_tipo_despesa'], ['id'])
+    _criar_visao_alinhamento(VISAO_ALINHAMENTO[0])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW mv_alinhamento_partido")
+    _recriar_despesa_mensal('id_tipo_despesa', sa.Column('tipo_despesa', sqlmodel.sql.sqltypes.AutoString(length=300), nullable=False), 't.descricao')
+
+    _recriar_tabela(
+        'votoindividual',
+        "DROP COLUMN id_tipo_voto, DROP COLUMN id_sigla_partido, "
+        "ADD COLUMN tipo_voto varchar(50) NOT NULL, ADD COLUMN sigla_partido_deputado varchar(50), "
+        "ADD COLUMN uri_deputado varchar(500), ADD COLUMN uri_sessao_votacao varchar(500)",
+        f"{COLUNAS_VOTO}, tipo_voto, sigla_partido_deputado, uri_deputado, uri_sessao_votacao",
+        f"""
+        SELECT {', '.join('v.' + coluna for coluna in COLUNAS_VOTO.split(', '))}, t.descricao, s.sigla,
+               '{URL_BASE_API}/deputados/' || dep.id_dados_abertos, sv.uri
+        FROM votoindividual v
+        JOIN tipovoto t ON t.id = v.id_tipo_voto
+        LEFT JOIN siglapartido s ON s.id = v.id_sigla_partido
+        JOIN deputado dep ON dep.id = v.id_deputado
+        JOIN sessaovotacao sv ON sv.id = v.id_votacao
+        """,
+    )
+    _recriar_tabela(
+        'despesa',
+        "DROP COLUMN id_tipo_despesa, ADD COLUMN tipo_despesa varchar(300) NOT NULL",
+        f"{COLUNAS_DESPESA}, tipo_despesa",
+        f"""
+        SELECT {', '.join('d.' + coluna for coluna in COLUNAS_DESPESA.split(', '))}, t.descricao
+        FROM despesa d
+        JOIN tipodespesa t ON t.id = d.id_tipo_despesa
+        """,
+    )
+    _recriar_restricoes(CHAVES_ESTRANGEIRAS)
+
+    op.drop_table('tipodespesa')
+    op.drop_table('siglapartido')
+    op.drop_table('tipovoto')
+    _criar_visao_alinhamento(VISAO_ALINHAMENTO[1])
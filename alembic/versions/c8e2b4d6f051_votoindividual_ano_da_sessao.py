@@ -0,0 +1,58 @@
+"""votoindividual_ano_da_sessao
+
+Revision ID: c8e2b4d6f051
+Revises: a1c5e7f93b20
+Create Date: 2026-10-20 16:37:05.284119
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e2b4d6f051'
+down_revision: Union[str, None] = 'a1c5e7f93b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# mv_alinhamento_partido (migração d2a6c4f8e190) agrupa por votoindividual.ano
+VISAO_ALINHAMENTO = """
+    SELECT v.ano, p.id AS id_partido, p.sigla, p.nome_completo,
+           sum(CASE WHEN (t.descricao = 'Sim' AND s.aprovacao = '1')
+                      OR (t.descricao = 'Não' AND s.aprovacao = '0') THEN 1 ELSE 0 END) AS votos_alinhados,
+           count(v.id) AS votos_totais_decisivos
+    FROM partido p
+    JOIN deputado dep ON dep.id_partido = p.id
+    JOIN votoindividual v ON v.id_deputado = dep.id
+    JOIN tipovoto t ON t.id = v.id_tipo_voto
+    JOIN sessaovotacao s ON s.id = v.id_votacao
+    WHERE t.descricao IN ('Sim', 'Não') AND s.aprovacao IN ('1', '0') AND v.ano IS NOT NULL
+    GROUP BY v.ano, p.id, p.sigla, p.nome_completo
+"""
+
+
+def _trocar_ano(coluna: str) -> None:
+    # A expressão de uma coluna gerada não muda no lugar: ela é recriada, e
+    # as partições reescritas uma vez
+    op.execute("DROP MATERIALIZED VIEW mv_alinhamento_partido")
+    op.drop_column('votoindividual', 'ano')
+    op.add_column('votoindividual', sa.Column(
+        'ano', sa.SmallInteger(), sa.Computed(f"EXTRACT(YEAR FROM {coluna})::smallint", persisted=True), nullable=True
+    ))
+    op.create_index('ix_votoindividual_ano', 'votoindividual', ['ano'])
+    op.execute(f"CREATE MATERIALIZED VIEW mv_alinhamento_partido AS {VISAO_ALINHAMENTO}")
+    op.create_index('ix_mv_alinhamento_partido_chave', 'mv_alinhamento_partido', ['ano', 'id_partido'], unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # O ano do voto passa a ser o da sessão (a chave de partição), o mesmo
+    # que os filtros por ano usam
+    _trocar_ano('data_hora_sessao')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _trocar_ano('data_hora_registro')
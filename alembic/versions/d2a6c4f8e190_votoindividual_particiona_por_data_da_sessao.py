@@ -0,0 +1,104 @@
+"""votoindividual_particiona_por_data_da_sessao
+
+Revision ID: d2a6c4f8e190
+Revises: b7d3e91f4a62
+Create Date: 2026-10-20 10:04:31.552190
+
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migracoes import particoes_por_ano, recriar_tabela
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6c4f8e190'
+down_revision: Union[str, None] = 'b7d3e91f4a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHAVES_ESTRANGEIRAS = [
+    ('votoindividual_id_deputado_fkey', 'deputado', 'id_deputado'),
+    ('votoindividual_id_votacao_fkey', 'sessaovotacao', 'id_votacao'),
+    ('votoindividual_id_tipo_voto_fkey', 'tipovoto', 'id_tipo_voto'),
+    ('votoindividual_id_sigla_partido_fkey', 'siglapartido', 'id_sigla_partido'),
+]
+# Índices fora das constraints, sem a chave única: (nome, colunas)
+INDICES = [
+    ('ix_votoindividual_id_deputado', ['id_deputado']),
+    ('ix_votoindividual_data_hora_registro', ['data_hora_registro']),
+    ('ix_votoindividual_ano', ['ano']),
+]
+
+# mv_alinhamento_partido (migração b7d3e91f4a62) depende de votoindividual
+VISAO_ALINHAMENTO = """
+    SELECT v.ano, p.id AS id_partido, p.sigla, p.nome_completo,
+           sum(CASE WHEN (t.descricao = 'Sim' AND s.aprovacao = '1')
+                      OR (t.descricao = 'Não' AND s.aprovacao = '0') THEN 1 ELSE 0 END) AS votos_alinhados,
+           count(v.id) AS votos_totais_decisivos
+    FROM partido p
+    JOIN deputado dep ON dep.id_partido = p.id
+    JOIN votoindividual v ON v.id_deputado = dep.id
+    JOIN tipovoto t ON t.id = v.id_tipo_voto
+    JOIN sessaovotacao s ON s.id = v.id_votacao
+    WHERE t.descricao IN ('Sim', 'Não') AND s.aprovacao IN ('1', '0') AND v.ano IS NOT NULL
+    GROUP BY v.ano, p.id, p.sigla, p.nome_completo
+"""
+
+COLUNAS_VOTO = 'id, id_votacao, id_deputado, data_hora_registro, id_tipo_voto, id_sigla_partido'
+
+
+def _recriar_votoindividual(chave: str, coluna_nova: Optional[str], consulta: str) -> None:
+    # Não dá para mudar a chave de partição de uma tabela: ela é recriada,
+    # com uma partição por ano de `chave` (ver utils/migracoes.py)
+    anos = op.get_bind().execute(sa.text(
+        f"SELECT DISTINCT EXTRACT(YEAR FROM {chave})::int FROM ({consulta}) x ORDER BY 1"
+    )).scalars().all()
+    op.execute("DROP MATERIALIZED VIEW mv_alinhamento_partido")
+    colunas = COLUNAS_VOTO + (", data_hora_sessao" if coluna_nova else "")
+    recriar_tabela(
+        'votoindividual', colunas, f"SELECT {colunas} FROM ({consulta}) x", chave=chave, coluna_nova=coluna_nova,
+        alteracoes=None if coluna_nova else "DROP COLUMN data_hora_sessao",
+        particoes=particoes_por_ano('votoindividual', anos, "FROM ('{ano}-01-01') TO ('{proximo}-01-01')"),
+    )
+
+    for nome, referenciada, coluna in CHAVES_ESTRANGEIRAS:
+        op.create_foreign_key(nome, 'votoindividual', referenciada, [coluna], ['id'])
+    op.create_index(f'ix_votoindividual_id_votacao_id_deputado_{chave}', 'votoindividual', ['id_votacao', 'id_deputado', chave], unique=True)
+    for nome, colunas_indice in INDICES:
+        op.create_index(nome, 'votoindividual', colunas_indice)
+
+    op.execute(f"CREATE MATERIALIZED VIEW mv_alinhamento_partido AS {VISAO_ALINHAMENTO}")
+    op.create_index('ix_mv_alinhamento_partido_chave', 'mv_alinhamento_partido', ['ano', 'id_partido'], unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Com data_hora_registro na chave única, uma sessão recarregada podia
+    # gravar de novo o voto de um deputado com outra data: fica o primeiro
+    op.execute("""
+        DELETE FROM votoindividual a
+        USING votoindividual b
+        WHERE a.id_votacao = b.id_votacao
+          AND a.id_deputado = b.id_deputado
+          AND a.id > b.id
+    """)
+    # A partição passa a ser a da data da sessão, igual para todos os votos
+    # dela; votos de sessões sem data não têm partição
+    _recriar_votoindividual(
+        'data_hora_sessao',
+        'data_hora_sessao timestamp NOT NULL',
+        f"""
+        SELECT {', '.join('v.' + coluna for coluna in COLUNAS_VOTO.split(', '))}, s.data_hora_registro AS data_hora_sessao
+        FROM votoindividual v
+        JOIN sessaovotacao s ON s.id = v.id_votacao
+        WHERE s.data_hora_registro IS NOT NULL
+        """,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recriar_votoindividual('data_hora_registro', None, f"SELECT {COLUNAS_VOTO} FROM votoindividual")
@@ -0,0 +1,91 @@
+"""despesa_mensal
+
+Revision ID: e3a8f5c21d47
+Revises: 9c4e2a7d1b58
+Create Date: 2026-10-18 22:41:07.518346
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8f5c21d47'
+down_revision: Union[str, None] = '9c4e2a7d1b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Visões de despesa da migração 9c4e2a7d1b58, agora calculadas sobre o resumo
+# mensal. (nome, consulta nova, consulta antiga, colunas do índice único)
+VISOES = [
+    ('mv_despesa_deputado', """
+        SELECT id_deputado, sum(total) AS total_despesas, sum(quantidade)::bigint AS quantidade
+        FROM despesa_mensal
+        GROUP BY id_deputado
+    """, """
+        SELECT id_deputado, sum(valor_liquido) AS total_despesas, count(*) AS quantidade
+        FROM despesa
+        GROUP BY id_deputado
+    """, ['id_deputado']),
+    ('mv_gasto_uf', """
+        SELECT r.ano, dep.sigla_uf,
+               sum(r.total) AS total_gasto,
+               sum(r.total) / sum(r.quantidade) AS media_gasto,
+               sum(r.quantidade)::bigint AS quantidade,
+               count(DISTINCT dep.id) AS total_deputados
+        FROM deputado dep
+        JOIN despesa_mensal r ON r.id_deputado = dep.id
+        GROUP BY r.ano, dep.sigla_uf
+    """, """
+        SELECT d.ano, dep.sigla_uf,
+               sum(d.valor_liquido) AS total_gasto,
+               avg(d.valor_liquido) AS media_gasto,
+               count(d.id) AS quantidade,
+               count(DISTINCT dep.id) AS total_deputados
+        FROM deputado dep
+        JOIN despesa d ON d.id_deputado = dep.id
+        GROUP BY d.ano, dep.sigla_uf
+    """, ['ano', 'sigla_uf']),
+]
+
+
+def _recriar_visoes(indice_consulta: int) -> None:
+    for visao in VISOES:
+        nome, chave = visao[0], visao[3]
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {nome}")
+        op.execute(f"CREATE MATERIALIZED VIEW {nome} AS {visao[indice_consulta]}")
+        op.create_index(f'ix_{nome}_chave', nome, chave, unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('despesa_mensal',
+    sa.Column('id_deputado', sa.Integer(), nullable=False),
+    sa.Column('ano', sa.Integer(), nullable=False),
+    sa.Column('mes', sa.Integer(), nullable=False),
+    sa.Column('tipo_despesa', sqlmodel.sql.sqltypes.AutoString(length=300), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('valor_minimo', sa.Float(), nullable=False),
+    sa.Column('valor_maximo', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['id_deputado'], ['deputado.id'], ),
+    sa.PrimaryKeyConstraint('id_deputado', 'ano', 'mes', 'tipo_despesa')
+    )
+    # Resumo inicial das despesas já carregadas; daqui em diante a carga o mantém
+    op.execute("""
+        INSERT INTO despesa_mensal (id_deputado, ano, mes, tipo_despesa, total, quantidade, valor_minimo, valor_maximo)
+        SELECT id_deputado, ano, mes, tipo_despesa,
+               sum(valor_liquido), count(*), min(valor_liquido), max(valor_liquido)
+        FROM despesa
+        GROUP BY id_deputado, ano, mes, tipo_despesa
+    """)
+    _recriar_visoes(1)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recriar_visoes(2)
+    op.drop_table('despesa_mensal')
@@ -0,0 +1,111 @@
+"""
+Compara o download serial das despesas (um `requests.get` por deputado) com o
+download concorrente de `tratamentoDados.cliente_http`, usando um servidor
+local que imita a rota `/deputados/{id}/despesas` com latência artificial.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.download_despesas --deputados 513 --latencia 0.2 --concorrencia 16
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import requests
+
+from tratamentoDados.cliente_http import buscar_json, criar_sessao_http, executar_concorrente
+
+ROTA_DESPESAS = re.compile(r"^/api/v2/deputados/(\d+)/despesas")
+
+def criar_servidor_stub(latencia: float, despesas_por_deputado: int) -> ThreadingHTTPServer:
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # mantém a conexão aberta entre requisições
+
+        def do_GET(self):
+            rota = ROTA_DESPESAS.match(self.path)
+            if not rota:
+                self.send_error(404)
+                return
+
+            time.sleep(latencia)
+            id_deputado = int(rota.group(1))
+            corpo = json.dumps({
+                "dados": [
+                    {
+                        "ano": 2024,
+                        "mes": (i % 12) + 1,
+                        "tipoDespesa": "COMBUSTÍVEIS E LUBRIFICANTES.",
+                        "codDocumento": id_deputado * 10000 + i,
+                        "tipoDocumento": "Nota Fiscal",
+                        "valorLiquido": 100.0 + i,
+                        "urlDocumento": None,
+                        "nomeFornecedor": "POSTO STUB",
+                        "parcela": 0
+                    }
+                    for i in range(despesas_por_deputado)
+                ],
+                "links": []
+            }).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+
+def download_serial(urls: List[str]) -> List[Dict]:
+    # Reproduz o laço original: uma conexão nova por deputado, sem paralelismo
+    resultados = []
+    for url in urls:
+        response = requests.get(url, headers={"accept": "application/json"})
+        resultados.append(response.json())
+    return resultados
+
+def download_concorrente(urls: List[str], limite: int) -> List[Dict]:
+    with criar_sessao_http(limite) as sessao:
+        return executar_concorrente(lambda url: buscar_json(sessao, url), urls, limite)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deputados", type=int, default=513)
+    parser.add_argument("--latencia", type=float, default=0.2, help="Latência simulada por requisição, em segundos.")
+    parser.add_argument("--despesas", type=int, default=200, help="Despesas retornadas por deputado.")
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--pular-serial", action="store_true", help="Mede apenas o download concorrente.")
+    args = parser.parse_args()
+
+    servidor = criar_servidor_stub(args.latencia, args.despesas)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    host, porta = servidor.server_address
+    urls = [f"http://{host}:{porta}/api/v2/deputados/{i}/despesas?ano=2024" for i in range(1, args.deputados + 1)]
+
+    try:
+        tempo_serial = None
+        if not args.pular_serial:
+            inicio = time.perf_counter()
+            serial = download_serial(urls)
+            tempo_serial = time.perf_counter() - inicio
+            print(f"Serial:      {tempo_serial:8.2f}s ({len(serial)} deputados)")
+
+        inicio = time.perf_counter()
+        concorrente = download_concorrente(urls, args.concorrencia)
+        tempo_concorrente = time.perf_counter() - inicio
+        print(f"Concorrente: {tempo_concorrente:8.2f}s ({len(concorrente)} deputados, limite {args.concorrencia})")
+
+        if any(corpo is None for corpo in concorrente):
+            print("AVISO: algumas requisições concorrentes falharam.")
+        if tempo_serial:
+            print(f"Speedup:     {tempo_serial / tempo_concorrente:8.1f}x")
+    finally:
+        servidor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compara o parse dos XMLs de sessão na própria thread (ET.fromstring + findall,
+como `buscar_detalhes_sessao_xml` fazia) com `extrair_proposicoes_afetadas`
+de `tratamentoDados.parser_xml`, na thread e no pool de processos, chamado de
+várias threads como nas cargas. Os documentos são sintéticos, no formato da
+API; com `--proposicoes` alto eles passam de CAMARA_LIMITE_ITERPARSE e são
+lidos com iterparse.
+
+Em máquinas de um núcleo o pool não tem como ganhar; o resultado só faz
+sentido com vários núcleos.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.parser_xml --documentos 2000 --proposicoes 200
+"""
+import argparse
+import os
+import random
+import time
+import xml.etree.ElementTree as ET
+from typing import List
+
+from tratamentoDados import parser_xml
+from tratamentoDados.cliente_http import executar_concorrente
+
+def gerar_documento(aleatorio: random.Random, proposicoes: int) -> bytes:
+    itens = "".join(
+        f"<proposicoesAfetadas><id>{aleatorio.randint(1, 2500000)}</id>"
+        f"<uri>https://dadosabertos.camara.leg.br/api/v2/proposicoes/{i}</uri>"
+        f"<siglaTipo>PL</siglaTipo><numero>{i}</numero><ano>2024</ano>"
+        f"<ementa>{'Dispõe sobre ' * 20}</ementa></proposicoesAfetadas>"
+        for i in range(proposicoes)
+    )
+    return f"<xml><dados><id>2437345-1</id><proposicoesAfetadas>{itens}</proposicoesAfetadas></dados></xml>".encode("utf-8")
+
+def parse_local(conteudo: bytes) -> List[str]:
+    root = ET.fromstring(conteudo)
+    return [elem.text for elem in root.findall('.//proposicoesAfetadas/proposicoesAfetadas/id') if elem.text]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documentos", type=int, default=2000)
+    parser.add_argument("--proposicoes", type=int, default=200, help="Proposições afetadas por documento.")
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(42)
+    documentos = [gerar_documento(aleatorio, args.proposicoes) for _ in range(args.documentos)]
+    tamanho_mb = sum(len(documento) for documento in documentos) / (1024 * 1024)
+    print(f"{args.documentos} documentos ({tamanho_mb:.1f} MB), {os.cpu_count()} núcleos, {parser_xml.PROCESSOS_PARSER} processos no pool")
+
+    cenarios = [
+        ("Thread (findall)", parse_local),
+        ("Thread (parser_xml)", parser_xml.extrair_proposicoes_afetadas),
+        ("Pool (parser_xml)", lambda documento: parser_xml.analisar_xml(parser_xml.extrair_proposicoes_afetadas, documento)),
+    ]
+    # Sobe os processos do pool antes de medir
+    parser_xml.analisar_xml(parser_xml.extrair_proposicoes_afetadas, documentos[0])
+
+    for nome, funcao in cenarios:
+        inicio = time.perf_counter()
+        executar_concorrente(funcao, documentos, args.threads)
+        duracao = time.perf_counter() - inicio
+        print(f"{nome:<20} {duracao:8.2f}s  {args.documentos / duracao:8.0f} documentos/s")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@ from sqlmodel import SQLModel, Session, create_engine
 
 from models.deputado import Deputado
 from models.despesa import Despesa
+from models.despesa_mensal import DespesaMensal
+from models.dominios import SiglaPartido, TipoDespesa, TipoVoto
+from models.estado_sincronizacao import EstadoSincronizacao
 from models.gabinete import Gabinete
 from models.partido import Partido
 from models.proposicao import Proposicao
@@ -12,3 +12,22 @@ class DespesaResponse(SQLModel):
     tipo_documento: Optional[str] = None
     url_documento: Optional[str] = None
     nome_fornecedor: Optional[str] = None
+    cod_documento: Optional[int] = None
+    parcela: int = 0
+
+    @classmethod
+    def from_model(cls, despesa, tipo_despesa: str):
+        # O tipo é gravado como código em despesa (ver models/dominios.py)
+        return cls(
+            id=despesa.id,
+            id_deputado=despesa.id_deputado,
+            ano=despesa.ano,
+            mes=despesa.mes,
+            tipo_despesa=tipo_despesa,
+            valor_liquido=despesa.valor_liquido,
+            tipo_documento=despesa.tipo_documento,
+            url_documento=despesa.url_documento,
+            nome_fornecedor=despesa.nome_fornecedor,
+            cod_documento=despesa.cod_documento,
+            parcela=despesa.parcela
+        )
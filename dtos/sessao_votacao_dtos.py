@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from sqlmodel import Field, SQLModel
 
@@ -6,7 +7,7 @@ from sqlmodel import Field, SQLModel
 class SessaoVotacaoResponse(SQLModel):
     id: Optional[int]
     id_dados_abertos: Optional[str]
-    data_hora_registro: Optional[str]
+    data_hora_registro: Optional[datetime]
     descricao: Optional[str]
     sigla_orgao: Optional[str]
     aprovacao: Optional[str]
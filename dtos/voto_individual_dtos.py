@@ -1,26 +1,30 @@
-
+from datetime import datetime
 from typing import Optional
 from sqlmodel import Field, SQLModel
 
+from utils.api_camara import uri_deputado, uri_votacao
+
+# As URIs não são gravadas em votoindividual: são as da API da Câmara,
+# montadas a partir dos ids dos Dados Abertos (ver utils/api_camara.py)
 class VotoIndividualResponse(SQLModel):
     id: Optional[int]
     id_votacao: Optional[int]
     id_deputado: Optional[int]
     tipo_voto: Optional[str]
-    data_hora_registro: Optional[str]
+    data_hora_registro: Optional[datetime]
     sigla_partido_deputado: Optional[str]
     uri_deputado: Optional[str]
     uri_sessao_votacao: Optional[str]
 
     @classmethod
-    def from_model(cls, voto):
+    def from_model(cls, voto, tipo_voto: str, sigla_partido: Optional[str], id_deputado_api: int, id_votacao_api: str):
         return cls(
             id=voto.id,
             id_votacao=voto.id_votacao,
             id_deputado=voto.id_deputado,
-            tipo_voto=voto.tipo_voto,
+            tipo_voto=tipo_voto,
             data_hora_registro=voto.data_hora_registro,
-            sigla_partido_deputado=voto.sigla_partido_deputado,
-            uri_deputado=voto.uri_deputado,
-            uri_sessao_votacao=voto.uri_sessao_votacao
+            sigla_partido_deputado=sigla_partido,
+            uri_deputado=uri_deputado(id_deputado_api),
+            uri_sessao_votacao=uri_votacao(id_votacao_api)
         )
@@ -8,6 +8,7 @@ from routers.voto_individual_router import voto_router
 from routers.gabinete_router import gabinete_router
 from routers.partido_router import partido_router
 from routers.proposicao_router import proposicao_router
+from utils.querys import CABECALHO_ATUALIZACAO
 
 app = FastAPI()
 
@@ -17,6 +18,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Hora da última atualização dos rankings (ver utils/querys.py)
+    expose_headers=[CABECALHO_ATUALIZACAO],
 )
 
 # Incluindo as rotas
@@ -1,17 +1,28 @@
 
 from typing import Optional
+from sqlalchemy import Index, SmallInteger
 from sqlmodel import Field, SQLModel, Relationship
 
 class Despesa(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    id_deputado: int = Field(foreign_key="deputado.id", index=True, description="ID do deputado a quem a despesa pertence.")
-    ano: int = Field(description="Ano da despesa.")
+    # Particionada por ano (ver tratamentoDados/particoes.py): as chaves
+    # primária e únicas precisam incluir o ano. A chave natural da despesa na
+    # fonte também atende as buscas por id_deputado
+    __table_args__ = (
+        Index("ix_despesa_id_deputado_cod_documento_parcela_ano", "id_deputado", "cod_documento", "parcela", "ano", unique=True),
+        {"postgresql_partition_by": "RANGE (ano)"},
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    id_deputado: int = Field(foreign_key="deputado.id", description="ID do deputado a quem a despesa pertence.")
+    ano: int = Field(primary_key=True, description="Ano da despesa.")
     mes: int = Field(description="Mês da despesa.")
-    tipo_despesa: str = Field(max_length=300, description="Tipo da despesa (ex: 'Passagens Aéreas', 'Combustíveis').")
+    id_tipo_despesa: int = Field(foreign_key="tipodespesa.id", sa_type=SmallInteger, description="Tipo da despesa, em tipodespesa (models/dominios.py).")
     valor_liquido: float = Field(description="Valor líquido da despesa.")
 
     tipo_documento: Optional[str] = Field(default=None, max_length=100)
     url_documento: Optional[str] = Field(default=None, max_length=500)
     nome_fornecedor: Optional[str] = Field(default=None, max_length=255)
+    cod_documento: Optional[int] = Field(default=None, description="codDocumento da API (ideDocumento no arquivo da CEAP).")
+    parcela: int = Field(default=0, description="Parcela do documento; 0 quando não é parcelado.")
 
     deputado: "Deputado" = Relationship(back_populates="despesas")
\ No newline at end of file
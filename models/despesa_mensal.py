@@ -0,0 +1,18 @@
+from sqlalchemy import SmallInteger
+from sqlmodel import Field, SQLModel
+
+class DespesaMensal(SQLModel, table=True):
+    # Resumo de despesa por (deputado, mês, tipo), mantido pela carga de
+    # despesas (ver tratamentoDados/despesa_mensal.py). As análises leem daqui
+    # em vez de somar os recibos.
+    __tablename__ = "despesa_mensal"
+
+    id_deputado: int = Field(foreign_key="deputado.id", primary_key=True)
+    ano: int = Field(primary_key=True)
+    mes: int = Field(primary_key=True)
+    id_tipo_despesa: int = Field(foreign_key="tipodespesa.id", primary_key=True, sa_type=SmallInteger)
+
+    total: float = Field(description="Soma do valor líquido dos recibos.")
+    quantidade: int = Field(description="Quantidade de recibos.")
+    valor_minimo: float = Field(description="Menor valor líquido entre os recibos.")
+    valor_maximo: float = Field(description="Maior valor líquido entre os recibos.")
@@ -0,0 +1,22 @@
+from typing import Optional
+from sqlalchemy import SmallInteger
+from sqlmodel import Field, SQLModel
+
+# Tabelas de domínio: cada texto repetido nas tabelas grandes (votoindividual,
+# despesa, despesa_mensal) fica gravado uma vez só, e elas guardam o código
+# smallint. Os códigos são criados pelas cargas quando um texto novo aparece
+# (ver tratamentoDados/dominios.py).
+
+class TipoVoto(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=SmallInteger)
+    descricao: str = Field(max_length=50, unique=True, description="Sim, Não, Abstenção, Obstrução, Artigo 17...")
+
+class SiglaPartido(SQLModel, table=True):
+    # Sigla do partido do deputado na hora da carga do voto, que pode não
+    # estar mais na tabela partido
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=SmallInteger)
+    sigla: str = Field(max_length=50, unique=True)
+
+class TipoDespesa(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=SmallInteger)
+    descricao: str = Field(max_length=300, unique=True, description="Ex: 'PASSAGEM AÉREA - SIGEPA', 'COMBUSTÍVEIS E LUBRIFICANTES.'")
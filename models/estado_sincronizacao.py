@@ -0,0 +1,28 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+# Fontes usadas pelas cargas incrementais
+FONTE_DESPESA = "despesa"
+FONTE_SESSAO_PROPOSICAO = "sessao_proposicao"
+FONTE_VOTO_INDIVIDUAL = "voto_individual"
+FONTE_SESSAO_VOTACAO = "sessao_votacao"
+# Hora da última atualização de cada visão materializada (chave: nome da visão)
+FONTE_VISAO_MATERIALIZADA = "visao_materializada"
+
+# Chave da maior dataHoraRegistro já carregada em FONTE_SESSAO_VOTACAO
+CHAVE_DATA_HORA_REGISTRO = "data_hora_registro"
+
+class EstadoSincronizacao(SQLModel, table=True):
+    # Uma marca por (fonte, chave); as cargas gravam as marcas na mesma
+    # transação dos dados, então uma execução interrompida retoma de onde parou
+    __table_args__ = (
+        Index("ix_estadosincronizacao_fonte_chave", "fonte", "chave", unique=True),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    fonte: str = Field(max_length=50, description="Carga dona da marca (ex: 'despesa', 'voto_individual').")
+    chave: str = Field(max_length=100, description="O que a marca acompanha (ex: ID do deputado, ID da sessão).")
+    valor: Optional[str] = Field(default=None, max_length=100, description="Última posição carregada (ex: '2024-05').")
+    atualizado_em: datetime = Field(default_factory=datetime.utcnow)
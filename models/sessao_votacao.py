@@ -1,12 +1,15 @@
 from typing import Optional, List
 from datetime import date, datetime
-from sqlalchemy import TEXT, Column
+from sqlalchemy import TEXT, Column, Computed, DateTime, SmallInteger
 from sqlmodel import Field, SQLModel, Relationship
 
 class SessaoVotacao(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     id_dados_abertos: str = Field(index=True, unique=True, description="ID da votação nos Dados Abertos da Câmara.")
-    data_hora_registro: Optional[str] = Field(default=None, description="Data e hora do registro da votação.")
+    data_hora_registro: Optional[datetime] = Field(default=None, description="Data e hora do registro da votação.", sa_column=Column(DateTime, index=True))
+    ano: Optional[int] = Field(default=None, sa_column=Column(
+        SmallInteger, Computed("EXTRACT(YEAR FROM data_hora_registro)::smallint", persisted=True), index=True
+    ))
     descricao: str = Field(description="Descrição da votação.", sa_column=Column(TEXT))
 
     sigla_orgao: Optional[str] = Field(default=None, max_length=500)
@@ -0,0 +1,36 @@
+from sqlalchemy import BigInteger, Column, Float, Integer, MetaData, SmallInteger, String, Table
+
+# Visões materializadas dos rankings do painel, criadas pela migração e
+# atualizadas no fim de cada carga (ver tratamentoDados/visoes_materializadas.py).
+# Ficam fora do SQLModel.metadata para o create_all e o autogenerate do
+# Alembic não as tratarem como tabelas. A chave primária de cada uma é o
+# índice único exigido pelo REFRESH ... CONCURRENTLY.
+metadata_visoes = MetaData()
+
+DespesaPorDeputado = Table(
+    "mv_despesa_deputado", metadata_visoes,
+    Column("ano", Integer, primary_key=True),
+    Column("id_deputado", Integer, primary_key=True),
+    Column("total_despesas", Float),
+    Column("quantidade", BigInteger),
+)
+
+GastoPorUf = Table(
+    "mv_gasto_uf", metadata_visoes,
+    Column("ano", Integer, primary_key=True),
+    Column("sigla_uf", String, primary_key=True),
+    Column("total_gasto", Float),
+    Column("media_gasto", Float),
+    Column("quantidade", BigInteger),
+    Column("total_deputados", BigInteger),
+)
+
+AlinhamentoPartido = Table(
+    "mv_alinhamento_partido", metadata_visoes,
+    Column("ano", SmallInteger, primary_key=True),
+    Column("id_partido", Integer, primary_key=True),
+    Column("sigla", String),
+    Column("nome_completo", String),
+    Column("votos_alinhados", BigInteger),
+    Column("votos_totais_decisivos", BigInteger),
+)
@@ -1,16 +1,36 @@
 from typing import Optional, List
 from datetime import date, datetime
+from sqlalchemy import Column, Computed, DateTime, Index, SmallInteger
 from sqlmodel import Field, SQLModel, Relationship
 
 class VotoIndividual(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    id_votacao: int = Field(foreign_key="sessaovotacao.id", index=True)
+    # Particionada por ano de data_hora_sessao (ver tratamentoDados/particoes.py):
+    # as chaves primária e únicas precisam incluí-la. Um voto por deputado em
+    # cada sessão; também atende as buscas por id_votacao
+    __table_args__ = (
+        Index("ix_votoindividual_id_votacao_id_deputado_data_hora_sessao", "id_votacao", "id_deputado", "data_hora_sessao", unique=True),
+        {"postgresql_partition_by": "RANGE (data_hora_sessao)"},
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    id_votacao: int = Field(foreign_key="sessaovotacao.id")
     id_deputado: int = Field(foreign_key="deputado.id", index=True)
-    tipo_voto: str = Field(max_length=50, description="Sim, Não, Abstenção, Obstrução, Ausente")
-    data_hora_registro: Optional[str] = Field(default=None)
-    sigla_partido_deputado: Optional[str] = Field(default=None, max_length=50)
-    uri_deputado: Optional[str] = Field(default=None, max_length=500)
-    uri_sessao_votacao:  Optional[str] = Field(default=None, max_length=500)
+    # Código em tipovoto (models/dominios.py)
+    id_tipo_voto: int = Field(foreign_key="tipovoto.id", sa_type=SmallInteger)
+    # Horário de Brasília, como vem da API (sem fuso); sem data no voto, vale a da sessão
+    data_hora_registro: datetime = Field(sa_column=Column(DateTime, nullable=False, index=True))
+    # Ano da sessão, gerado pelo banco. Os filtros por ano usam o intervalo de
+    # data_hora_sessao, que o planner poda até a partição do ano
+    ano: Optional[int] = Field(default=None, sa_column=Column(
+        SmallInteger, Computed("EXTRACT(YEAR FROM data_hora_sessao)::smallint", persisted=True), index=True
+    ))
+    # Cópia de SessaoVotacao.data_hora_registro; chave de partição. É a mesma
+    # em toda recarga da sessão, ao contrário da data do voto, então a chave
+    # única continua sendo um voto por deputado em cada sessão
+    data_hora_sessao: datetime = Field(sa_column=Column(DateTime, primary_key=True))
+    # Sigla do partido do deputado na carga do voto, em siglapartido. As URIs
+    # do deputado e da sessão saem dos ids (ver dtos/voto_individual_dtos.py)
+    id_sigla_partido: Optional[int] = Field(default=None, foreign_key="siglapartido.id", sa_type=SmallInteger)
 
     votacao: "SessaoVotacao" = Relationship(back_populates="votos")
     deputado: "Deputado" = Relationship(back_populates="votos_individuais")
@@ -1,21 +1,17 @@
 import math
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, String, case, desc, func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import Session, desc, func, select
 from database import get_session
 from dtos.analise_dtos import PartidoRankingDespesa
 from dtos.ranking_deputados_atuantes_dtos import DeputadoRankingDTO
 from log.logger_config import get_logger
-from models.deputado import Deputado
-from models.despesa import Despesa
 from models.gabinete import Gabinete
-from models.partido import Partido
 
-from models.sessao_votacao import SessaoVotacao
 from models.votacao_proposicao import VotacaoProposicao
-from models.voto_individual import VotoIndividual
 from utils.pagination import PaginatedResponse, PaginationParams
-from utils.querys import get_despesas_deputado_2024_subquery
+from models.visoes import AlinhamentoPartido, GastoPorUf
+from utils.querys import informar_atualizacao
 
 logger = get_logger("analises_logger", "log/analises.log")
 
@@ -23,6 +19,7 @@ analise_router = APIRouter(prefix="/analise", tags=["Analises complementares"])
 
 @analise_router.get("/comparativo_estados")
 async def comparativo_gastos_estados(
+    response: Response,
     session: Session = Depends(get_session),
     ano: int = Query(2024, description="Ano de referência para análise", ge=2000),
     uf: Optional[str] = Query(
@@ -36,25 +33,25 @@ async def comparativo_gastos_estados(
     Agrupa os gastos parlamentares por estado, retornando o gasto 
     total, a média e a quantidade de despesas. 
     
-    Entidades: `Deputado` e `Despesa`.
+    Entidades: `Deputado` e `Despesa` (via visão materializada).
     """
     try:
+        informar_atualizacao(response, session, GastoPorUf)
         stmt = (
             select(
-                Deputado.sigla_uf,
-                func.sum(Despesa.valor_liquido).label("total_gasto"),
-                func.avg(Despesa.valor_liquido).label("media_gasto"),
-                func.count(Despesa.id).label("quantidade"),
-                func.count(Deputado.id.distinct()).label("total_deputados")
+                GastoPorUf.c.sigla_uf,
+                GastoPorUf.c.total_gasto,
+                GastoPorUf.c.media_gasto,
+                GastoPorUf.c.quantidade,
+                GastoPorUf.c.total_deputados
             )
-            .join(Despesa, Despesa.id_deputado == Deputado.id)
-            .where(Despesa.ano == ano)
+            .where(GastoPorUf.c.ano == ano)
         )
 
         if uf:
-            stmt = stmt.where(Deputado.sigla_uf == uf.upper())
+            stmt = stmt.where(GastoPorUf.c.sigla_uf == uf.upper())
 
-        stmt = stmt.group_by(Deputado.sigla_uf).order_by(desc("total_gasto"))
+        stmt = stmt.order_by(desc(GastoPorUf.c.total_gasto))
         results = session.exec(stmt).all()
 
         return [
@@ -77,42 +74,28 @@ async def comparativo_gastos_estados(
 
 @analise_router.get("/ranking/alinhamento_resultado")
 def get_ranking_alinhamento_partidario(
+    response: Response,
     session: Session = Depends(get_session)
 ):
     """
     Calcula e ranqueia os partidos pelo seu percentual de alinhamento com o resultado
     final das votações de 2024 (votar 'Sim' em pautas aprovadas ou 'Não' em reprovadas).
 
-    Entidades: `Partido`, `Deputado`, `VotoIndividual` e `SessaoVotacao`.
+    Entidades: `Partido`, `Deputado`, `VotoIndividual` e `SessaoVotacao` (via visão materializada).
 
     """
-    voto_alinhado_expression = case(
-        (
-            (VotoIndividual.tipo_voto == 'Sim') & (SessaoVotacao.aprovacao == '1'), 1
-        ),
-        (
-            (VotoIndividual.tipo_voto == 'Não') & (SessaoVotacao.aprovacao == '0'), 1
-        ),
-        else_=0
-    )
-
+    informar_atualizacao(response, session, AlinhamentoPartido)
     stmt = (
         select(
-            Partido.sigla,
-            Partido.nome_completo,
-            func.sum(voto_alinhado_expression).label("votos_alinhados"),
-            func.count(VotoIndividual.id).label("votos_totais_decisivos")
+            AlinhamentoPartido.c.sigla,
+            AlinhamentoPartido.c.nome_completo,
+            func.sum(AlinhamentoPartido.c.votos_alinhados).label("votos_alinhados"),
+            func.sum(AlinhamentoPartido.c.votos_totais_decisivos).label("votos_totais_decisivos")
         )
-        .select_from(Partido)
-        .join(Deputado, Partido.id == Deputado.id_partido)
-        .join(VotoIndividual, Deputado.id == VotoIndividual.id_deputado)
-        .join(SessaoVotacao, VotoIndividual.id_votacao == SessaoVotacao.id)
-        .where(VotoIndividual.tipo_voto.in_(['Sim', 'Não']))
-        .where(SessaoVotacao.aprovacao.in_(['1', '0']))
-        .where(func.cast(VotoIndividual.data_hora_registro, String).startswith('2024'))
+        .where(AlinhamentoPartido.c.ano == 2024)
     )
 
-    stmt = stmt.group_by(Partido.sigla, Partido.nome_completo)
+    stmt = stmt.group_by(AlinhamentoPartido.c.sigla, AlinhamentoPartido.c.nome_completo)
     
     resultados = session.exec(stmt).all()
     
@@ -1,6 +1,6 @@
 import math
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlmodel import Session, desc, func, select
 from database import get_session
 from dtos.analise_dtos import DeputadoRankingDespesa, ResumoDeputado
@@ -13,7 +13,8 @@ from models.voto_individual import VotoIndividual
 from utils.pagination import PaginatedResponse, PaginationParams
 from sqlalchemy.orm import selectinload
 
-from utils.querys import get_despesas_deputado_2024_subquery
+from models.visoes import DespesaPorDeputado
+from utils.querys import get_despesas_deputado_2024_subquery, informar_atualizacao
 
 logger = get_logger("deputados_logger", "log/deputados.log")
 
@@ -102,11 +103,12 @@ def get_resumo_deputado(id_deputado: int, session: Session = Depends(get_session
     )
 
 @deputado_router.get("/ranking/deputados_despesa")
-def get_ranking_deputados_despesa(pagination: PaginationParams = Depends(), session: Session = Depends(get_session)):
+def get_ranking_deputados_despesa(response: Response, pagination: PaginationParams = Depends(), session: Session = Depends(get_session)):
     """
     Retorna um ranking paginado de deputados com base no total de suas despesas em 2024, do maior para o menor. 
-    Entidades: Deputado e Despesa
+    Entidades: Deputado e Despesa (via visão materializada)
     """
+    informar_atualizacao(response, session, DespesaPorDeputado)
     despesas_subq = get_despesas_deputado_2024_subquery()
 
     statement = (
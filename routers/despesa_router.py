@@ -5,21 +5,28 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlmodel import Session, func, select
 from database import get_session
 from log.logger_config import get_logger
+from dtos.despesa_dtos import DespesaResponse
 from models.despesa import Despesa
+from models.dominios import TipoDespesa
 from utils.pagination import PaginatedResponse, PaginationParams
 
 logger = get_logger("despesas_logger", "log/despesas.log")
 
 despesa_router = APIRouter(prefix="/despesa", tags=["Despesa"])
 
-@despesa_router.get("/get_by_id/{despesa_id}")
+def select_despesas():
+    # Despesa com o texto do tipo, guardado como código (ver models/dominios.py)
+    return select(Despesa, TipoDespesa.descricao).join(TipoDespesa, TipoDespesa.id == Despesa.id_tipo_despesa)
+
+@despesa_router.get("/get_by_id/{despesa_id}", response_model=DespesaResponse)
 def get_despesa_by_id(despesa_id: int, session: Session = Depends(get_session)):
 
-    despesa = session.get(Despesa, despesa_id)
-    if not despesa:
+    # A chave primária é (id, ano) por causa das partições; o id sozinho já é único
+    linha = session.exec(select_despesas().where(Despesa.id == despesa_id)).first()
+    if not linha:
         logger.warning(f"Despesa com ID {despesa_id} não encontrada.")
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"Despesa com ID {despesa_id} não encontrada.")
-    return despesa
+    return DespesaResponse.from_model(*linha)
 
 @despesa_router.get("/get_all")
 def get_all_despesas(
@@ -30,7 +37,7 @@ def get_all_despesas(
     mes: Optional[int] = Query(None, description="Filtrar despesas por mês.")
 ):
 
-    statement = select(Despesa)
+    statement = select_despesas()
     if id_deputado:
         statement = statement.where(Despesa.id_deputado == id_deputado)
     if ano:
@@ -42,8 +49,9 @@ def get_all_despesas(
     total = session.exec(count_statement).one()
 
     offset = (pagination.page - 1) * pagination.per_page
-    despesas_statement = statement.offset(offset).limit(pagination.per_page)
-    despesas = session.exec(despesas_statement).all()
+    # Com a junção o plano pode mudar a ordem das linhas: a paginação ordena pelo id
+    despesas_statement = statement.order_by(Despesa.id).offset(offset).limit(pagination.per_page)
+    despesas = [DespesaResponse.from_model(*linha) for linha in session.exec(despesas_statement).all()]
 
     return PaginatedResponse(
         items=despesas,
@@ -7,7 +7,7 @@ from sqlalchemy.orm import selectinload
 from database import get_session
 from models.gabinete import Gabinete
 from utils.pagination import PaginationParams, PaginatedResponse
-from models.despesa import Despesa
+from models.despesa_mensal import DespesaMensal
 from models.deputado import Deputado
 from models.partido import Partido
 from sqlalchemy import desc
@@ -73,18 +73,19 @@ def get_analise_gastos_por_andar(
     Retorna uma análise dos gastos totais e médios dos deputados,
     agrupados por andar e prédio de seus gabinetes.
     """
-    # Consulta que junta Gabinete, Deputado e Despesa
+    # Consulta que junta Gabinete, Deputado e o resumo mensal das despesas
+    # (a média continua sendo por recibo: soma dos valores / quantidade de recibos)
     stmt = (
         select(
             Gabinete.predio,
             Gabinete.andar,
-            func.sum(Despesa.valor_liquido).label("total_gasto"),
-            func.avg(Despesa.valor_liquido).label("media_gasto"),
+            func.sum(DespesaMensal.total).label("total_gasto"),
+            (func.sum(DespesaMensal.total) / func.sum(DespesaMensal.quantidade)).label("media_gasto"),
             func.count(func.distinct(Gabinete.id_deputado)).label("num_deputados")
         )
         .join(Deputado, Gabinete.id_deputado == Deputado.id)
-        .join(Despesa, Deputado.id == Despesa.id_deputado)
-        .where(Despesa.ano == ano)
+        .join(DespesaMensal, Deputado.id == DespesaMensal.id_deputado)
+        .where(DespesaMensal.ano == ano)
     )
 
     if predio:
@@ -167,21 +168,21 @@ def get_perfil_completo_por_andar(
     Retorna um perfil completo de um andar, mostrando para cada partido presente:
     a quantidade de deputados, o gasto total e a média de gasto por deputado.
     """
-    # Consulta que junta Gabinete, Deputado, Partido e Despesa
+    # Consulta que junta Gabinete, Deputado, Partido e o resumo mensal das despesas
     stmt = (
         select(
             Partido.sigla,
             Partido.nome_completo,
             func.count(func.distinct(Deputado.id)).label("quantidade_deputados"),
-            func.sum(Despesa.valor_liquido).label("total_gasto_partido_no_andar"),
-            func.avg(Despesa.valor_liquido).label("media_gasto_por_deputado_no_andar")
+            func.sum(DespesaMensal.total).label("total_gasto_partido_no_andar"),
+            (func.sum(DespesaMensal.total) / func.sum(DespesaMensal.quantidade)).label("media_gasto_por_deputado_no_andar")
         )
         .select_from(Gabinete)
         .join(Deputado, Gabinete.id_deputado == Deputado.id)
         .join(Partido, Deputado.id_partido == Partido.id)
-        .join(Despesa, Deputado.id == Despesa.id_deputado)
+        .join(DespesaMensal, Deputado.id == DespesaMensal.id_deputado)
         .where(Gabinete.andar.ilike(andar))
-        .where(Despesa.ano == ano)
+        .where(DespesaMensal.ano == ano)
     )
 
     if predio:
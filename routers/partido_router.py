@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
 from sqlalchemy import desc
 from sqlmodel import Session, select, func
 from typing import List
@@ -9,10 +9,12 @@ from models.partido import Partido
 from utils.pagination import PaginationParams, PaginatedResponse
 import math
 from models.deputado import Deputado
+from models.dominios import TipoVoto
 from sqlalchemy.orm import selectinload
 from models.sessao_votacao import SessaoVotacao
 from models.voto_individual import VotoIndividual
-from utils.querys import get_despesas_deputado_2024_subquery
+from models.visoes import DespesaPorDeputado
+from utils.querys import filtro_ano, get_despesas_deputado_2024_subquery, informar_atualizacao
 
 partido_router = APIRouter(prefix="/partido", tags=["Partido"])
 
@@ -125,7 +127,7 @@ def get_coesao_partido_em_votacao(
     Analisa a distribuição de votos de um partido específico em uma determinada sessão de votação.
     Retorna a contagem e o percentual para cada tipo de voto (Sim, Não, Abstenção, etc.).
 
-    Entidades: Partido, Deputado, VotoIndividual, SessaoVotacao
+    Entidades: Partido, Deputado, VotoIndividual, TipoVoto, SessaoVotacao
     """
     #Validar existencias
     partido = session.exec(select(Partido).where(Partido.sigla == sigla_partido.upper())).first()
@@ -138,11 +140,12 @@ def get_coesao_partido_em_votacao(
 
     # Contrução de query para votação
     stmt = (
-        select(VotoIndividual.tipo_voto, func.count(VotoIndividual.id).label("total"))
+        select(TipoVoto.descricao.label("tipo_voto"), func.count(VotoIndividual.id).label("total"))
         .join(Deputado, Deputado.id == VotoIndividual.id_deputado)
+        .join(TipoVoto, TipoVoto.id == VotoIndividual.id_tipo_voto)
         .where(Deputado.id_partido == partido.id)
         .where(VotoIndividual.id_votacao == id_votacao)
-        .group_by(VotoIndividual.tipo_voto)
+        .group_by(TipoVoto.descricao)
     )
 
     resultados_votos = session.exec(stmt).all()
@@ -168,12 +171,13 @@ def get_coesao_partido_em_votacao(
     }
 
 @partido_router.get("/ranking/partidos_despesa")
-def get_ranking_partidos_despesa(session: Session = Depends(get_session)):
+def get_ranking_partidos_despesa(response: Response, session: Session = Depends(get_session)):
     """
     Retorna um ranking de partidos ordenado pela soma total das despesas de seus deputados em 2024. 
     
-    Entidades: Partido, Deputado e Despesa.
+    Entidades: Partido, Deputado e Despesa (via visão materializada).
     """
+    informar_atualizacao(response, session, DespesaPorDeputado)
     
     despesas_subq = get_despesas_deputado_2024_subquery()
     
@@ -222,11 +226,12 @@ def get_ranking_partidos_por_voto(
         )
         .join(Deputado, Partido.id == Deputado.id_partido)
         .join(VotoIndividual, Deputado.id == VotoIndividual.id_deputado)
-        .where(VotoIndividual.tipo_voto == tipo_voto)
+        .join(TipoVoto, TipoVoto.id == VotoIndividual.id_tipo_voto)
+        .where(TipoVoto.descricao == tipo_voto)
     )
 
     if ano:
-        stmt = stmt.where(func.cast(VotoIndividual.data_hora_registro, str).startswith(str(ano)))
+        stmt = stmt.where(filtro_ano(VotoIndividual.data_hora_sessao, ano))
 
     stmt = stmt.group_by(Partido.sigla, Partido.nome_completo).order_by(desc("total_votos"))
     
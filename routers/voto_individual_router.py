@@ -2,23 +2,37 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select, func
 from typing import List
 from database import get_session
+from dtos.voto_individual_dtos import VotoIndividualResponse
 from log.logger_config import get_logger
+from models.deputado import Deputado
+from models.dominios import SiglaPartido, TipoVoto
+from models.sessao_votacao import SessaoVotacao
 from models.voto_individual import VotoIndividual
 from models.votacao_proposicao import VotacaoProposicao
 
 logger = get_logger("votos_individuais_logger", "log/votos_individuais.log")
 voto_router = APIRouter(prefix="/voto_individual", tags=["Voto Individual"])
 
+def buscar_votos(session: Session, *filtros) -> List[VotoIndividualResponse]:
+    # Tipo de voto e sigla vêm das tabelas de domínio; os ids dos Dados
+    # Abertos do deputado e da sessão, para montar as URIs
+    stmt = (
+        select(VotoIndividual, TipoVoto.descricao, SiglaPartido.sigla, Deputado.id_dados_abertos, SessaoVotacao.id_dados_abertos)
+        .join(TipoVoto, TipoVoto.id == VotoIndividual.id_tipo_voto)
+        .outerjoin(SiglaPartido, SiglaPartido.id == VotoIndividual.id_sigla_partido)
+        .join(Deputado, Deputado.id == VotoIndividual.id_deputado)
+        .join(SessaoVotacao, SessaoVotacao.id == VotoIndividual.id_votacao)
+        .where(*filtros)
+    )
+    return [VotoIndividualResponse.from_model(*linha) for linha in session.exec(stmt).all()]
+
 # Obtém um voto individual pelo ID
-@voto_router.get("/by_deputado/{id_deputado}")
+@voto_router.get("/by_deputado/{id_deputado}", response_model=List[VotoIndividualResponse])
 def get_votos_by_deputado(id_deputado: int, session: Session = Depends(get_session)):
-    votos = session.exec(
-        select(VotoIndividual).where(VotoIndividual.id_deputado == id_deputado)
-    ).all()
-    return votos
+    return buscar_votos(session, VotoIndividual.id_deputado == id_deputado)
 
 # Obtém todos os votos individuais de uma proposição específica
-@voto_router.get("/by_proposicao/{id_proposicao}", response_model=List[VotoIndividual])
+@voto_router.get("/by_proposicao/{id_proposicao}", response_model=List[VotoIndividualResponse])
 def get_votos_by_proposicao(id_proposicao: int, session: Session = Depends(get_session)):
     # 1. Subquery: votações ligadas à proposição
     subquery = (
@@ -27,10 +41,4 @@ def get_votos_by_proposicao(id_proposicao: int, session: Session = Depends(get_s
     )
 
     # 2. Buscar votos nas votações da proposição
-    stmt = (
-        select(VotoIndividual)
-        .where(VotoIndividual.id_votacao.in_(subquery))
-    )
-
-    votos = session.exec(stmt).all()
-    return votos
+    return buscar_votos(session, VotoIndividual.id_votacao.in_(subquery))
@@ -0,0 +1,78 @@
+"""
+Configuração comum dos testes. As variáveis de ambiente são lidas quando os
+módulos de tratamentoDados são importados, por isso ficam aqui: o cache HTTP
+e o dead letter vão para uma pasta temporária, nada é lido das fixtures
+gravadas e o limite de taxa não atrasa os testes contra o servidor local.
+
+Os testes que gravam no banco usam o PostgreSQL de CAMARA_TESTES_DATABASE_URL,
+que precisa ser um banco descartável: o schema public é recriado. Sem a
+variável, esses testes são pulados.
+"""
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import SQLModel, create_engine
+
+_PASTA_TESTES = tempfile.mkdtemp(prefix="camara_testes_")
+os.environ["CAMARA_CACHE_DIR"] = os.path.join(_PASTA_TESTES, "cache_http")
+os.environ["CAMARA_DEAD_LETTER"] = os.path.join(_PASTA_TESTES, "dead_letter_http.ndjson")
+os.environ["CAMARA_TAXA_REQUISICOES"] = "1000"
+os.environ["CAMARA_RAJADA_REQUISICOES"] = "1000"
+os.environ.pop("CAMARA_FIXTURES_DIR", None)
+
+URL_BANCO_TESTES = os.environ.get("CAMARA_TESTES_DATABASE_URL")
+
+@pytest.fixture(scope="session")
+def engine_testes():
+    if not URL_BANCO_TESTES:
+        pytest.skip("CAMARA_TESTES_DATABASE_URL não definida")
+    # Importados só aqui, depois das variáveis de ambiente; database registra
+    # todos os modelos no metadata
+    import database
+    from tratamentoDados.visoes_materializadas import criar_visoes
+
+    engine = create_engine(URL_BANCO_TESTES)
+    with engine.begin() as conexao:
+        conexao.execute(text("DROP SCHEMA public CASCADE"))
+        conexao.execute(text("CREATE SCHEMA public"))
+    database.target_metadata.create_all(engine)
+    criar_visoes(engine, "public")
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def banco(engine_testes):
+    # Cada teste começa com as tabelas e as visões vazias e sem partições
+    from tratamentoDados.particoes import TABELAS_PARTICIONADAS, particoes
+    from tratamentoDados.visoes_materializadas import VISOES
+
+    with engine_testes.begin() as conexao:
+        for tabela in TABELAS_PARTICIONADAS:
+            for nome, _ in particoes(conexao, tabela):
+                conexao.execute(text(f"DROP TABLE {nome}"))
+        tabelas = ", ".join(tabela.name for tabela in SQLModel.metadata.sorted_tables)
+        conexao.execute(text(f"TRUNCATE {tabelas} RESTART IDENTITY CASCADE"))
+        for visao in VISOES:
+            conexao.execute(text(f"REFRESH MATERIALIZED VIEW {visao}"))
+    return engine_testes
+
+@pytest.fixture
+def cliente(banco):
+    # A API lendo o banco de testes
+    from fastapi.testclient import TestClient
+    from sqlmodel import Session
+
+    from database import get_session
+    from main import app
+
+    def sessao_testes():
+        with Session(banco) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = sessao_testes
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
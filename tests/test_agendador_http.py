@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from tratamentoDados import agendador_http
+from tratamentoDados.agendador_http import AgendadorHTTP, ler_dead_letter
+
+URL = "https://dadosabertos.camara.leg.br/api/v2/votacoes/1"
+
+def resposta(status, cabecalhos=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(cabecalhos or {})
+    return response
+
+class SessaoFalsa:
+    """Devolve (ou levanta) os resultados dados, em ordem."""
+
+    def __init__(self, *resultados):
+        self.resultados = list(resultados)
+        self.chamadas = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.chamadas += 1
+        resultado = self.resultados.pop(0)
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+@pytest.fixture
+def esperas(monkeypatch):
+    registradas = []
+    monkeypatch.setattr(agendador_http.time, "sleep", registradas.append)
+    return registradas
+
+@pytest.fixture
+def agendador(tmp_path):
+    return AgendadorHTTP(taxa=1000, rajada=1000, tentativas=3, arquivo_dead_letter=str(tmp_path / "dead_letter.ndjson"))
+
+def test_refaz_status_temporarios_ate_dar_certo(agendador, esperas):
+    sessao = SessaoFalsa(resposta(503), resposta(500), resposta(200))
+
+    assert agendador.get(sessao, URL).status_code == 200
+    assert sessao.chamadas == 3
+    assert len(esperas) == 2
+    assert agendador.estatisticas == {"requisicoes": 3, "retentativas": 2, "dead_letter": 0}
+
+def test_nao_refaz_erros_definitivos(agendador, esperas):
+    sessao = SessaoFalsa(resposta(404))
+
+    assert agendador.get(sessao, URL).status_code == 404
+    assert sessao.chamadas == 1
+    assert esperas == []
+
+def test_respeita_o_retry_after(agendador, esperas):
+    sessao = SessaoFalsa(resposta(429, {"Retry-After": "7"}), resposta(429, {"Retry-After": "3600"}), resposta(200))
+
+    agendador.get(sessao, URL)
+    # Limitado a ESPERA_MAXIMA
+    assert esperas == [7.0, agendador_http.ESPERA_MAXIMA]
+
+def test_espera_exponencial_com_jitter(agendador, esperas, monkeypatch):
+    monkeypatch.setattr(agendador_http.random, "uniform", lambda inicio, fim: fim)
+    sessao = SessaoFalsa(resposta(502), resposta(502), resposta(200))
+
+    agendador.get(sessao, URL)
+    assert esperas == [agendador_http.ESPERA_BASE, agendador_http.ESPERA_BASE * 2]
+
+def test_status_que_continua_falhando_vai_para_o_dead_letter(agendador, esperas):
+    sessao = SessaoFalsa(*(resposta(503) for _ in range(3)))
+
+    response = agendador.get(sessao, URL, headers={"accept": "application/xml", "If-None-Match": '"v1"'})
+
+    assert response.status_code == 503
+    assert sessao.chamadas == 3
+    # Sem espera depois da última tentativa
+    assert len(esperas) == 2
+    [registro] = ler_dead_letter(agendador.arquivo_dead_letter)
+    assert registro["url"] == URL
+    assert registro["motivo"] == "status 503"
+    # Os cabeçalhos condicionais do cache ficam de fora
+    assert registro["headers"] == {"accept": "application/xml"}
+    assert agendador.estatisticas["dead_letter"] == 1
+
+def test_erro_de_conexao_que_continua_vai_para_o_dead_letter_e_sobe(agendador, esperas):
+    sessao = SessaoFalsa(*(requests.exceptions.ConnectionError("recusada") for _ in range(3)))
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        agendador.get(sessao, URL)
+    [registro] = ler_dead_letter(agendador.arquivo_dead_letter)
+    assert "ConnectionError" in registro["motivo"]
+
+def test_sem_arquivo_nao_grava_dead_letter(tmp_path, esperas):
+    agendador = AgendadorHTTP(taxa=1000, rajada=1000, tentativas=1, arquivo_dead_letter=None)
+
+    assert agendador.get(SessaoFalsa(resposta(500)), URL).status_code == 500
+    assert list(tmp_path.iterdir()) == []
+    assert agendador.estatisticas["dead_letter"] == 1
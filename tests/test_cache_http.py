@@ -0,0 +1,104 @@
+import os
+
+import requests
+
+from tratamentoDados.cache_http import CacheHTTP
+
+URL = "https://dadosabertos.camara.leg.br/api/v2/partidos/1"
+
+def resposta(status, corpo=b"", cabecalhos=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(cabecalhos or {})
+    response._content = corpo
+    return response
+
+class ApiFalsa:
+    """Devolve as respostas dadas, em ordem, e guarda os cabeçalhos recebidos."""
+
+    def __init__(self, *respostas):
+        self.respostas = list(respostas)
+        self.cabecalhos = []
+
+    def __call__(self, url, headers=None, timeout=None):
+        self.cabecalhos.append(dict(headers or {}))
+        return self.respostas.pop(0)
+
+def test_dentro_do_ttl_a_resposta_sai_do_disco(tmp_path):
+    cache = CacheHTTP(str(tmp_path), ttl=3600)
+    api = ApiFalsa(resposta(200, b"<xml/>", {"content-type": "application/xml"}))
+
+    primeira = cache.get(api, URL, headers={"Accept": "application/xml"})
+    segunda = cache.get(api, URL, headers={"Accept": "application/xml"})
+
+    assert len(api.cabecalhos) == 1
+    assert segunda.content == primeira.content == b"<xml/>"
+    assert segunda.headers["content-type"] == "application/xml"
+    assert cache.estatisticas["acertos"] == 1 and cache.estatisticas["faltas"] == 1
+
+def test_o_accept_faz_parte_da_chave(tmp_path):
+    cache = CacheHTTP(str(tmp_path), ttl=3600)
+    api = ApiFalsa(resposta(200, b"<xml/>"), resposta(200, b"{}"))
+
+    assert cache.get(api, URL, headers={"Accept": "application/xml"}).content == b"<xml/>"
+    assert cache.get(api, URL, headers={"Accept": "application/json"}).content == b"{}"
+    assert len(api.cabecalhos) == 2
+
+def test_depois_do_ttl_revalida_e_reaproveita_o_corpo_no_304(tmp_path):
+    cache = CacheHTTP(str(tmp_path), ttl=0)
+    cabecalhos = {"etag": '"v1"', "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    api = ApiFalsa(resposta(200, b"<xml/>", cabecalhos), resposta(304))
+
+    cache.get(api, URL)
+    revalidada = cache.get(api, URL)
+
+    assert api.cabecalhos[1]["If-None-Match"] == '"v1"'
+    assert api.cabecalhos[1]["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert revalidada.status_code == 200
+    assert revalidada.content == b"<xml/>"
+    assert cache.estatisticas["revalidados"] == 1
+
+def test_depois_do_ttl_uma_resposta_nova_substitui_a_guardada(tmp_path):
+    cache = CacheHTTP(str(tmp_path), ttl=0)
+    api = ApiFalsa(resposta(200, b"v1", {"etag": '"v1"'}), resposta(200, b"v2", {"etag": '"v2"'}), resposta(304))
+
+    cache.get(api, URL)
+    assert cache.get(api, URL).content == b"v2"
+    assert cache.get(api, URL).content == b"v2"
+    assert api.cabecalhos[2]["If-None-Match"] == '"v2"'
+
+def test_erros_nao_vao_para_o_cache(tmp_path):
+    cache = CacheHTTP(str(tmp_path), ttl=3600)
+    api = ApiFalsa(resposta(500), resposta(200, b"ok"))
+
+    assert cache.get(api, URL).status_code == 500
+    assert cache.get(api, URL).content == b"ok"
+    assert len(api.cabecalhos) == 2
+
+def test_acima_do_limite_remove_as_entradas_usadas_ha_mais_tempo(tmp_path):
+    cache = CacheHTTP(str(tmp_path), ttl=3600, tamanho_maximo=25)
+    urls = [f"{URL}?pagina={pagina}" for pagina in range(3)]
+    api = ApiFalsa(*(resposta(200, b"x" * 10) for _ in range(4)))
+
+    cache.get(api, urls[0])
+    cache.get(api, urls[1])
+    # As duas entradas ficam antigas; usar a primeira de novo a renova
+    for caminho, _ in cache._entradas():
+        os.utime(caminho, (1, 1))
+    cache.get(api, urls[0])
+    # 30 bytes passam do limite: sai a segunda, a menos usada
+    cache.get(api, urls[2])
+
+    assert cache.estatisticas["removidos"] == 1
+    assert cache._tamanho_atual == 20
+    enviadas = len(api.cabecalhos)
+    cache.get(api, urls[0])
+    assert len(api.cabecalhos) == enviadas
+    cache.get(api, urls[1])
+    assert len(api.cabecalhos) == enviadas + 1
+
+def test_tamanho_atual_e_lido_do_disco(tmp_path):
+    api = ApiFalsa(resposta(200, b"x" * 10))
+    CacheHTTP(str(tmp_path), ttl=3600).get(api, URL)
+
+    assert CacheHTTP(str(tmp_path))._tamanho_atual == 10
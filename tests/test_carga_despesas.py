@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from models.deputado import Deputado
+from tratamentoDados.Despesa import carregar_despesas
+
+@pytest.fixture
+def id_deputado(banco):
+    with Session(banco) as session:
+        deputado = Deputado(id_dados_abertos=10, nome_eleitoral="Deputada", sigla_partido="PA", sigla_uf="SP")
+        session.add(deputado)
+        session.commit()
+        return deputado.id
+
+def despesa(id_deputado, cod_documento, valor, mes=1, tipo="COMBUSTÍVEIS", parcela=0, ano=2024):
+    # No formato da API, com o id_deputado do banco
+    return {
+        "id_deputado": id_deputado, "ano": ano, "mes": mes, "tipoDespesa": tipo, "valorLiquido": valor,
+        "codDocumento": cod_documento, "parcela": parcela, "nomeFornecedor": "Fornecedor",
+    }
+
+def despesas_gravadas(engine):
+    with engine.connect() as conexao:
+        return sorted(conexao.execute(text("""
+            SELECT d.cod_documento, d.parcela, d.mes, t.descricao, d.valor_liquido
+            FROM despesa d JOIN tipodespesa t ON t.id = d.id_tipo_despesa
+        """)).all(), key=lambda linha: (linha[0] or 0, linha[1], linha[2], linha[4]))
+
+def test_recarregar_o_mesmo_arquivo_nao_duplica_nem_reescreve(banco, id_deputado):
+    despesas = [despesa(id_deputado, 100, 50.0), despesa(id_deputado, 100, 25.0, parcela=1), despesa(id_deputado, 101, 10.0, mes=2)]
+
+    assert carregar_despesas(despesas, "teste", destino=banco) == 3
+    gravadas = despesas_gravadas(banco)
+    assert carregar_despesas(despesas, "teste", destino=banco) == 0
+    assert despesas_gravadas(banco) == gravadas
+
+def test_recibo_alterado_na_fonte_e_atualizado_no_lugar(banco, id_deputado):
+    carregar_despesas([despesa(id_deputado, 100, 50.0), despesa(id_deputado, 101, 10.0)], "teste", destino=banco)
+
+    assert carregar_despesas([despesa(id_deputado, 100, 55.0, mes=2, tipo="PASSAGENS AÉREAS")], "teste", destino=banco) == 1
+    assert despesas_gravadas(banco) == [(100, 0, 2, "PASSAGENS AÉREAS", 55.0), (101, 0, 1, "COMBUSTÍVEIS", 10.0)]
+
+def test_recibos_sem_documento_sao_substituidos_nos_meses_da_carga(banco, id_deputado):
+    # A API usa 0 quando o recibo não tem documento
+    carregar_despesas([despesa(id_deputado, 0, 5.0), despesa(id_deputado, 0, 7.0, mes=2)], "teste", destino=banco)
+
+    carregar_despesas([despesa(id_deputado, 0, 5.0), despesa(id_deputado, 0, 6.0)], "teste", destino=banco)
+
+    # Janeiro recarregado (dois recibos); fevereiro não estava na carga e fica
+    assert despesas_gravadas(banco) == [(None, 0, 1, "COMBUSTÍVEIS", 5.0), (None, 0, 1, "COMBUSTÍVEIS", 6.0), (None, 0, 2, "COMBUSTÍVEIS", 7.0)]
+
+def resumo(engine):
+    with engine.connect() as conexao:
+        gravado = conexao.execute(text("""
+            SELECT id_deputado, ano, mes, id_tipo_despesa, total, quantidade, valor_minimo, valor_maximo
+            FROM despesa_mensal ORDER BY 1, 2, 3, 4
+        """)).all()
+        recalculado = conexao.execute(text("""
+            SELECT id_deputado, ano, mes, id_tipo_despesa, sum(valor_liquido), count(*), min(valor_liquido), max(valor_liquido)
+            FROM despesa GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+        """)).all()
+    return gravado, recalculado
+
+def test_resumo_mensal_acompanha_as_cargas(banco, id_deputado):
+    cargas = [
+        [despesa(id_deputado, 100, 50.0), despesa(id_deputado, 101, 10.0), despesa(id_deputado, 0, 3.0, mes=3)],
+        # Recibo 100 muda de mês e de tipo: a chave antiga perde um recibo
+        [despesa(id_deputado, 100, 40.0, mes=2, tipo="PASSAGENS AÉREAS")],
+        # Recibo 101 também sai de janeiro, que fica vazio; março é recarregado sem o recibo sem documento
+        [despesa(id_deputado, 101, 10.0, mes=2), despesa(id_deputado, 102, 8.0, mes=3)],
+    ]
+    for carga in cargas:
+        carregar_despesas(carga, "teste", destino=banco)
+        gravado, recalculado = resumo(banco)
+        assert gravado == recalculado
+
+    # Janeiro sumiu; fevereiro tem um recibo de cada tipo e março só o 102
+    assert sorted((mes, total) for _, _, mes, _, total, _, _, _ in gravado) == [(2, 10.0), (2, 40.0), (3, 8.0)]
+
+def test_carga_vazia_nao_mexe_no_resumo(banco, id_deputado):
+    carregar_despesas([despesa(id_deputado, 100, 50.0)], "teste", destino=banco)
+    antes, _ = resumo(banco)
+
+    assert carregar_despesas([], "teste", destino=banco) == 0
+    assert resumo(banco)[0] == antes
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import select, text
+
+from models.partido import Partido
+from tratamentoDados.carga_em_lote import em_lotes, inserir_em_lote, mesclar_em_lote
+
+PARTIDOS = [
+    {"id_dados_abertos": 1, "sigla": "PA", "nome_completo": "Partido A", "situacao": "Ativo"},
+    # Vírgula, aspas e quebra de linha precisam sobreviver ao CSV do COPY
+    {"id_dados_abertos": 2, "sigla": "PB", "nome_completo": 'Partido "B", de novo\nsegunda linha', "situacao": "Ativo"},
+    # Texto vazio não é NULL
+    {"id_dados_abertos": 3, "sigla": "PC", "nome_completo": "Partido C", "situacao": ""},
+    {"id_dados_abertos": 4, "sigla": "PD", "nome_completo": "Partido D", "situacao": None},
+    {"id_dados_abertos": 5, "sigla": "PE", "nome_completo": "Partido E", "situacao": "Inativo"},
+]
+
+def test_em_lotes_divide_sem_perder_linhas():
+    assert [len(lote) for lote in em_lotes(range(5), 2)] == [2, 2, 1]
+    assert list(em_lotes([], 2)) == []
+
+@pytest.mark.parametrize("usar_copy", [True, False], ids=["copy", "executemany"])
+def test_inserir_em_lote_grava_as_linhas_como_vieram(banco, usar_copy):
+    tabela = Partido.__table__
+
+    # Um gerador, em lotes menores que o total
+    inseridas = inserir_em_lote(banco, tabela, (dict(linha) for linha in PARTIDOS), tamanho_lote=2, usar_copy=usar_copy)
+
+    assert inseridas == len(PARTIDOS)
+    with banco.connect() as conexao:
+        gravadas = conexao.execute(
+            select(tabela.c.id_dados_abertos, tabela.c.sigla, tabela.c.nome_completo, tabela.c.situacao).order_by(tabela.c.id_dados_abertos)
+        ).mappings().all()
+        # Os ids continuam vindo da sequência
+        assert conexao.execute(text("SELECT count(DISTINCT id) FROM partido")).scalar() == len(PARTIDOS)
+    assert [dict(linha) for linha in gravadas] == PARTIDOS
+
+def test_inserir_em_lote_entra_na_transacao_do_chamador(banco):
+    with pytest.raises(RuntimeError):
+        with banco.begin() as conexao:
+            inserir_em_lote(conexao, Partido.__table__, PARTIDOS)
+            raise RuntimeError("falha depois da carga")
+
+    with banco.connect() as conexao:
+        assert conexao.execute(text("SELECT count(*) FROM partido")).scalar() == 0
+
+def versoes(conexao):
+    # xmin muda a cada vez que a linha é reescrita
+    return dict(conexao.execute(text("SELECT id_dados_abertos, xmin::text FROM partido")).all())
+
+def test_mesclar_em_lote_nao_reescreve_linhas_iguais(banco):
+    tabela = Partido.__table__
+    assert mesclar_em_lote(banco, tabela, PARTIDOS, ["id_dados_abertos"], tamanho_lote=2) == len(PARTIDOS)
+    with banco.connect() as conexao:
+        ids = dict(conexao.execute(text("SELECT id_dados_abertos, id FROM partido")).all())
+        antes = versoes(conexao)
+
+    assert mesclar_em_lote(banco, tabela, PARTIDOS, ["id_dados_abertos"], tamanho_lote=2) == 0
+
+    with banco.connect() as conexao:
+        assert dict(conexao.execute(text("SELECT id_dados_abertos, id FROM partido")).all()) == ids
+        assert versoes(conexao) == antes
+
+def test_mesclar_em_lote_atualiza_so_o_que_mudou_e_a_ultima_ocorrencia_vale(banco):
+    tabela = Partido.__table__
+    mesclar_em_lote(banco, tabela, PARTIDOS, ["id_dados_abertos"])
+    with banco.connect() as conexao:
+        antes = versoes(conexao)
+
+    alterado = dict(PARTIDOS[0], situacao="Extinto")
+    novo = {"id_dados_abertos": 6, "sigla": "PF", "nome_completo": "Partido F", "situacao": "Ativo"}
+    carga = [dict(PARTIDOS[0], situacao="Intermediária"), PARTIDOS[1], alterado, novo]
+    assert mesclar_em_lote(banco, tabela, carga, ["id_dados_abertos"]) == 2
+
+    with banco.connect() as conexao:
+        situacoes = dict(conexao.execute(text("SELECT id_dados_abertos, situacao FROM partido")).all())
+        depois = versoes(conexao)
+    assert situacoes[1] == "Extinto" and situacoes[6] == "Ativo"
+    assert len(situacoes) == len(PARTIDOS) + 1
+    assert depois[2] == antes[2]
+    assert depois[1] != antes[1]
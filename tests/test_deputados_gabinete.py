@@ -0,0 +1,64 @@
+import json
+import threading
+
+from sqlalchemy import event, text
+from sqlmodel import Session
+
+from models.deputado import Deputado
+from models.partido import Partido
+from tratamentoDados import deputados_gabinete
+
+def deputado_listagem(id_api, uri=True):
+    return {
+        "id": id_api, "uri": f"https://dadosabertos.camara.leg.br/api/v2/deputados/{id_api}" if uri else None,
+        "nome": f"Deputado {id_api}", "siglaUf": "SP", "idLegislatura": 57,
+    }
+
+def detalhes(sigla_partido):
+    return {"nome_eleitoral": "Nome Eleitoral", "sigla_partido": sigla_partido, "sexo": "F", "gabinete": {"sala": "101"}}
+
+def test_carrega_so_os_deputados_novos_com_uma_consulta_de_partidos(banco, monkeypatch, tmp_path):
+    with Session(banco) as session:
+        partido = Partido(id_dados_abertos=1, sigla="PA", nome_completo="Partido A")
+        session.add(partido)
+        session.flush()
+        session.add(Deputado(id_dados_abertos=10, nome_eleitoral="Já gravado", sigla_partido="PA", sigla_uf="SP", id_partido=partido.id))
+        session.commit()
+        id_partido = partido.id
+
+    arquivo = tmp_path / "deputados.json"
+    # 10 já está no banco, 11 aparece duas vezes, 12 não tem URI e 14 falha na API
+    listagem = [deputado_listagem(10), deputado_listagem(11), deputado_listagem(11), deputado_listagem(12, uri=False),
+                deputado_listagem(13), deputado_listagem(14)]
+    arquivo.write_text(json.dumps({"dados": listagem}), encoding="utf-8")
+
+    buscados = []
+    trava = threading.Lock()
+    def buscar_detalhes(uri):
+        with trava:
+            buscados.append(uri)
+        return {"11": detalhes("PA"), "13": detalhes("PNOVO")}.get(uri.rsplit("/", 1)[-1])
+
+    consultas = []
+    def capturar(conexao, cursor, statement, *_):
+        consultas.append(statement)
+
+    monkeypatch.setattr(deputados_gabinete, "engine", banco)
+    monkeypatch.setattr(deputados_gabinete, "ARQUIVO_DEPUTADOS", str(arquivo))
+    monkeypatch.setattr(deputados_gabinete, "buscar_detalhes_deputado_xml", buscar_detalhes)
+    event.listen(banco, "before_cursor_execute", capturar)
+    try:
+        inseridos = deputados_gabinete.main(limite_concorrencia=4)
+    finally:
+        event.remove(banco, "before_cursor_execute", capturar)
+
+    assert inseridos == 2
+    assert sorted(uri.rsplit("/", 1)[-1] for uri in buscados) == ["11", "13", "14"]
+    # Os partidos são lidos uma vez, não um SELECT por deputado
+    assert sum("FROM partido" in consulta for consulta in consultas) == 1
+    with banco.connect() as conexao:
+        gravados = dict(conexao.execute(text("""
+            SELECT d.id_dados_abertos, d.id_partido FROM deputado d JOIN gabinete g ON g.id_deputado = d.id
+        """)).all())
+    # Partido fora da tabela não impede a carga
+    assert gravados == {11: id_partido, 13: None}
@@ -0,0 +1,28 @@
+from tratamentoDados.Despesa import ANO_DESPESAS, _valor_ceap, meses_pendentes, url_despesas_deputado
+
+def test_meses_pendentes_sem_marca_baixa_o_ano_inteiro():
+    assert meses_pendentes(None) == list(range(1, 13))
+    assert meses_pendentes("") == list(range(1, 13))
+
+def test_meses_pendentes_refaz_o_mes_da_marca():
+    assert meses_pendentes(f"{ANO_DESPESAS}-05") == list(range(5, 13))
+    assert meses_pendentes(f"{ANO_DESPESAS}-12") == [12]
+
+def test_meses_pendentes_marca_de_outro_ano():
+    assert meses_pendentes(f"{ANO_DESPESAS - 1}-11") == list(range(1, 13))
+    assert meses_pendentes(f"{ANO_DESPESAS + 1}-01") == []
+
+def test_url_despesas_so_filtra_meses_quando_falta_algum():
+    assert "&mes=" not in url_despesas_deputado(1, list(range(1, 13)))
+    assert url_despesas_deputado(1, [11, 12]).endswith("&mes=11&mes=12")
+
+def test_valor_ceap_aceita_os_formatos_dos_arquivos():
+    assert _valor_ceap("1234.56") == 1234.56
+    assert _valor_ceap("1234,56") == 1234.56
+    assert _valor_ceap("1.234,56") == 1234.56
+    assert _valor_ceap("12.345.678,9") == 12345678.9
+    assert _valor_ceap(" -10,5 ") == -10.5
+
+def test_valor_ceap_vazio_vale_zero():
+    assert _valor_ceap("") == 0.0
+    assert _valor_ceap(None) == 0.0
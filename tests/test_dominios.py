@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import event, text
+
+from models.dominios import TipoDespesa, TipoVoto
+from tratamentoDados.dominios import Dominio
+
+def codigos(engine, tabela):
+    with engine.connect() as conexao:
+        return dict(conexao.execute(text(f"SELECT descricao, id FROM {tabela}")).all())
+
+def test_texto_novo_ganha_um_codigo_e_o_repetido_reusa(banco):
+    tipos = Dominio(banco, TipoVoto, "descricao")
+
+    sim = tipos.codigo("Sim")
+    nao = tipos.codigo("Não")
+
+    assert sim != nao
+    assert tipos.codigo("Sim") == sim
+    assert codigos(banco, "tipovoto") == {"Sim": sim, "Não": nao}
+
+def test_sem_texto_nao_ha_codigo(banco):
+    assert Dominio(banco, TipoVoto, "descricao").codigo(None) is None
+    assert codigos(banco, "tipovoto") == {}
+
+def test_codigos_existentes_sao_lidos_uma_vez(banco):
+    with banco.begin() as conexao:
+        conexao.execute(text("INSERT INTO tipodespesa (descricao) VALUES ('COMBUSTÍVEIS')"))
+    tipos = Dominio(banco, TipoDespesa, "descricao")
+
+    consultas = []
+    def contar(conexao, cursor, statement, *_):
+        consultas.append(statement)
+    event.listen(banco, "before_cursor_execute", contar)
+    try:
+        lidos = [tipos.codigo("COMBUSTÍVEIS") for _ in range(3)]
+    finally:
+        event.remove(banco, "before_cursor_execute", contar)
+
+    assert consultas == []
+    assert lidos == [codigos(banco, "tipodespesa")["COMBUSTÍVEIS"]] * 3
+
+def test_texto_gravado_por_outra_carga_depois_da_leitura(banco):
+    # Duas faixas de escrita leem o domínio antes de qualquer uma gravar
+    primeira = Dominio(banco, TipoVoto, "descricao")
+    segunda = Dominio(banco, TipoVoto, "descricao")
+
+    assert primeira.codigo("Obstrução") == segunda.codigo("Obstrução")
+    assert len(codigos(banco, "tipovoto")) == 1
+
+def test_codigo_e_gravado_fora_da_transacao_da_carga(banco):
+    tipos = Dominio(banco, TipoVoto, "descricao")
+    with pytest.raises(RuntimeError):
+        with banco.begin():
+            codigo = tipos.codigo("Abstenção")
+            raise RuntimeError("carga falhou")
+
+    assert codigos(banco, "tipovoto") == {"Abstenção": codigo}
@@ -0,0 +1,53 @@
+"""
+Download concorrente das despesas (tratamentoDados.cliente_http) contra o
+servidor local de benchmarks/download_despesas.py, que imita a rota
+/deputados/{id}/despesas com latência artificial.
+"""
+import threading
+import time
+
+import pytest
+
+from benchmarks.download_despesas import criar_servidor_stub, download_concorrente, download_serial
+
+LATENCIA = 0.05
+DEPUTADOS = 40
+CONCORRENCIA = 8
+
+@pytest.fixture
+def urls_stub():
+    # Um servidor (e uma porta) por teste: as URLs nunca estão no cache HTTP
+    servidor = criar_servidor_stub(LATENCIA, despesas_por_deputado=3)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    host, porta = servidor.server_address
+    yield [f"http://{host}:{porta}/api/v2/deputados/{i}/despesas?ano=2024" for i in range(1, DEPUTADOS + 1)]
+    servidor.shutdown()
+    servidor.server_close()
+
+def test_concorrente_devolve_as_respostas_na_ordem_das_urls(urls_stub):
+    concorrente = download_concorrente(urls_stub, CONCORRENCIA)
+
+    # codDocumento = id_deputado * 10000 + i no servidor local
+    assert [corpo["dados"][0]["codDocumento"] // 10000 for corpo in concorrente] == list(range(1, DEPUTADOS + 1))
+    assert concorrente == download_serial(urls_stub)
+
+def test_concorrente_e_mais_rapido_que_o_serial(urls_stub):
+    inicio = time.perf_counter()
+    download_concorrente(urls_stub, CONCORRENCIA)
+    tempo_concorrente = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    download_serial(urls_stub)
+    tempo_serial = time.perf_counter() - inicio
+
+    # O serial leva ao menos DEPUTADOS * LATENCIA; com CONCORRENCIA
+    # requisições ao mesmo tempo o ganho esperado é perto de 8x
+    assert tempo_serial >= DEPUTADOS * LATENCIA
+    assert tempo_concorrente < tempo_serial / 3
+
+def test_concorrente_devolve_none_para_a_url_que_falha(urls_stub):
+    urls = urls_stub[:3] + [urls_stub[0].replace("/despesas", "/inexistente")]
+    corpos = download_concorrente(urls, CONCORRENCIA)
+
+    assert all(corpo is not None for corpo in corpos[:3])
+    assert corpos[3] is None
@@ -0,0 +1,30 @@
+from tratamentoDados.escrita_paralela import dividir_em_faixas
+
+def test_cada_chave_fica_em_uma_unica_faixa_em_ordem():
+    pesos = {chave: 1 + chave % 7 for chave in range(100, 0, -1)}
+    faixas = dividir_em_faixas(pesos, 4)
+
+    assert len(faixas) == 4
+    assert [chave for faixa in faixas for chave in faixa] == sorted(pesos)
+
+def test_faixas_de_peso_parecido():
+    pesos = {chave: 10 for chave in range(40)}
+    faixas = dividir_em_faixas(pesos, 4)
+
+    assert [sum(pesos[chave] for chave in faixa) for faixa in faixas] == [100, 100, 100, 100]
+
+def test_chave_pesada_nao_e_dividida():
+    faixas = dividir_em_faixas({1: 1, 2: 1000, 3: 1, 4: 1}, 3)
+
+    assert [chave for faixa in faixas for chave in faixa] == [1, 2, 3, 4]
+    assert any(2 in faixa for faixa in faixas)
+    assert len(faixas) <= 3
+
+def test_chave_nula_vai_para_a_primeira_faixa():
+    faixas = dividir_em_faixas({None: 5, 1: 5, 2: 5}, 3)
+
+    assert faixas[0][0] is None
+
+def test_mais_faixas_que_chaves():
+    assert dividir_em_faixas({1: 1, 2: 1}, 8) == [[1], [2]]
+    assert dividir_em_faixas({}, 4) == []
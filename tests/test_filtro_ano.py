@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import select, text
+from sqlmodel import Session
+
+from models.sessao_votacao import SessaoVotacao
+from tratamentoDados.sessao_proposicao import converter_data_hora
+from utils.querys import filtro_ano
+
+def test_converter_data_hora():
+    assert converter_data_hora("2024-12-18T20:13:05") == datetime(2024, 12, 18, 20, 13, 5)
+    assert converter_data_hora(None) is None
+    assert converter_data_hora("") is None
+
+def popular_sessoes(engine, datas):
+    with Session(engine) as session:
+        session.add_all(
+            SessaoVotacao(id_dados_abertos=str(numero), data_hora_registro=data, descricao="Votação")
+            for numero, data in enumerate(datas)
+        )
+        session.commit()
+
+def test_filtro_ano_inclui_o_ano_inteiro_e_nada_alem(banco):
+    popular_sessoes(banco, [
+        datetime(2023, 12, 31, 23, 59, 59), datetime(2024, 1, 1, 0, 0), datetime(2024, 12, 31, 23, 59, 59, 999999),
+        datetime(2025, 1, 1, 0, 0), None,
+    ])
+
+    with banco.connect() as conexao:
+        datas = conexao.execute(
+            select(SessaoVotacao.data_hora_registro).where(filtro_ano(SessaoVotacao.data_hora_registro, 2024))
+        ).scalars().all()
+        # A coluna gerada concorda com o filtro
+        anos = dict(conexao.execute(text("SELECT id_dados_abertos, ano FROM sessaovotacao")).all())
+
+    assert sorted(datas) == [datetime(2024, 1, 1, 0, 0), datetime(2024, 12, 31, 23, 59, 59, 999999)]
+    assert anos == {"0": 2023, "1": 2024, "2": 2024, "3": 2025, "4": None}
+
+def test_filtro_ano_usa_o_indice_da_coluna(banco):
+    popular_sessoes(banco, [datetime(2024, 5, 1, 10, 0)])
+    consulta = select(SessaoVotacao.id).where(filtro_ano(SessaoVotacao.data_hora_registro, 2024))
+
+    with banco.begin() as conexao:
+        # Com poucas linhas o planejador prefere ler a tabela; sem essa opção,
+        # só uma condição que o índice atende evita o Seq Scan
+        conexao.execute(text("SET LOCAL enable_seqscan = off"))
+        compilada = consulta.compile(conexao)
+        plano = "\n".join(conexao.exec_driver_sql(f"EXPLAIN {compilada}", compilada.params).scalars())
+
+    assert "ix_sessaovotacao_data_hora_registro" in plano
@@ -0,0 +1,58 @@
+import pytest
+import requests
+
+from tratamentoDados import cliente_http
+from tratamentoDados.fixtures_api import (
+    DESLOCAMENTO_ID_DEPUTADO, DESLOCAMENTO_ID_VOTACAO, AdaptadorReproducao, RepositorioFixtures,
+    id_deputado_copia, id_votacao_copia, normalizar_url
+)
+from utils.api_camara import URL_BASE_API
+
+def test_normalizar_url_ignora_a_ordem_dos_parametros():
+    assert normalizar_url("https://x/api/v2/deputados/1/despesas?itens=100&ano=2024&mes=2&mes=1") == \
+        normalizar_url("https://x/api/v2/deputados/1/despesas?mes=1&ano=2024&mes=2&itens=100")
+
+def test_normalizar_url_mantem_parametros_vazios_e_descarta_o_fragmento():
+    assert normalizar_url("https://x/votacoes?b=&a=1#topo") == "https://x/votacoes?a=1&b="
+
+def test_id_deputado_copia():
+    assert id_deputado_copia(204554, 0) == 204554
+    assert id_deputado_copia("204554", 2) == 204554 + 2 * DESLOCAMENTO_ID_DEPUTADO
+
+def test_id_votacao_copia_desloca_o_sequencial():
+    assert id_votacao_copia("2270800-160", 0) == "2270800-160"
+    assert id_votacao_copia("2270800-160", 3) == f"2270800-{160 + 3 * DESLOCAMENTO_ID_VOTACAO}"
+
+def test_id_votacao_copia_fora_do_formato_ganha_sufixo():
+    assert id_votacao_copia("abc", 2) == "abc002"
+    assert id_votacao_copia("2270800-x", 1) == "2270800-x001"
+
+def test_copias_nao_colidem_com_o_original():
+    ids = {id_votacao_copia("2270800-99999", copia) for copia in range(5)}
+    assert len(ids) == 5
+
+class AdaptadorContado(AdaptadorReproducao):
+    def __init__(self, repositorio):
+        super().__init__(repositorio, latencia=0, variacao=0)
+        self.envios = 0
+
+    def send(self, request, **kwargs):
+        self.envios += 1
+        return super().send(request, **kwargs)
+
+def test_reproducao_nao_passa_pelo_cache(tmp_path, monkeypatch):
+    url = f"{URL_BASE_API}/partidos/36844"
+    repositorio = RepositorioFixtures(str(tmp_path))
+    repositorio.salvar(url, "application/xml", 200, {"content-type": "application/xml", "etag": "\"1\""}, b"<xml/>")
+    sessao = requests.Session()
+    adaptador = AdaptadorContado(repositorio)
+    sessao.mount(URL_BASE_API.split("/api/")[0], adaptador)
+
+    monkeypatch.setattr(cliente_http, "DIRETORIO_FIXTURES", str(tmp_path))
+    monkeypatch.setattr(cliente_http, "obter_cache", lambda: pytest.fail("a reprodução não deve usar o cache em disco"))
+    for _ in range(2):
+        response = cliente_http.get(url, headers={"accept": "application/xml"}, sessao=sessao)
+        assert response.status_code == 200
+        assert response.content == b"<xml/>"
+    # As duas chamadas chegam às fixtures, sem condicional de um cache
+    assert adaptador.envios == 2
@@ -0,0 +1,71 @@
+"""
+Leitura incremental de JSON (tratamentoDados.leitor_json). Blocos de poucos
+caracteres fazem os valores, strings e números caírem na divisa entre duas
+leituras do arquivo.
+"""
+import json
+
+import pytest
+
+from tratamentoDados.leitor_json import iterar_registros_json, ler_registros_json
+
+TAMANHOS_BLOCO = [1, 2, 3, 7, 64, 1 << 16]
+
+REGISTROS = [
+    {"id": 1, "nome": "Ação \"entre aspas\" ]}, [{", "valor": 12.5, "parcela": 0},
+    {"id": 22, "nome": "", "valor": -3e2, "itens": [[], {}, [1, [2, [3]]]], "url": None},
+    {"id": 333, "nome": "São Paulo ção \\ barra", "valor": 1234567.891, "ativo": True},
+    12345678901234567890,
+    "texto solto",
+]
+
+def gravar(tmp_path, conteudo) -> str:
+    caminho = tmp_path / "arquivo.json"
+    caminho.write_text(conteudo if isinstance(conteudo, str) else json.dumps(conteudo, ensure_ascii=False, indent=1), encoding="utf-8")
+    return str(caminho)
+
+@pytest.mark.parametrize("tamanho_bloco", TAMANHOS_BLOCO)
+def test_lista_dentro_do_objeto_da_api(tmp_path, tamanho_bloco):
+    # Campos antes e depois da lista são decodificados e descartados
+    caminho = gravar(tmp_path, {"antes": {"dados": [0]}, "dados": REGISTROS, "links": [{"rel": "self", "href": "x"}]})
+
+    assert list(iterar_registros_json(caminho, tamanho_bloco=tamanho_bloco)) == REGISTROS
+
+@pytest.mark.parametrize("tamanho_bloco", TAMANHOS_BLOCO)
+def test_array_no_nivel_raiz(tmp_path, tamanho_bloco):
+    caminho = gravar(tmp_path, REGISTROS)
+
+    assert list(iterar_registros_json(caminho, chave=None, tamanho_bloco=tamanho_bloco)) == REGISTROS
+
+@pytest.mark.parametrize("tamanho_bloco", TAMANHOS_BLOCO)
+def test_numero_cortado_no_fim_do_bloco(tmp_path, tamanho_bloco):
+    # Sem espaços: "12." de "12.5" termina exatamente na divisa de algum bloco
+    numeros = [12.5, 100, 7, -0.25, 1e10, 3]
+    caminho = gravar(tmp_path, json.dumps({"dados": numeros}, separators=(",", ":")))
+
+    assert list(iterar_registros_json(caminho, tamanho_bloco=tamanho_bloco)) == numeros
+
+@pytest.mark.parametrize("conteudo", ['{"dados": []}', "[]", "{}", ' { "links" : [ ] } ', '{"outra": [1, 2]}'])
+def test_sem_registros(tmp_path, conteudo):
+    assert list(iterar_registros_json(gravar(tmp_path, conteudo), tamanho_bloco=2)) == []
+
+@pytest.mark.parametrize("conteudo", ['{"dados": [1, 2', '{"dados": [1, 2,]}', '{"dados" [1]}', ""])
+def test_json_invalido(tmp_path, conteudo):
+    with pytest.raises(json.JSONDecodeError):
+        list(iterar_registros_json(gravar(tmp_path, conteudo), tamanho_bloco=3))
+
+def test_registros_lidos_antes_do_erro_sao_entregues(tmp_path):
+    registros = iterar_registros_json(gravar(tmp_path, '{"dados": [{"id": 1}, {"id": 2}, {"id": '), tamanho_bloco=4)
+
+    assert next(registros) == {"id": 1}
+    assert next(registros) == {"id": 2}
+    with pytest.raises(json.JSONDecodeError):
+        next(registros)
+
+def test_ler_registros_json_informa_arquivo_ausente_ou_invalido(tmp_path, capsys):
+    assert list(ler_registros_json(str(tmp_path / "nao_existe.json"))) == []
+    assert list(ler_registros_json(gravar(tmp_path, '{"dados": [1,'))) == [1]
+
+    saida = capsys.readouterr().out
+    assert "não foi encontrado" in saida
+    assert "não é um JSON válido" in saida
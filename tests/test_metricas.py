@@ -0,0 +1,74 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from tratamentoDados.cliente_http import executar_concorrente
+from tratamentoDados.metricas import METRICAS, SEM_ETAPA, Metricas, em_etapa, gravar_relatorio, montar_relatorio, percentil, resumir_tempos
+from tratamentoDados.pipeline import ResultadoEtapa
+
+@pytest.fixture
+def metricas_limpas():
+    METRICAS.limpar()
+    yield METRICAS
+    METRICAS.limpar()
+
+def test_percentil_nearest_rank():
+    amostras = [float(valor) for valor in range(1, 101)]
+    assert percentil(amostras, 50) == 50.0
+    assert percentil(amostras, 99) == 99.0
+    assert percentil([3.0], 90) == 3.0
+    assert percentil([], 50) == 0.0
+
+def test_resumir_tempos_em_milissegundos():
+    resumo = resumir_tempos([0.3, 0.1, 0.2])
+    assert resumo == {"amostras": 3, "total_s": 0.6, "media_ms": 200.0, "p50_ms": 200.0, "p90_ms": 300.0, "p99_ms": 300.0, "max_ms": 300.0}
+    assert resumir_tempos([])["amostras"] == 0
+
+def test_contadores_ficam_na_etapa_inclusive_nas_threads():
+    metricas = Metricas()
+    metricas.contar("fora")
+    with em_etapa("votos"):
+        executar_concorrente(lambda _: metricas.contar("registros_baixados"), range(20), 4)
+        metricas.registrar_tempo("http", 0.01)
+
+    resumo = metricas.resumo()
+    assert resumo["votos"]["contadores"] == {"registros_baixados": 20}
+    assert resumo["votos"]["tempos"]["http"]["amostras"] == 1
+    assert resumo[SEM_ETAPA]["contadores"] == {"fora": 1}
+
+def test_incorporar_soma_as_metricas_de_outro_processo():
+    principal, processo = Metricas(), Metricas()
+    with em_etapa("despesas"):
+        principal.contar("registros_baixados", 2)
+        processo.contar("registros_baixados", 3)
+        processo.registrar_tempo("escrita_banco", 0.5)
+
+    principal.incorporar(json.loads(json.dumps(processo.exportar())))
+
+    resumo = principal.resumo()["despesas"]
+    assert resumo["contadores"] == {"registros_baixados": 5}
+    assert resumo["tempos"]["escrita_banco"]["total_s"] == 0.5
+
+def test_relatorio_separa_as_etapas_do_resto(metricas_limpas, tmp_path):
+    with em_etapa("partidos"):
+        metricas_limpas.contar("registros_baixados", 4)
+    with em_etapa("preparar_staging"):
+        metricas_limpas.registrar_tempo("escrita_banco", 0.2)
+    resultados = [ResultadoEtapa("partidos", "ok", 2.0, 10), ResultadoEtapa("votos", "falhou", 1.0, erro="ValueError()")]
+
+    relatorio = montar_relatorio(resultados, datetime(2024, 5, 1, 10, 0, 0), 3.5, usar_staging=True)
+
+    assert relatorio["situacao"] == "falhou"
+    assert relatorio["etapas"]["partidos"]["registros_por_segundo"] == 5.0
+    assert relatorio["etapas"]["partidos"]["contadores"] == {"registros_baixados": 4}
+    assert relatorio["etapas"]["votos"] == {
+        "situacao": "falhou", "duracao_s": 1.0, "registros_gravados": None, "registros_por_segundo": None,
+        "erro": "ValueError()", "contadores": {}, "tempos": {},
+    }
+    assert list(relatorio["outros"]) == ["preparar_staging"]
+
+    caminho = gravar_relatorio(relatorio, str(tmp_path))
+    assert caminho.endswith("carga_20240501_100000.json")
+    with open(caminho, encoding="utf-8") as f:
+        assert json.load(f) == relatorio
@@ -0,0 +1,32 @@
+import random
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from benchmarks.parser_xml import gerar_documento, parse_local
+from tratamentoDados import parser_xml
+from tratamentoDados.parser_xml import extrair_proposicoes_afetadas
+
+DOCUMENTOS = [
+    gerar_documento(random.Random(semente), proposicoes) for semente, proposicoes in [(1, 0), (2, 1), (3, 50)]
+] + [
+    # id vazio, outro <id> fora das proposições e proposições em outro ponto do documento
+    "<xml><dados><id>1-2</id><proposicoesAfetadas>"
+    "<proposicoesAfetadas><id>10</id></proposicoesAfetadas>"
+    "<proposicoesAfetadas><id></id></proposicoesAfetadas>"
+    "<proposicoesAfetadas><uri>x</uri></proposicoesAfetadas>"
+    "</proposicoesAfetadas><objetosPossiveis><proposicoesAfetadas><proposicoesAfetadas><id>20</id>"
+    "</proposicoesAfetadas></proposicoesAfetadas></objetosPossiveis></dados></xml>".encode("utf-8"),
+]
+
+@pytest.mark.parametrize("limite", [1024 * 1024, 0], ids=["findall", "iterparse"])
+@pytest.mark.parametrize("documento", DOCUMENTOS)
+def test_proposicoes_afetadas_igual_ao_findall(monkeypatch, documento, limite):
+    monkeypatch.setattr(parser_xml, "LIMITE_ITERPARSE", limite)
+    assert extrair_proposicoes_afetadas(documento) == {"proposicoes_afetadas_ids": parse_local(documento)}
+
+@pytest.mark.parametrize("limite", [1024 * 1024, 0], ids=["findall", "iterparse"])
+def test_xml_invalido_levanta_parse_error(monkeypatch, limite):
+    monkeypatch.setattr(parser_xml, "LIMITE_ITERPARSE", limite)
+    with pytest.raises(ET.ParseError):
+        extrair_proposicoes_afetadas(b"<xml><dados>")
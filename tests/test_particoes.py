@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from models.deputado import Deputado
+from models.dominios import TipoVoto
+from models.partido import Partido
+from models.sessao_votacao import SessaoVotacao
+from models.voto_individual import VotoIndividual
+from tratamentoDados.particoes import garantir_particoes
+
+def popular_votos(engine):
+    # Uma sessão no fim de 2023 e outra no fim de 2024, cada uma com um voto
+    # registrado já no ano seguinte
+    with engine.begin() as conexao:
+        garantir_particoes(conexao, "votoindividual", {2023, 2024})
+    with Session(engine) as session:
+        partido = Partido(id_dados_abertos=1, sigla="PA", nome_completo="Partido A")
+        sim = TipoVoto(descricao="Sim")
+        session.add_all([partido, sim])
+        session.flush()
+        deputado = Deputado(id_dados_abertos=10, nome_eleitoral="Deputada", sigla_partido="PA", sigla_uf="SP", id_partido=partido.id)
+        session.add(deputado)
+        session.flush()
+        for ano in (2023, 2024):
+            data_sessao = datetime(ano, 12, 31, 23, 0)
+            sessao = SessaoVotacao(id_dados_abertos=f"{ano}-1", data_hora_registro=data_sessao, descricao="Votação", aprovacao="1")
+            session.add(sessao)
+            session.flush()
+            session.add(VotoIndividual(
+                id_votacao=sessao.id, id_deputado=deputado.id, id_tipo_voto=sim.id,
+                data_hora_registro=datetime(ano + 1, 1, 1, 0, 5), data_hora_sessao=data_sessao,
+            ))
+        session.commit()
+
+def test_ranking_por_tipo_voto_le_so_a_particao_do_ano(banco, cliente):
+    popular_votos(banco)
+
+    consultas = []
+    def capturar(conexao, cursor, statement, parameters, context, executemany):
+        if "votoindividual" in statement:
+            consultas.append((statement, parameters))
+
+    event.listen(banco, "before_cursor_execute", capturar)
+    try:
+        resposta = cliente.get("/partido/ranking/partidos_por_tipo_voto", params={"tipo_voto": "Sim", "ano": 2024})
+    finally:
+        event.remove(banco, "before_cursor_execute", capturar)
+
+    # O voto conta no ano da sessão, não no do registro
+    assert resposta.status_code == 200
+    assert [item["total_votos"] for item in resposta.json()["items"]] == [1]
+
+    assert consultas
+    with banco.connect() as conexao:
+        for statement, parameters in consultas:
+            plano = "\n".join(linha for (linha,) in conexao.exec_driver_sql(f"EXPLAIN {statement}", parameters))
+            assert "votoindividual_2024" in plano
+            assert "votoindividual_2023" not in plano
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from models.proposicao import Proposicao
+from tratamentoDados import sessao_proposicao
+from tratamentoDados.sessao_proposicao import resolver_proposicoes
+
+class ApiProposicoes:
+    """Responde as proposições dadas (None simula falha) e conta as consultas."""
+
+    def __init__(self, respostas):
+        self.respostas = respostas
+        self.consultadas = []
+        self._trava = threading.Lock()
+
+    def __call__(self, proposicao_id, sessao_http=None):
+        with self._trava:
+            self.consultadas.append(proposicao_id)
+        return self.respostas.get(proposicao_id)
+
+def dados_proposicao(id_api):
+    return {"id": id_api, "siglaTipo": "PL", "ano": 2024, "ementa": f"Proposição {id_api}"}
+
+@pytest.fixture
+def api(monkeypatch):
+    api = ApiProposicoes({"2": dados_proposicao(2), "3": dados_proposicao(3), "0004": dados_proposicao(4)})
+    monkeypatch.setattr(sessao_proposicao, "buscar_detalhes_proposicao_api", api)
+    return api
+
+def test_consulta_a_api_so_para_o_que_nao_esta_no_banco_nem_no_cache(banco, api):
+    with Session(banco) as session:
+        session.add(Proposicao(id_dados_abertos="1", sigla_tipo="PL", ano=2023))
+        session.commit()
+
+    cache, falhas = {}, set()
+    with Session(banco) as session:
+        inseridas = resolver_proposicoes(session, None, {"1", "2", "3"}, cache, falhas, limite_concorrencia=4)
+        session.commit()
+
+    assert inseridas == 2
+    assert sorted(api.consultadas) == ["2", "3"]
+    assert set(cache) == {"1", "2", "3"}
+    with banco.connect() as conexao:
+        assert dict(conexao.execute(text("SELECT id_dados_abertos, id FROM proposicao")).all()) == cache
+
+    # Num bloco seguinte, o cache responde sem banco nem API
+    with Session(banco) as session:
+        assert resolver_proposicoes(session, None, {"1", "2"}, cache, falhas, limite_concorrencia=4) == 0
+    assert len(api.consultadas) == 2
+
+def test_falhas_nao_sao_consultadas_de_novo_na_mesma_execucao(banco, api):
+    cache, falhas = {}, set()
+    with Session(banco) as session:
+        resolver_proposicoes(session, None, {"2", "9"}, cache, falhas, limite_concorrencia=4)
+        resolver_proposicoes(session, None, {"9"}, cache, falhas, limite_concorrencia=4)
+        session.commit()
+
+    assert falhas == {"9"}
+    assert "9" not in cache
+    assert sorted(api.consultadas) == ["2", "9"]
+
+def test_id_em_outro_formato_na_api_aponta_para_a_proposicao_gravada(banco, api):
+    cache, falhas = {}, set()
+    with Session(banco) as session:
+        resolver_proposicoes(session, None, {"0004"}, cache, falhas, limite_concorrencia=4)
+        session.commit()
+
+    assert cache["0004"] == cache["4"]
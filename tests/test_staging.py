@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from models.deputado import Deputado
+from models.partido import Partido
+from tratamentoDados.staging import escrevendo_no_staging, preparar_staging, publicar_staging
+
+def contar(conexao, consulta):
+    return conexao.execute(text(consulta)).scalar()
+
+def chaves_estrangeiras(conexao):
+    return contar(conexao, "SELECT count(*) FROM pg_constraint WHERE contype = 'f' AND connamespace = 'public'::regnamespace")
+
+def test_carga_no_staging_so_aparece_depois_de_publicada(banco):
+    with Session(banco) as session:
+        partido = Partido(id_dados_abertos=1, sigla="PA", nome_completo="Partido A")
+        session.add(partido)
+        session.flush()
+        session.add(Deputado(id_dados_abertos=10, nome_eleitoral="Deputada", sigla_partido="PA", sigla_uf="SP", id_partido=partido.id))
+        session.commit()
+    with banco.connect() as conexao:
+        chaves_antes = chaves_estrangeiras(conexao)
+
+    preparar_staging(banco)
+    with escrevendo_no_staging(banco):
+        with Session(banco) as session:
+            session.add(Partido(id_dados_abertos=2, sigla="PB", nome_completo="Partido B"))
+            session.commit()
+        with banco.connect() as conexao:
+            assert contar(conexao, "SELECT count(*) FROM partido") == 2
+            # A API, em public, ainda não vê a carga
+            assert contar(conexao, "SELECT count(*) FROM public.partido") == 1
+
+    publicar_staging(banco)
+    with banco.connect() as conexao:
+        assert contar(conexao, "SELECT count(*) FROM public.partido") == 2
+        assert contar(conexao, "SELECT count(*) FROM public.deputado") == 1
+        assert contar(conexao, "SELECT count(*) FROM pg_namespace WHERE nspname IN ('staging', 'antigo')") == 0
+        # Nenhuma chave estrangeira foi apagada junto com as tabelas antigas
+        assert chaves_estrangeiras(conexao) == chaves_antes
+        # A sequência do id continua de onde o staging parou
+        assert contar(conexao, "SELECT pg_get_serial_sequence('public.partido', 'id')") == "public.partido_id_seq"
+    with Session(banco) as session:
+        partido = Partido(id_dados_abertos=3, sigla="PC", nome_completo="Partido C")
+        session.add(partido)
+        session.commit()
+        assert partido.id == 3
+
+def test_tabela_referenciada_de_fora_do_staging_e_recusada(banco):
+    # gabinete, despesa etc. referenciam deputado e perderiam a chave na troca
+    with pytest.raises(ValueError, match="gabinete -> deputado"):
+        preparar_staging(banco, ["deputado"])
+    with banco.connect() as conexao:
+        assert contar(conexao, "SELECT count(*) FROM pg_namespace WHERE nspname = 'staging'") == 0
@@ -0,0 +1,50 @@
+from sqlalchemy import text
+from sqlmodel import Session
+
+from models.deputado import Deputado
+from models.estado_sincronizacao import FONTE_VISAO_MATERIALIZADA
+from tratamentoDados.Despesa import carregar_despesas
+from tratamentoDados.visoes_materializadas import VISOES, atualizar_visoes
+from utils.querys import CABECALHO_ATUALIZACAO
+
+def popular_despesas(engine):
+    # Uma deputada de SP com despesas em 2023 e em 2024
+    with Session(engine) as session:
+        deputado = Deputado(id_dados_abertos=10, nome_eleitoral="Deputada", sigla_partido="PA", sigla_uf="SP")
+        session.add(deputado)
+        session.commit()
+        id_deputado = deputado.id
+    carregar_despesas([
+        {"id_deputado": id_deputado, "ano": ano, "mes": 1, "tipoDespesa": "COMBUSTÍVEIS", "valorLiquido": valor, "codDocumento": documento}
+        for ano, valor, documento in [(2023, 1000.0, 1), (2024, 30.0, 2), (2024, 20.0, 3)]
+    ], "teste", destino=engine)
+    return id_deputado
+
+def marcas(engine):
+    with engine.connect() as conexao:
+        return dict(conexao.execute(
+            text("SELECT chave, valor FROM estadosincronizacao WHERE fonte = :fonte"), {"fonte": FONTE_VISAO_MATERIALIZADA}
+        ).all())
+
+def test_rankings_mostram_a_carga_depois_da_atualizacao(banco, cliente):
+    id_deputado = popular_despesas(banco)
+
+    # Antes da atualização as visões ainda têm o estado anterior (vazio)
+    ranking = cliente.get("/deputado/ranking/deputados_despesa").json()
+    assert [item["total_despesas"] for item in ranking["items"]] == [0.0]
+
+    atualizar_visoes(banco)
+
+    resposta = cliente.get("/deputado/ranking/deputados_despesa")
+    # Só 2024 entra no ranking, mesmo com a visão agrupada por ano
+    assert [(item["id"], item["total_despesas"]) for item in resposta.json()["items"]] == [(id_deputado, 50.0)]
+    assert resposta.headers[CABECALHO_ATUALIZACAO] == marcas(banco)["mv_despesa_deputado"]
+
+    estados = cliente.get("/analise/comparativo_estados", params={"ano": 2023})
+    assert [(item["uf"], item["total_gasto"]) for item in estados.json()] == [("SP", 1000.0)]
+    assert estados.headers[CABECALHO_ATUALIZACAO] == marcas(banco)["mv_gasto_uf"]
+
+def test_atualizacao_marca_todas_as_visoes(banco):
+    atualizar_visoes(banco)
+
+    assert set(marcas(banco)) == set(VISOES)
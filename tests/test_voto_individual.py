@@ -0,0 +1,193 @@
+import json
+from datetime import datetime
+
+import pytest
+import requests
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from models.deputado import Deputado
+from models.estado_sincronizacao import FONTE_VOTO_INDIVIDUAL
+from models.gabinete import Gabinete
+from models.partido import Partido
+from models.sessao_votacao import SessaoVotacao
+from tratamentoDados import voto_individual
+from tratamentoDados.particoes import garantir_particoes
+from tratamentoDados.voto_individual import SessaoPendente, carregar_votos_sessoes
+
+DATA_SESSAO = datetime(2024, 5, 1, 10, 0)
+
+def voto_api(id_deputado, tipo_voto="Sim"):
+    return {
+        "tipoVoto": tipo_voto,
+        "dataRegistroVoto": "2024-05-01T10:05:00",
+        "deputado_": {"id": id_deputado, "nome": f"Deputado {id_deputado}", "siglaPartido": "PA", "siglaUf": "SP"},
+    }
+
+class ApiVotos:
+    """Responde /votacoes/{id}/votos com os votos dados para cada sessão."""
+
+    def __init__(self, votos_por_sessao):
+        self.votos_por_sessao = votos_por_sessao
+
+    def __call__(self, url, headers=None, timeout=None):
+        id_sessao = url.split("/votacoes/")[1].split("/")[0]
+        votos = self.votos_por_sessao[id_sessao]
+        if isinstance(votos, Exception):
+            raise votos
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"dados": votos}).encode("utf-8")
+        return response
+
+def popular_sessoes(engine, quantidade=1):
+    # Um partido, dois deputados (ids 10 e 11 na API) e `quantidade` sessões
+    with engine.begin() as conexao:
+        garantir_particoes(conexao, "votoindividual", {DATA_SESSAO.year})
+    with Session(engine) as session:
+        partido = Partido(id_dados_abertos=1, sigla="PA", nome_completo="Partido A")
+        session.add(partido)
+        session.flush()
+        for id_api in (10, 11):
+            session.add(Deputado(id_dados_abertos=id_api, nome_eleitoral=f"Deputado {id_api}", sigla_partido="PA", sigla_uf="SP", id_partido=partido.id))
+        sessoes = [
+            SessaoVotacao(id_dados_abertos=f"2024-{numero}", data_hora_registro=DATA_SESSAO, descricao="Votação", aprovacao="1")
+            for numero in range(1, quantidade + 1)
+        ]
+        session.add_all(sessoes)
+        session.commit()
+        return [SessaoPendente(sessao.id, sessao.id_dados_abertos, sessao.data_hora_registro) for sessao in sessoes]
+
+def contar(engine, consulta):
+    with engine.connect() as conexao:
+        return conexao.execute(text(consulta)).scalar()
+
+def marcadas(engine):
+    with engine.connect() as conexao:
+        return set(conexao.execute(
+            text("SELECT chave FROM estadosincronizacao WHERE fonte = :fonte"), {"fonte": FONTE_VOTO_INDIVIDUAL}
+        ).scalars())
+
+def test_grava_os_votos_dos_deputados_do_banco(banco, monkeypatch):
+    [sessao] = popular_sessoes(banco)
+    monkeypatch.setattr(voto_individual, "get", ApiVotos({"2024-1": [
+        voto_api(10), voto_api(11, "Não"), {"tipoVoto": "Sim", "deputado_": None},
+    ]}))
+
+    resultado = carregar_votos_sessoes(banco, [sessao])
+
+    assert resultado.enviados == 2
+    assert resultado.sem_deputado == 1
+    assert resultado.desconhecidos == {} and resultado.pendentes == {}
+    assert contar(banco, """
+        SELECT count(*) FROM votoindividual v
+        JOIN deputado d ON d.id = v.id_deputado
+        JOIN tipovoto t ON t.id = v.id_tipo_voto
+        WHERE (d.id_dados_abertos, t.descricao) IN ((10, 'Sim'), (11, 'Não'))
+    """) == 2
+    assert contar(banco, "SELECT count(*) FROM votoindividual WHERE data_hora_sessao = '2024-05-01 10:00'") == 2
+    assert marcadas(banco) == {"2024-1"}
+
+def test_votos_de_deputado_fora_do_banco_esperam_e_a_sessao_fica_sem_marca(banco, monkeypatch):
+    [sessao] = popular_sessoes(banco)
+    monkeypatch.setattr(voto_individual, "get", ApiVotos({"2024-1": [voto_api(10), voto_api(99), voto_api(99)]}))
+
+    resultado = carregar_votos_sessoes(banco, [sessao])
+
+    assert resultado.enviados == 1
+    assert list(resultado.desconhecidos) == [99]
+    assert [len(votos) for _, votos in resultado.pendentes.values()] == [2]
+    assert marcadas(banco) == set()
+
+def test_erro_inesperado_desfaz_os_votos_nao_confirmados_e_sobe(banco, monkeypatch):
+    sessoes = popular_sessoes(banco, 2)
+    monkeypatch.setattr(voto_individual, "get", ApiVotos({"2024-1": [voto_api(10)], "2024-2": ValueError("resposta inválida")}))
+
+    with pytest.raises(ValueError):
+        carregar_votos_sessoes(banco, sessoes)
+
+    # A primeira sessão ainda não tinha commit: nem votos nem marca
+    assert contar(banco, "SELECT count(*) FROM votoindividual") == 0
+    assert marcadas(banco) == set()
+
+def test_falha_http_pula_a_sessao_sem_marcar(banco, monkeypatch):
+    sessoes = popular_sessoes(banco, 2)
+    monkeypatch.setattr(voto_individual, "get", ApiVotos({
+        "2024-1": requests.exceptions.ConnectionError("recusada"), "2024-2": [voto_api(10)],
+    }))
+
+    resultado = carregar_votos_sessoes(banco, sessoes)
+
+    assert resultado.enviados == 1
+    assert marcadas(banco) == {"2024-2"}
+
+def test_recarregar_a_sessao_nao_duplica_votos(banco, monkeypatch):
+    [sessao] = popular_sessoes(banco)
+    # A API repete o voto do deputado 10 na mesma resposta
+    monkeypatch.setattr(voto_individual, "get", ApiVotos({"2024-1": [voto_api(10), voto_api(11), voto_api(10)]}))
+
+    carregar_votos_sessoes(banco, [sessao])
+    carregar_votos_sessoes(banco, [sessao])
+
+    assert contar(banco, "SELECT count(*) FROM votoindividual") == 2
+    assert contar(banco, "SELECT count(DISTINCT (id_votacao, id_deputado)) FROM votoindividual") == 2
+
+def test_indice_unico_recusa_o_segundo_voto_do_deputado(banco):
+    [sessao] = popular_sessoes(banco)
+    inserir = text("""
+        INSERT INTO votoindividual (id_votacao, id_deputado, id_tipo_voto, data_hora_registro, data_hora_sessao)
+        SELECT :id_votacao, d.id, t.id, :data, :data FROM deputado d, tipovoto t WHERE d.id_dados_abertos = 10
+    """)
+    with banco.begin() as conexao:
+        conexao.execute(text("INSERT INTO tipovoto (descricao) VALUES ('Sim')"))
+        conexao.execute(inserir, {"id_votacao": sessao.id, "data": DATA_SESSAO})
+    with pytest.raises(IntegrityError, match="duplicate key"):
+        with banco.begin() as conexao:
+            conexao.execute(inserir, {"id_votacao": sessao.id, "data": DATA_SESSAO})
+
+def detalhes_deputado(sala="101"):
+    # Formato de extrair_detalhes_deputado; ex-deputados vêm sem último status
+    return {"nome_civil": "Nome Civil", "nome_eleitoral": None, "sigla_partido": None, "sigla_uf": "RJ", "gabinete": {"sala": sala, "predio": "4"}}
+
+def test_deputados_desconhecidos_sao_buscados_de_uma_vez_e_completam_as_sessoes(banco, monkeypatch):
+    sessoes = popular_sessoes(banco, 2)
+    monkeypatch.setattr(voto_individual, "get", ApiVotos({
+        "2024-1": [voto_api(10), voto_api(98), voto_api(99), voto_api(97)],
+        "2024-2": [voto_api(98)],
+    }))
+    # 98 vem completo, 99 sem sala de gabinete e 97 falha na API
+    buscados = []
+    def buscar_detalhes(uri):
+        buscados.append(uri)
+        return {"98": detalhes_deputado(), "99": detalhes_deputado(sala=None)}.get(uri.rsplit("/", 1)[-1])
+    monkeypatch.setattr(voto_individual, "buscar_detalhes_deputado_xml", buscar_detalhes)
+
+    resultado = carregar_votos_sessoes(banco, sessoes)
+    assert sorted(resultado.desconhecidos) == [97, 98, 99]
+
+    with Session(banco, expire_on_commit=False) as session:
+        deputados = voto_individual.carregar_mapa_deputados(session)
+        novos = voto_individual.resolver_deputados_desconhecidos(session, resultado.desconhecidos, limite_concorrencia=4)
+        deputados.update(novos)
+        enviados, concluidas = voto_individual.completar_sessoes_pendentes(
+            session, resultado.pendentes, deputados, voto_individual.carregar_dominios_voto(banco)
+        )
+        session.commit()
+
+    # Cada deputado é buscado uma vez, mesmo com votos em duas sessões
+    assert len(buscados) == 3
+    assert list(novos) == [98]
+    assert enviados == 2
+    assert concluidas == ["2024-2"]
+    assert contar(banco, """
+        SELECT count(*) FROM deputado d JOIN gabinete g ON g.id_deputado = d.id JOIN partido p ON p.id = d.id_partido
+        WHERE d.id_dados_abertos = 98 AND d.nome_eleitoral = 'Deputado 98' AND d.sigla_partido = 'PA' AND g.sala = '101'
+    """) == 1
+    assert contar(banco, "SELECT count(*) FROM deputado WHERE id_dados_abertos IN (97, 99)") == 0
+    assert contar(banco, "SELECT count(*) FROM votoindividual") == 3
+
+def test_campos_faltantes():
+    deputado = Deputado(id_dados_abertos=1, nome_eleitoral="Deputada", sigla_partido=None, sigla_uf="SP")
+    assert voto_individual.campos_faltantes(deputado, Gabinete(sala=None)) == ["sigla_partido", "gabinete.sala"]
+    assert voto_individual.campos_faltantes(Deputado(id_dados_abertos=1, nome_eleitoral="D", sigla_partido="PA", sigla_uf="SP"), Gabinete(sala="1")) == []
@@ -1,84 +1,372 @@
-from sqlmodel import SQLModel, Session, select
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
 from database import engine
+import argparse
+import csv
+import io
 import json
+import os
 import requests
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Optional
+import threading
+import zipfile
+from functools import partial
+from typing import Iterable, Iterator, List, Dict, Optional
 
 from models.deputado import Deputado
 from models.despesa import Despesa
+from models.dominios import TipoDespesa
+from models.estado_sincronizacao import FONTE_DESPESA
+from tratamentoDados.carga_em_lote import TAMANHO_LOTE, mesclar_em_lote
+from tratamentoDados.cliente_http import LIMITE_CONCORRENCIA, URL_BASE_API, criar_sessao_http, executar_concorrente, iterar_paginas
+from tratamentoDados.despesa_mensal import recalcular_chaves_afetadas, registrar_chaves_afetadas
+from tratamentoDados.dominios import Dominio
+from tratamentoDados.escrita_paralela import FAIXAS_POR_PROCESSO, PROCESSOS_ESCRITA, executar_em_faixas, particionar_em_arquivos
+from tratamentoDados.leitor_json import DIRETORIO_DADOS, iterar_registros_json
+from tratamentoDados.metricas import METRICAS, Progresso
+from tratamentoDados.particoes import garantir_particoes
+from tratamentoDados.sincronizacao import gravar_marcas, ler_marcas
 
-app = SQLModel()
+ANO_DESPESAS = 2024
+ARQUIVO_DESPESAS_JSON = os.path.join(DIRETORIO_DADOS, "despesas_deputados_2024.json")
+ARQUIVO_DESPESAS_NDJSON = os.path.join(DIRETORIO_DADOS, "despesas_deputados_2024.ndjson")
 
-def salvando_despesas_localmente_json():
+# A API ignora valores de `itens` acima de 100, por isso é preciso paginar
+ITENS_POR_PAGINA = 100
+
+# Identifica um recibo na fonte (ver models/despesa.py); o ano entra porque a
+# tabela é particionada por ele
+CHAVE_NATURAL_DESPESA = ("id_deputado", "cod_documento", "parcela", "ano")
+
+# Arquivo anual da Cota Parlamentar (CEAP) com as despesas de todos os
+# deputados: https://www.camara.leg.br/cotas/Ano-2024.csv.zip
+ARQUIVO_CEAP = os.path.join(DIRETORIO_DADOS, "Ano-2024.csv.zip")
+
+# Códigos de `indTipoDocumento` do arquivo da CEAP, com os nomes usados pela API
+TIPOS_DOCUMENTO_CEAP = {
+    "0": "Nota Fiscal",
+    "1": "Recibos/Outros",
+    "2": "Despesa no Exterior",
+    "4": "Nota Fiscal Eletrônica",
+}
+
+def periodo_despesa(ano: int, mes: int) -> str:
+    # Formato das marcas de despesa: 'AAAA-MM', comparável como texto
+    return f"{ano:04d}-{mes:02d}"
+
+def meses_pendentes(marca: Optional[str]) -> List[int]:
+    """
+    Meses de ANO_DESPESAS que ainda precisam ser baixados para um deputado.
+    O mês da marca é buscado de novo, porque recibos de um mês continuam
+    sendo lançados depois que ele termina.
+    """
+    if not marca:
+        return list(range(1, 13))
+    ano, mes = (int(parte) for parte in marca.split("-"))
+    if ano < ANO_DESPESAS:
+        return list(range(1, 13))
+    if ano > ANO_DESPESAS:
+        return []
+    return list(range(mes, 13))
+
+def url_despesas_deputado(id_dados_abertos: int, meses: Optional[List[int]] = None) -> str:
+    url = f"{URL_BASE_API}/deputados/{id_dados_abertos}/despesas?ano={ANO_DESPESAS}&itens={ITENS_POR_PAGINA}"
+    if meses is not None and len(meses) < 12:
+        url += "".join(f"&mes={mes}" for mes in meses)
+    return url
+
+def iterar_despesas_deputado(sessao_http: requests.Session, deputado: Deputado, meses: Optional[List[int]] = None) -> Iterator[List[Dict]]:
+    # É preciso acessar a api das despesas do deputado, página por página
+    url = url_despesas_deputado(deputado.id_dados_abertos, meses)
+    for pagina in iterar_paginas(sessao_http, url):
+        METRICAS.contar("registros_baixados", len(pagina))
+        yield [
+            {**despesa, "id_deputado": deputado.id, "nome_deputado": deputado.nome_eleitoral}
+            for despesa in pagina
+        ]
+
+def buscar_despesas_deputado(sessao_http: requests.Session, deputado: Deputado) -> Dict:
+    try:
+        dados = [despesa for pagina in iterar_despesas_deputado(sessao_http, deputado) for despesa in pagina]
+    except requests.exceptions.RequestException as e:
+        print(f"Erro ao buscar despesas para deputado {deputado.nome_eleitoral}: {e}")
+        dados = []
+
+    return {
+        "id_deputado": deputado.id,
+        "nome_deputado": deputado.nome_eleitoral,
+        "despesas": dados
+    }
+
+def carregar_deputados_db() -> List[Deputado]:
     # Primeiro é preciso carregar os deputados na memoria
     with Session(engine) as session:
         statement = select(Deputado)
-        deputados = session.exec(statement).all()
-    
-    despesas_completos = []
-
-    for i, deputado in enumerate(deputados):
-
-        print("Processando deputado:", deputado.nome_eleitoral, "I:", i)
-        # É preciso acessar a api das despesas do deputado
-        url = f"https://dadosabertos.camara.leg.br/api/v2/deputados/{deputado.id_dados_abertos}/despesas?ano=2024&itens=1500"
-        response = requests.get(url, headers={"accept": "application/json"})
-        if response.status_code == 200:
-            dados = response.json().get("dados", [])
-        else:
-            print(f"Erro ao buscar despesas para deputado {deputado.nome}: {response.status_code}")
-            dados = []
-        despesas_completos.append({
-            "id_deputado": deputado.id,
-            "nome_deputado": deputado.nome_eleitoral,
-            "despesas": dados
-        })
+        return session.exec(statement).all()
+
+def salvando_despesas_localmente_json(limite_concorrencia: int = LIMITE_CONCORRENCIA):
+    deputados = carregar_deputados_db()
+
+    print(f"Buscando despesas de {len(deputados)} deputados ({limite_concorrencia} requisições simultâneas)...")
+
+    # Uma única sessão HTTP compartilhada entre as requisições concorrentes
+    with criar_sessao_http(limite_concorrencia) as sessao_http:
+        despesas_completos = executar_concorrente(
+            lambda deputado: buscar_despesas_deputado(sessao_http, deputado),
+            deputados,
+            limite_concorrencia
+        )
 
     # Salvar todas as despesas em um arquivo JSON
-    with open("data/despesas_deputados_2024.json", "w", encoding="utf-8") as f:
+    with open(ARQUIVO_DESPESAS_JSON, "w", encoding="utf-8") as f:
         json.dump(despesas_completos, f, ensure_ascii=False, indent=2)
 
-def carregar_despesas_json(caminho_arquivo: str) -> List[Dict]:
-    with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-        dados = json.load(f)
-    return dados
+def salvando_despesas_localmente_ndjson(caminho_arquivo: str = ARQUIVO_DESPESAS_NDJSON, limite_concorrencia: int = LIMITE_CONCORRENCIA):
+    """
+    Baixa as despesas de todos os deputados seguindo a paginação da API e grava
+    no arquivo uma despesa por linha (NDJSON). Só as despesas de um deputado
+    por requisição simultânea ficam em memória.
+
+    Para cada deputado, só são pedidos os meses a partir da marca da última
+    carga (ver `carregar_despesas`). Um deputado só vai para o arquivo se
+    todas as páginas vierem: uma carga parcial avançaria a marca e perderia o
+    resto dos meses.
+    """
+    deputados = carregar_deputados_db()
+    with Session(engine) as session:
+        marcas = ler_marcas(session, FONTE_DESPESA)
+    trava_arquivo = threading.Lock()
+    progresso = Progresso("deputados com despesas baixadas", len(deputados))
+
+    print(f"Buscando despesas de {len(deputados)} deputados ({limite_concorrencia} requisições simultâneas)...")
+
+    with open(caminho_arquivo, "w", encoding="utf-8") as arquivo, criar_sessao_http(limite_concorrencia) as sessao_http:
+        def baixar(deputado: Deputado) -> Optional[int]:
+            linhas = []
+            meses = meses_pendentes(marcas.get(str(deputado.id)))
+            if not meses:
+                return 0
+            try:
+                for pagina in iterar_despesas_deputado(sessao_http, deputado, meses):
+                    linhas.extend(json.dumps(despesa, ensure_ascii=False) + "\n" for despesa in pagina)
+            except requests.exceptions.RequestException as e:
+                print(f"Erro ao buscar despesas para deputado {deputado.nome_eleitoral} após {len(linhas)} registros: {e}")
+                return None
+            with trava_arquivo:
+                arquivo.write("".join(linhas))
+            progresso.avancar()
+            return len(linhas)
+
+        totais = executar_concorrente(baixar, deputados, limite_concorrencia)
+    progresso.concluir()
+
+    falhas = [deputado for deputado, total in zip(deputados, totais) if total is None]
+    print(f"{sum(total or 0 for total in totais)} despesas gravadas em {caminho_arquivo}.")
+    if falhas:
+        print(f"AVISO: {len(falhas)} deputados com download incompleto: {[d.id_dados_abertos for d in falhas]}")
 
-def main():
-    arquivo_json = 'data/despesas_deputados_2024.json'
-    despesas_base = carregar_despesas_json(arquivo_json)
-    
-    despesas_completas = []
+def carregar_despesas_json(caminho_arquivo: str) -> Iterator[Dict]:
+    # Um deputado (com a sua lista de despesas) por vez, sem carregar o arquivo inteiro
+    return iterar_registros_json(caminho_arquivo)
 
-    for despesas_json in despesas_base:        
-        print("Processando despesa do deputado:", despesas_json.get('nome_deputado'))
-        
-        despesas = despesas_json.get('despesas')
+def iterar_despesas_arquivo(caminho_arquivo: str) -> Iterator[Dict]:
+    # Cada despesa entregue já vem acompanhada do id_deputado (ID do banco)
+    if caminho_arquivo.endswith(".ndjson"):
+        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+        return
 
+    for despesas_json in carregar_despesas_json(caminho_arquivo):
+        for despesa in despesas_json.get('despesas'):
+            yield {**despesa, "id_deputado": despesas_json.get('id_deputado')}
+
+def _abrir_csv_ceap(caminho_arquivo: str, zip_aberto: Optional[zipfile.ZipFile] = None) -> io.TextIOBase:
+    if zip_aberto is None:
+        return open(caminho_arquivo, "r", encoding="utf-8-sig", newline="")
+    membro = next(nome for nome in zip_aberto.namelist() if nome.lower().endswith(".csv"))
+    return io.TextIOWrapper(zip_aberto.open(membro), encoding="utf-8-sig", newline="")
+
+def _valor_ceap(valor: str) -> float:
+    # Arquivos antigos usam vírgula como separador decimal, às vezes com
+    # ponto de milhar ("1.234,56"); os atuais, ponto decimal ("1234.56")
+    valor = (valor or "0").strip()
+    if "," in valor:
+        valor = valor.replace(".", "").replace(",", ".")
+    return float(valor)
+
+def iterar_despesas_ceap(caminho_arquivo: str, deputados_por_id_api: Dict[str, int]) -> Iterator[Dict]:
+    """
+    Lê o arquivo anual da CEAP (CSV separado por ';' ou o ZIP publicado pela
+    Câmara) uma linha por vez, entregando cada despesa no mesmo formato da API,
+    já com o id_deputado do banco. Linhas de lideranças (sem ideCadastro) e de
+    deputados que não estão no banco são puladas.
+    """
+    zip_aberto = zipfile.ZipFile(caminho_arquivo) if zipfile.is_zipfile(caminho_arquivo) else None
+    ignoradas = 0
+    try:
+        with _abrir_csv_ceap(caminho_arquivo, zip_aberto) as arquivo:
+            for linha in csv.DictReader(arquivo, delimiter=";"):
+                id_deputado = deputados_por_id_api.get((linha.get("ideCadastro") or "").strip())
+                if id_deputado is None:
+                    ignoradas += 1
+                    continue
+
+                METRICAS.contar("registros_baixados")
+                yield {
+                    "ano": int(linha["numAno"]),
+                    "mes": int(linha["numMes"]),
+                    "tipoDespesa": linha.get("txtDescricao"),
+                    "codDocumento": linha.get("ideDocumento") or None,
+                    "tipoDocumento": TIPOS_DOCUMENTO_CEAP.get(linha.get("indTipoDocumento"), linha.get("indTipoDocumento")),
+                    "valorLiquido": _valor_ceap(linha.get("vlrLiquido")),
+                    "urlDocumento": linha.get("urlDocumento") or None,
+                    "nomeFornecedor": linha.get("txtFornecedor"),
+                    "parcela": int(linha.get("numParcela") or 0),
+                    "id_deputado": id_deputado,
+                }
+    finally:
+        if zip_aberto is not None:
+            zip_aberto.close()
+
+    if ignoradas:
+        print(f"AVISO: {ignoradas} linhas do arquivo da CEAP sem deputado cadastrado foram ignoradas.")
+
+def linha_despesa(despesa: Dict, tipos_despesa: Dominio) -> Dict:
+    return {
+        "id_deputado": despesa.get('id_deputado'),
+        "ano": despesa.get('ano'),
+        "mes": despesa.get('mes'),
+        "id_tipo_despesa": tipos_despesa.codigo(despesa.get('tipoDespesa')),
+        "valor_liquido": despesa.get('valorLiquido'),
+        "tipo_documento": despesa.get('tipoDocumento'),
+        "url_documento": despesa.get('urlDocumento'),
+        "nome_fornecedor": despesa.get('nomeFornecedor'),
+        # A API usa 0 quando o recibo não tem documento
+        "cod_documento": int(despesa['codDocumento']) if despesa.get('codDocumento') else None,
+        "parcela": int(despesa.get('parcela') or 0)
+    }
+
+def apagar_despesas_sem_documento(conexao, tabela_carga: str):
+    # Despesas sem codDocumento não têm como ser casadas pela chave natural;
+    # nos meses presentes na carga elas são substituídas pelas do arquivo
+    conexao.execute(text(f"""
+        DELETE FROM despesa d
+        USING (SELECT DISTINCT id_deputado, ano, mes FROM {tabela_carga}) m
+        WHERE d.cod_documento IS NULL
+          AND d.id_deputado = m.id_deputado AND d.ano = m.ano AND d.mes = m.mes
+    """))
+
+def preparar_mescla_despesas(conexao, tabela_carga: str):
+    # A partição de um ano novo é criada antes de qualquer escrita; as chaves
+    # do resumo mensal são lidas antes de a mescla mudar os recibos
+    garantir_particoes(conexao, "despesa", conexao.execute(text(f"SELECT DISTINCT ano FROM {tabela_carga}")).scalars().all())
+    registrar_chaves_afetadas(conexao, tabela_carga)
+    apagar_despesas_sem_documento(conexao, tabela_carga)
+
+def carregar_despesas(despesas: Iterable[Dict], origem: str, tamanho_lote: int = TAMANHO_LOTE, destino: Optional[Engine] = None) -> int:
+    """
+    Grava as despesas (no formato da API, com id_deputado) com upsert pela
+    chave natural (id_deputado, cod_documento, parcela, ano): recibos novos são
+    inseridos, os alterados são atualizados e os iguais não são tocados, então
+    recarregar o mesmo arquivo não duplica nada. O ano está na chave por causa
+    das partições: um recibo que a fonte passe para outro ano vira uma segunda
+    linha, e a do ano antigo continua gravada.
+
+    A marca de cada deputado (último mês carregado, usada pelo download) e o
+    resumo mensal dos meses tocados (despesa_mensal, ver
+    tratamentoDados/despesa_mensal.py) são gravados na mesma transação dos dados.
+    """
+    progresso = Progresso(f"despesas lidas de {origem}")
+    tipos_despesa = Dominio(destino or engine, TipoDespesa, "descricao")
+    with (destino or engine).begin() as conexao:
+        marcas = ler_marcas(conexao, FONTE_DESPESA)
+        novas_marcas: Dict[str, str] = {}
+        lidas = 0
+
+        def linhas_novas() -> Iterator[Dict]:
+            nonlocal lidas
+            for despesa in despesas:
+                chave = str(despesa.get('id_deputado'))
+                periodo = periodo_despesa(despesa.get('ano') or 0, despesa.get('mes') or 0)
+                if periodo > novas_marcas.get(chave, marcas.get(chave) or ""):
+                    novas_marcas[chave] = periodo
+                lidas += 1
+                progresso.avancar()
+                yield linha_despesa(despesa, tipos_despesa)
+
+        gravadas = mesclar_em_lote(
+            conexao, Despesa.__table__, linhas_novas(), CHAVE_NATURAL_DESPESA, tamanho_lote,
+            preparar=preparar_mescla_despesas
+        )
+        # Sem linhas lidas a mescla não roda e não há chaves a recalcular
+        resumidas = recalcular_chaves_afetadas(conexao) if lidas else 0
+        gravar_marcas(conexao, FONTE_DESPESA, novas_marcas)
+
+    print(f"{lidas} despesas lidas de {origem}: {gravadas} novas ou alteradas ({len(novas_marcas)} deputados com marca nova, "
+          f"{resumidas} linhas do resumo mensal recalculadas).")
+    return gravadas
+
+def carregar_faixa_despesas(destino: Engine, caminho_faixa: str, tamanho_lote: int = TAMANHO_LOTE) -> int:
+    # Roda num processo de escrita (ver escrita_paralela): uma faixa de deputados, uma transação
+    return carregar_despesas(iterar_despesas_arquivo(caminho_faixa), caminho_faixa, tamanho_lote, destino)
+
+def carregar_despesas_em_paralelo(despesas: Iterable[Dict], origem: str, tamanho_lote: int = TAMANHO_LOTE,
+                                  processos: int = PROCESSOS_ESCRITA) -> int:
+    """
+    Como `carregar_despesas`, mas dividindo as despesas em faixas de
+    id_deputado gravadas por `processos` processos. Cada deputado fica numa
+    faixa só, com as suas marcas, então o upsert e as marcas saem iguais aos
+    da carga serial. Cada faixa é uma transação: se uma falhar, as outras
+    continuam gravadas e os seus deputados não são baixados de novo.
+    """
+    if processos <= 1:
+        return carregar_despesas(despesas, origem, tamanho_lote)
+
+    anos = set()
+    def anotando_ano(despesas: Iterable[Dict]) -> Iterator[Dict]:
         for despesa in despesas:
+            anos.add(despesa.get('ano'))
+            yield despesa
+
+    with particionar_em_arquivos(anotando_ano(despesas), lambda despesa: despesa.get('id_deputado'), processos * FAIXAS_POR_PROCESSO) as faixas:
+        # Criar uma partição trava a tabela: com as faixas já gravando, os
+        # processos esperariam uns pelos outros
+        with engine.begin() as conexao:
+            garantir_particoes(conexao, "despesa", anos)
+        gravadas = sum(executar_em_faixas(partial(carregar_faixa_despesas, tamanho_lote=tamanho_lote), faixas, engine, processos))
 
-            print(despesa,  "\n\n")
-            # Cria uma instância de Despesa para cada item
-            despesa_combinado = Despesa(
-                id_deputado=despesas_json.get('id_deputado'),
-                ano=despesa.get('ano'),
-                mes=despesa.get('mes'),
-                tipo_despesa=despesa.get('tipoDespesa'),
-                valor_liquido=despesa.get('valorLiquido'),
-                tipo_documento=despesa.get('tipoDocumento'),
-                url_documento=despesa.get('urlDocumento'),
-                nome_fornecedor=despesa.get('nomeFornecedor')
-            )
-    
-            despesas_completas.append(despesa_combinado)
+    print(f"{origem}: {gravadas} despesas novas ou alteradas, gravadas em {len(faixas)} faixas por {processos} processos.")
+    return gravadas
 
+def main(arquivo_despesas: str = ARQUIVO_DESPESAS_NDJSON, tamanho_lote: int = TAMANHO_LOTE, processos: int = PROCESSOS_ESCRITA) -> int:
+    return carregar_despesas_em_paralelo(iterar_despesas_arquivo(arquivo_despesas), arquivo_despesas, tamanho_lote, processos)
+
+def main_ceap(arquivo_ceap: str = ARQUIVO_CEAP, tamanho_lote: int = TAMANHO_LOTE, processos: int = PROCESSOS_ESCRITA) -> int:
+    """
+    Alternativa ao download por deputado: carrega o ano inteiro a partir do
+    arquivo da CEAP em uma única passada, com memória limitada ao lote.
+    """
     with Session(engine) as session:
-        for despesa in despesas_completas:
-            session.add(despesa)
-        
-        session.commit()
+        deputados_por_id_api = {
+            str(id_dados_abertos): id_deputado
+            for id_dados_abertos, id_deputado in session.exec(select(Deputado.id_dados_abertos, Deputado.id)).all()
+        }
+    return carregar_despesas_em_paralelo(iterar_despesas_ceap(arquivo_ceap, deputados_por_id_api), arquivo_ceap, tamanho_lote, processos)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carrega as despesas dos deputados no banco.")
+    parser.add_argument("--ceap", nargs="?", const=ARQUIVO_CEAP, default=None,
+                        help=f"Carrega a partir do arquivo anual da CEAP (CSV ou ZIP; padrão: {ARQUIVO_CEAP}).")
+    parser.add_argument("--processos", type=int, default=PROCESSOS_ESCRITA,
+                        help=f"Processos de escrita no banco (padrão: {PROCESSOS_ESCRITA}, ver tratamentoDados/escrita_paralela.py).")
+    args = parser.parse_args()
+    if args.ceap:
+        main_ceap(args.ceap, processos=args.processos)
+    else:
+        main(processos=args.processos)
 
-main()
 # [
 #   {
 #     "id_deputado": 220593,
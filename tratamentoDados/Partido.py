@@ -1,50 +1,28 @@
-from sqlmodel import SQLModel, Session
+from sqlmodel import Session, select
 from database import engine
-import json
+import os
 import requests
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Optional
+from typing import Iterator, Dict, Optional
 
 from models.partido import Partido
+from tratamentoDados.cliente_http import get
+from tratamentoDados.leitor_json import DIRETORIO_DADOS, ler_registros_json
+from tratamentoDados.metricas import METRICAS
+from tratamentoDados.parser_xml import analisar_xml, extrair_detalhes_partido
 
-app = SQLModel()
+ARQUIVO_PARTIDOS = os.path.join(DIRETORIO_DADOS, 'partidos_57.json')
 
-def carregar_partidos_json(caminho_arquivo: str) -> List[Dict]:
-    try:
-        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-            return dados.get("dados", [])
-    except FileNotFoundError:
-        print(f"Erro: O arquivo '{caminho_arquivo}' não foi encontrado.")
-        return []
-    except json.JSONDecodeError:
-        print(f"Erro: O arquivo '{caminho_arquivo}' não é um JSON válido.")
-        return []
+def carregar_partidos_json(caminho_arquivo: str) -> Iterator[Dict]:
+    return ler_registros_json(caminho_arquivo)
 
 def buscar_detalhes_partido_xml(uri: str) -> Optional[Dict]:
     try:
         headers = {'accept': 'application/xml'}
-        response = requests.get(uri, headers=headers)
+        response = get(uri, headers=headers)
 
         if response.status_code == 200:
-            root = ET.fromstring(response.content) # root armazena todo o xml            
-       
-            dados = root.find('.//dados')
-            uri_logo = dados.findtext('urlLogo')
-            id_legislativo = dados.findtext('status/idLegislatura')
-            situacao = dados.findtext('status/situacao')
-            total_membros = dados.findtext('status/totalMembros')
-            total_posse_legislatura = dados.findtext('status/totalPosse')
-
-            detalhes = {
-                "uri_logo": uri_logo,
-                "id_legislativo": id_legislativo,
-                "situacao": situacao,
-                "total_membros": total_membros,
-                "total_posse_legislatura": total_posse_legislatura
-            }
-
-            return detalhes
+            return analisar_xml(extrair_detalhes_partido, response.content)
         else:
             print(f"  - Falha ao buscar dados da URI {uri}. Status: {response.status_code}")
             return None
@@ -56,16 +34,20 @@ def buscar_detalhes_partido_xml(uri: str) -> Optional[Dict]:
         print(f"  - Falha ao analisar o XML da URI {uri}.")
         return None
 
-def main():
-    arquivo_json = 'data/partidos_57.json'
+def main() -> int:
+    arquivo_json = ARQUIVO_PARTIDOS
     partidos_base = carregar_partidos_json(arquivo_json)
-    
-    if not partidos_base:
-        return 
-    
+
+    # Carga incremental: partidos já gravados não são buscados de novo
+    with Session(engine) as session:
+        ids_existentes = set(session.exec(select(Partido.id_dados_abertos)).all())
+
     partidos_completos = []
 
     for partido in partidos_base:        
+        if partido.get('id') in ids_existentes:
+            continue
+
         uri_detalhes = partido.get('uri')
         if not uri_detalhes:
             print(f"{partido.get('id')} - URI não encontrada para este partido. Pulando.")
@@ -74,6 +56,7 @@ def main():
         detalhes_json = buscar_detalhes_partido_xml(uri_detalhes)
         
         if detalhes_json:
+            METRICAS.contar("registros_baixados")
             partido_combinado = Partido(
                 id_dados_abertos=partido.get('id'),
                 sigla=partido.get("sigla"),
@@ -91,6 +74,9 @@ def main():
             session.add(partido)
         
         session.commit()
-        
-main()
+
+    return len(partidos_completos)
+
+if __name__ == "__main__":
+    main()
             
@@ -0,0 +1,156 @@
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from tratamentoDados.metricas import METRICAS
+
+# Requisições por segundo para a API (média) e quantas podem sair de uma vez
+TAXA_REQUISICOES = float(os.environ.get("CAMARA_TAXA_REQUISICOES", 25))
+RAJADA_REQUISICOES = int(os.environ.get("CAMARA_RAJADA_REQUISICOES", 50))
+# Requisições simultâneas para um mesmo host
+LIMITE_POR_HOST = int(os.environ.get("CAMARA_LIMITE_POR_HOST", 16))
+TENTATIVAS = int(os.environ.get("CAMARA_TENTATIVAS", 5))
+ESPERA_BASE = 0.5
+ESPERA_MAXIMA = 30.0
+TIMEOUT_PADRAO = 30
+ARQUIVO_DEAD_LETTER = os.environ.get("CAMARA_DEAD_LETTER", "data/dead_letter_http.ndjson")
+
+# Respostas que indicam sobrecarga ou falha temporária da API
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+class BaldeDeFichas:
+    """
+    Token bucket: cada requisição consome uma ficha, e as fichas voltam a
+    `taxa` por segundo até o máximo de `capacidade`.
+    """
+
+    def __init__(self, taxa: float, capacidade: int):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.fichas = float(capacidade)
+        self.atualizado = time.monotonic()
+        self._trava = threading.Lock()
+
+    def aguardar(self):
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado) * self.taxa)
+                self.atualizado = agora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = (1 - self.fichas) / self.taxa
+            time.sleep(espera)
+
+class AgendadorHTTP:
+    """
+    Ponto único de saída das requisições das cargas: limita a taxa global
+    (token bucket) e a concorrência por host, e refaz as falhas temporárias
+    (erros de conexão, timeouts e os status de STATUS_RETENTAVEIS) com espera
+    exponencial e jitter, respeitando o Retry-After da API.
+
+    URLs que continuam falhando depois de todas as tentativas vão para o
+    arquivo de dead letter, para serem refeitas depois com
+    `retentar_dead_letter`. O chamador recebe a última resposta (ou exceção),
+    como receberia do `requests.get`.
+    """
+
+    def __init__(self, taxa: float = TAXA_REQUISICOES, rajada: int = RAJADA_REQUISICOES, limite_por_host: int = LIMITE_POR_HOST,
+                 tentativas: int = TENTATIVAS, arquivo_dead_letter: Optional[str] = ARQUIVO_DEAD_LETTER):
+        self.balde = BaldeDeFichas(taxa, rajada)
+        self.limite_por_host = limite_por_host
+        self.tentativas = tentativas
+        self.arquivo_dead_letter = arquivo_dead_letter
+        self.estatisticas = {"requisicoes": 0, "retentativas": 0, "dead_letter": 0}
+        self._semaforos: Dict[str, threading.BoundedSemaphore] = {}
+        self._trava = threading.Lock()
+
+    def _semaforo(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._trava:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.limite_por_host)
+            return self._semaforos[host]
+
+    def _contar(self, evento: str):
+        with self._trava:
+            self.estatisticas[evento] += 1
+        METRICAS.contar(f"{evento}_http")
+
+    def _espera(self, tentativa: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), ESPERA_MAXIMA)
+        # Full jitter: espalha as retentativas das várias threads no tempo
+        return random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** tentativa))
+
+    def _registrar_dead_letter(self, url: str, headers: Dict, motivo: str):
+        self._contar("dead_letter")
+        print(f"  - Desistindo de {url} após {self.tentativas} tentativas: {motivo}")
+        if not self.arquivo_dead_letter:
+            return
+        # Os cabeçalhos condicionais do cache não fazem sentido numa nova tentativa
+        headers = {nome: valor for nome, valor in headers.items() if not nome.lower().startswith("if-")}
+        registro = {"url": url, "headers": headers, "motivo": motivo, "quando": datetime.now().isoformat(timespec="seconds")}
+        with self._trava:
+            acrescentar_dead_letter(self.arquivo_dead_letter, [registro])
+
+    def get(self, sessao: requests.Session, url: str, headers: Optional[Dict] = None, timeout: Optional[float] = None) -> requests.Response:
+        headers = dict(headers or {})
+        semaforo = self._semaforo(url)
+
+        for tentativa in range(self.tentativas):
+            if tentativa:
+                self._contar("retentativas")
+            self.balde.aguardar()
+            self._contar("requisicoes")
+
+            response, erro = None, None
+            with semaforo:
+                try:
+                    with METRICAS.medir("http"):
+                        response = sessao.get(url, headers=headers, timeout=timeout or TIMEOUT_PADRAO)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    erro = e
+
+            if erro is None and response.status_code not in STATUS_RETENTAVEIS:
+                return response
+            if tentativa + 1 < self.tentativas:
+                time.sleep(self._espera(tentativa, response))
+
+        motivo = repr(erro) if erro is not None else f"status {response.status_code}"
+        self._registrar_dead_letter(url, headers, motivo)
+        if erro is not None:
+            raise erro
+        return response
+
+    def relatorio(self) -> str:
+        with self._trava:
+            estatisticas = dict(self.estatisticas)
+        return (
+            f"Agendador HTTP: {estatisticas['requisicoes']} requisições enviadas, "
+            f"{estatisticas['retentativas']} retentativas, {estatisticas['dead_letter']} URLs no dead letter"
+        )
+
+def acrescentar_dead_letter(caminho: str, registros: Iterable[Dict]):
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(caminho, "a", encoding="utf-8") as f:
+        for registro in registros:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+def ler_dead_letter(caminho: str = ARQUIVO_DEAD_LETTER) -> List[Dict]:
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from tratamentoDados.metricas import METRICAS
+
+DIRETORIO_CACHE = os.environ.get("CAMARA_CACHE_DIR", "data/cache_http")
+# Por quanto tempo uma resposta é usada sem consultar a API (segundos)
+TTL_CACHE = int(os.environ.get("CAMARA_CACHE_TTL", 24 * 60 * 60))
+# Tamanho máximo do cache em disco; as entradas usadas há mais tempo saem primeiro
+TAMANHO_MAXIMO_CACHE = int(os.environ.get("CAMARA_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+# Cabeçalhos da resposta guardados junto com o corpo
+_CABECALHOS_GUARDADOS = ("content-type", "etag", "last-modified")
+
+class CacheHTTP:
+    """
+    Cache em disco das respostas GET da API, endereçado pelo hash (sha256) da
+    URL e do cabeçalho Accept, já que a mesma URI devolve XML ou JSON conforme
+    o Accept.
+
+    Cada entrada tem dois arquivos: o corpo (`.bin`) e os metadados (`.json`,
+    com status, cabeçalhos e hora em que foi salva). Dentro do TTL a resposta
+    sai do disco sem acessar a rede; depois dele a API é consultada com
+    `If-None-Match`/`If-Modified-Since` e, se responder 304, o corpo
+    guardado é reaproveitado.
+    """
+
+    def __init__(self, diretorio: str = DIRETORIO_CACHE, ttl: int = TTL_CACHE, tamanho_maximo: int = TAMANHO_MAXIMO_CACHE):
+        self.diretorio = diretorio
+        self.ttl = ttl
+        self.tamanho_maximo = tamanho_maximo
+        self._trava = threading.Lock()
+        self.estatisticas = {"acertos": 0, "revalidados": 0, "faltas": 0, "removidos": 0}
+        os.makedirs(diretorio, exist_ok=True)
+        self._tamanho_atual = sum(os.path.getsize(caminho) for caminho, _ in self._entradas())
+
+    def _chave(self, url: str, accept: str) -> str:
+        return hashlib.sha256(f"{accept}\n{url}".encode("utf-8")).hexdigest()
+
+    def _caminhos(self, chave: str):
+        pasta = os.path.join(self.diretorio, chave[:2])
+        return os.path.join(pasta, f"{chave}.bin"), os.path.join(pasta, f"{chave}.json")
+
+    def _entradas(self):
+        # (caminho do corpo, última utilização) de todas as entradas em disco
+        for pasta, _, arquivos in os.walk(self.diretorio):
+            for nome in arquivos:
+                if nome.endswith(".bin"):
+                    caminho = os.path.join(pasta, nome)
+                    try:
+                        yield caminho, os.path.getmtime(caminho)
+                    except OSError:
+                        continue
+
+    def _tocar(self, caminho_corpo: str):
+        # A data de modificação do corpo marca o último uso (remoção LRU)
+        try:
+            os.utime(caminho_corpo)
+        except OSError:
+            pass
+
+    def _contar(self, evento: str):
+        with self._trava:
+            self.estatisticas[evento] += 1
+        METRICAS.contar(f"cache_{evento}")
+
+    def _ler(self, chave: str) -> Optional[tuple]:
+        caminho_corpo, caminho_meta = self._caminhos(chave)
+        try:
+            with open(caminho_meta, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(caminho_corpo, "rb") as f:
+                corpo = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, corpo
+
+    def _gravar(self, chave: str, url: str, response: requests.Response):
+        caminho_corpo, caminho_meta = self._caminhos(chave)
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "cabecalhos": {nome: response.headers[nome] for nome in _CABECALHOS_GUARDADOS if nome in response.headers},
+            "salvo_em": time.time(),
+        }
+        os.makedirs(os.path.dirname(caminho_corpo), exist_ok=True)
+
+        tamanho_anterior = os.path.getsize(caminho_corpo) if os.path.exists(caminho_corpo) else 0
+        # Escreve em arquivos temporários e troca de uma vez: outra thread
+        # nunca lê uma entrada pela metade
+        for caminho, conteudo, modo in ((caminho_corpo, response.content, "wb"), (caminho_meta, json.dumps(meta), "w")):
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, modo) as f:
+                f.write(conteudo)
+            os.replace(temporario, caminho)
+
+        with self._trava:
+            self._tamanho_atual += len(response.content) - tamanho_anterior
+            excedeu = self._tamanho_atual > self.tamanho_maximo
+        if excedeu:
+            self._remover_excedente()
+
+    def _renovar(self, chave: str, meta: Dict):
+        # Resposta 304: o corpo continua válido por mais um TTL
+        meta["salvo_em"] = time.time()
+        _, caminho_meta = self._caminhos(chave)
+        temporario = f"{caminho_meta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "w") as f:
+            json.dump(meta, f)
+        os.replace(temporario, caminho_meta)
+
+    def _remover_excedente(self):
+        with self._trava:
+            entradas = sorted(self._entradas(), key=lambda entrada: entrada[1])
+            # Remove até sobrar 90% do limite, para não varrer o disco a cada gravação
+            alvo = self.tamanho_maximo * 0.9
+            for caminho_corpo, _ in entradas:
+                if self._tamanho_atual <= alvo:
+                    break
+                try:
+                    tamanho = os.path.getsize(caminho_corpo)
+                    os.remove(caminho_corpo)
+                    os.remove(caminho_corpo[:-len(".bin")] + ".json")
+                except OSError:
+                    continue
+                self._tamanho_atual -= tamanho
+                self.estatisticas["removidos"] += 1
+
+    def _montar_resposta(self, url: str, meta: Dict, corpo: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = "OK"
+        response.url = url
+        response.headers = CaseInsensitiveDict(meta["cabecalhos"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = corpo
+        return response
+
+    def get(self, requisitar: Callable[..., requests.Response], url: str, headers: Optional[Dict] = None, timeout: Optional[float] = None) -> requests.Response:
+        """
+        Devolve a resposta para `url`, do disco quando possível. `requisitar`
+        faz a requisição de fato, com a assinatura de `requests.get`.
+        """
+        headers = dict(headers or {})
+        accept = next((valor for nome, valor in headers.items() if nome.lower() == "accept"), "")
+        chave = self._chave(url, accept)
+        guardada = self._ler(chave)
+
+        if guardada:
+            meta, corpo = guardada
+            caminho_corpo, _ = self._caminhos(chave)
+            if time.time() - meta["salvo_em"] < self.ttl:
+                self._contar("acertos")
+                self._tocar(caminho_corpo)
+                return self._montar_resposta(url, meta, corpo)
+
+            cabecalhos = meta["cabecalhos"]
+            if "etag" in cabecalhos:
+                headers["If-None-Match"] = cabecalhos["etag"]
+            if "last-modified" in cabecalhos:
+                headers["If-Modified-Since"] = cabecalhos["last-modified"]
+
+        response = requisitar(url, headers=headers, timeout=timeout)
+
+        if guardada and response.status_code == 304:
+            self._contar("revalidados")
+            self._renovar(chave, meta)
+            self._tocar(caminho_corpo)
+            return self._montar_resposta(url, meta, corpo)
+
+        self._contar("faltas")
+        # Só respostas completas vão para o cache; erros são sempre refeitos
+        if response.status_code == 200:
+            self._gravar(chave, url, response)
+        return response
+
+    def relatorio(self) -> str:
+        with self._trava:
+            estatisticas = dict(self.estatisticas)
+            tamanho_mb = self._tamanho_atual / (1024 * 1024)
+        total = estatisticas["acertos"] + estatisticas["revalidados"] + estatisticas["faltas"]
+        locais = estatisticas["acertos"] + estatisticas["revalidados"]
+        taxa = 100 * locais / total if total else 0.0
+        return (
+            f"Cache HTTP: {total} requisições, {estatisticas['acertos']} acertos, "
+            f"{estatisticas['revalidados']} revalidados (304), {estatisticas['faltas']} faltas "
+            f"({taxa:.1f}% servidos do disco); {estatisticas['removidos']} entradas removidas, "
+            f"{tamanho_mb:.1f} MB em {self.diretorio}"
+        )
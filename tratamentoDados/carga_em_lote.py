@@ -0,0 +1,167 @@
+import io
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from sqlalchemy import Table, insert, text
+from sqlalchemy.engine import Connection, Engine
+
+from tratamentoDados.metricas import METRICAS
+
+TAMANHO_LOTE = 5000
+
+def em_lotes(linhas: Iterable[Dict], tamanho_lote: int = TAMANHO_LOTE) -> Iterator[List[Dict]]:
+    iterador = iter(linhas)
+    while True:
+        lote = list(islice(iterador, tamanho_lote))
+        if not lote:
+            return
+        yield lote
+
+def _valor_copy(valor: Any) -> str:
+    # No formato CSV do COPY, um campo vazio sem aspas é NULL e um texto
+    # entre aspas é sempre um valor, mesmo que vazio.
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "t" if valor else "f"
+    if isinstance(valor, (int, float)):
+        return str(valor)
+    return '"' + str(valor).replace('"', '""') + '"'
+
+def _suporta_copy(conexao: Connection) -> bool:
+    if conexao.dialect.name != "postgresql":
+        return False
+    cursor_dbapi = conexao.connection.dbapi_connection.cursor()
+    try:
+        return hasattr(cursor_dbapi, "copy_expert") or hasattr(cursor_dbapi, "copy")
+    finally:
+        cursor_dbapi.close()
+
+def _copiar_lote(conexao: Connection, tabela: Union[Table, str], colunas: List[str], lote: List[Dict]):
+    buffer = io.StringIO()
+    for linha in lote:
+        buffer.write(",".join(_valor_copy(linha.get(coluna)) for coluna in colunas))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    nome_tabela = tabela if isinstance(tabela, str) else tabela.name
+    comando = f'COPY {nome_tabela} ({", ".join(colunas)}) FROM STDIN WITH (FORMAT csv)'
+    cursor_dbapi = conexao.connection.dbapi_connection.cursor()
+    try:
+        # O COPY não passa pelos eventos do engine (ver metricas.instrumentar_engine)
+        with METRICAS.medir("escrita_banco"):
+            if hasattr(cursor_dbapi, "copy_expert"):  # psycopg2
+                cursor_dbapi.copy_expert(comando, buffer)
+            else:  # psycopg 3
+                with cursor_dbapi.copy(comando) as copia:
+                    copia.write(buffer.getvalue())
+    finally:
+        cursor_dbapi.close()
+
+def inserir_em_lote(destino: Union[Engine, Connection], tabela: Table, linhas: Iterable[Dict], tamanho_lote: int = TAMANHO_LOTE, usar_copy: bool = True) -> int:
+    """
+    Insere as linhas (dicionários coluna -> valor) em lotes de tamanho fixo,
+    consumindo o iterável aos poucos para que a memória dependa do lote e não
+    do volume total. No PostgreSQL usa COPY; nos demais bancos, ou com
+    `usar_copy=False`, usa um INSERT executemany do SQLAlchemy Core.
+    As colunas são as chaves da primeira linha.
+
+    Com um Engine, tudo roda em uma transação própria; com uma Connection, a
+    carga entra na transação já aberta pelo chamador.
+    """
+    if isinstance(destino, Engine):
+        with destino.begin() as conexao:
+            return inserir_em_lote(conexao, tabela, linhas, tamanho_lote, usar_copy)
+
+    conexao = destino
+    copy_disponivel = usar_copy and _suporta_copy(conexao)
+    colunas = None
+    total = 0
+
+    for lote in em_lotes(linhas, tamanho_lote):
+        if colunas is None:
+            colunas = list(lote[0].keys())
+
+        if copy_disponivel:
+            _copiar_lote(conexao, tabela, colunas, lote)
+        else:
+            conexao.execute(insert(tabela), lote)
+        total += len(lote)
+
+    return total
+
+def mesclar_em_lote(destino: Union[Engine, Connection], tabela: Table, linhas: Iterable[Dict], chaves: Sequence[str],
+                    tamanho_lote: int = TAMANHO_LOTE, preparar: Optional[Callable[[Connection, str], None]] = None) -> int:
+    """
+    Upsert em lote pela chave natural `chaves` (só PostgreSQL). As linhas vão
+    em lotes para uma tabela temporária (COPY quando disponível) e depois são
+    mescladas na tabela com um único INSERT ... ON CONFLICT DO UPDATE, que só
+    reescreve as linhas que de fato mudaram. Se a mesma chave aparecer mais de
+    uma vez, vale a última. Linhas com alguma chave nula não têm como ser
+    casadas e são apenas inseridas.
+
+    `preparar(conexao, tabela_temporaria)` roda antes da mescla, com todas as
+    linhas já na tabela temporária. Devolve quantas linhas foram inseridas ou
+    alteradas.
+    """
+    if isinstance(destino, Engine):
+        with destino.begin() as conexao:
+            return mesclar_em_lote(conexao, tabela, linhas, chaves, tamanho_lote, preparar)
+
+    conexao = destino
+    temporaria = f"{tabela.name}_carga"
+    copy_disponivel = _suporta_copy(conexao)
+    colunas = None
+
+    for lote in em_lotes(linhas, tamanho_lote):
+        if colunas is None:
+            colunas = list(lote[0].keys())
+            # Sem o id e sem defaults: a sequência da tabela não é consumida
+            conexao.execute(text(
+                f"CREATE TEMP TABLE {temporaria} ON COMMIT DROP AS "
+                f"SELECT {', '.join(colunas)} FROM {tabela.name} WITH NO DATA"
+            ))
+            conexao.execute(text(f"ALTER TABLE {temporaria} ADD COLUMN ordem_carga bigserial"))
+
+        if copy_disponivel:
+            _copiar_lote(conexao, temporaria, colunas, lote)
+        else:
+            conexao.execute(text(
+                f"INSERT INTO {temporaria} ({', '.join(colunas)}) VALUES ({', '.join(':' + coluna for coluna in colunas)})"
+            ), lote)
+
+    if colunas is None:
+        return 0
+
+    if preparar is not None:
+        preparar(conexao, temporaria)
+
+    lista_colunas = ", ".join(colunas)
+    lista_chaves = ", ".join(chaves)
+    chaves_preenchidas = " AND ".join(f"{chave} IS NOT NULL" for chave in chaves)
+    atualizaveis = [coluna for coluna in colunas if coluna not in chaves]
+    atualizacao = ", ".join(f"{coluna} = EXCLUDED.{coluna}" for coluna in atualizaveis)
+    atuais = ", ".join(f"{tabela.name}.{coluna}" for coluna in atualizaveis)
+    novos = ", ".join(f"EXCLUDED.{coluna}" for coluna in atualizaveis)
+
+    if atualizaveis:
+        conflito = f"DO UPDATE SET {atualizacao} WHERE ({atuais}) IS DISTINCT FROM ({novos})"
+    else:
+        conflito = "DO NOTHING"
+
+    mescladas = conexao.execute(text(f"""
+        INSERT INTO {tabela.name} ({lista_colunas})
+        SELECT DISTINCT ON ({lista_chaves}) {lista_colunas}
+        FROM {temporaria}
+        WHERE {chaves_preenchidas}
+        ORDER BY {lista_chaves}, ordem_carga DESC
+        ON CONFLICT ({lista_chaves}) {conflito}
+    """)).rowcount
+    sem_chave = conexao.execute(text(f"""
+        INSERT INTO {tabela.name} ({lista_colunas})
+        SELECT {lista_colunas} FROM {temporaria}
+        WHERE NOT ({chaves_preenchidas})
+    """)).rowcount
+    conexao.execute(text(f"DROP TABLE {temporaria}"))
+
+    return mescladas + sem_chave
@@ -0,0 +1,188 @@
+import asyncio
+import atexit
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tratamentoDados.agendador_http import ARQUIVO_DEAD_LETTER, AgendadorHTTP, acrescentar_dead_letter, ler_dead_letter
+from tratamentoDados.cache_http import CacheHTTP
+from tratamentoDados.fixtures_api import DIRETORIO_FIXTURES, AdaptadorReproducao, RepositorioFixtures
+from utils.api_camara import URL_BASE_API
+
+LIMITE_CONCORRENCIA = 16
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+def criar_sessao_http(tamanho_pool: int = LIMITE_CONCORRENCIA) -> requests.Session:
+    # Uma única sessão reaproveita as conexões keep-alive com a API da Câmara.
+    # O pool precisa comportar todas as requisições simultâneas, senão as
+    # conexões excedentes são descartadas a cada resposta.
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamanho_pool)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    if DIRETORIO_FIXTURES:
+        # Execução offline: a API é respondida pelas fixtures gravadas
+        sessao.mount(URL_BASE_API.split("/api/")[0], AdaptadorReproducao(RepositorioFixtures(DIRETORIO_FIXTURES)))
+    return sessao
+
+_trava_padrao = threading.Lock()
+_sessao_padrao: Optional[requests.Session] = None
+_cache_padrao: Optional[CacheHTTP] = None
+_agendador_padrao: Optional[AgendadorHTTP] = None
+
+def obter_cache() -> CacheHTTP:
+    # Um cache por processo, criado no primeiro uso; o relatório sai no fim da execução
+    global _cache_padrao
+    with _trava_padrao:
+        if _cache_padrao is None:
+            _cache_padrao = CacheHTTP()
+            atexit.register(lambda: print(_cache_padrao.relatorio()))
+        return _cache_padrao
+
+def obter_agendador() -> AgendadorHTTP:
+    # Todas as cargas do processo dividem o mesmo limite de taxa
+    global _agendador_padrao
+    with _trava_padrao:
+        if _agendador_padrao is None:
+            _agendador_padrao = AgendadorHTTP()
+            atexit.register(lambda: print(_agendador_padrao.relatorio()))
+        return _agendador_padrao
+
+def _obter_sessao_padrao() -> requests.Session:
+    global _sessao_padrao
+    with _trava_padrao:
+        if _sessao_padrao is None:
+            _sessao_padrao = criar_sessao_http()
+        return _sessao_padrao
+
+def get(url: str, headers: Optional[Dict] = None, timeout: Optional[float] = None, sessao: Optional[requests.Session] = None,
+        agendador: Optional[AgendadorHTTP] = None) -> requests.Response:
+    """
+    Equivalente a `requests.get` para as chamadas à API da Câmara, passando
+    pelo cache em disco e, quando a resposta não está no cache, pelo
+    agendador (limite de taxa, retentativas e dead letter). Sem `sessao`, usa
+    uma sessão keep-alive compartilhada; sem `agendador`, o do processo.
+
+    Com as fixtures (CAMARA_FIXTURES_DIR), o cache é ignorado: as respostas
+    vêm sempre das fixtures, com a latência simulada.
+    """
+    sessao = sessao or _obter_sessao_padrao()
+    agendador = agendador or obter_agendador()
+
+    def requisitar(url: str, headers: Dict, timeout: Optional[float]) -> requests.Response:
+        return agendador.get(sessao, url, headers=headers, timeout=timeout)
+
+    if DIRETORIO_FIXTURES:
+        return requisitar(url, headers=headers, timeout=timeout)
+    return obter_cache().get(requisitar, url, headers=headers, timeout=timeout)
+
+def obter_json(sessao: requests.Session, url: str, timeout: int = 30) -> Dict:
+    response = get(url, headers={"accept": "application/json"}, timeout=timeout, sessao=sessao)
+    response.raise_for_status()
+    return response.json()
+
+def buscar_json(sessao: requests.Session, url: str, timeout: int = 30) -> Optional[Dict]:
+    try:
+        return obter_json(sessao, url, timeout)
+    except requests.exceptions.RequestException as e:
+        print(f"  - Erro ao acessar {url}: {e}")
+        return None
+    except ValueError:
+        print(f"  - Resposta de {url} não é um JSON válido.")
+        return None
+
+def proxima_pagina(corpo: Dict) -> Optional[str]:
+    for link in corpo.get("links", []):
+        if link.get("rel") == "next":
+            return link.get("href")
+    return None
+
+def iterar_paginas(sessao: requests.Session, url: str, timeout: int = 30) -> Iterator[List[Dict]]:
+    """
+    Percorre uma listagem paginada da API seguindo os links `next`, entregando
+    o campo `dados` de uma página por vez. Falhas no meio da listagem são
+    propagadas para que o chamador não trate uma lista truncada como completa.
+    """
+    while url:
+        corpo = obter_json(sessao, url, timeout)
+        yield corpo.get("dados", [])
+        url = proxima_pagina(corpo)
+
+async def mapear_concorrente(funcao: Callable[[T], R], itens: Iterable[T], limite: int = LIMITE_CONCORRENCIA) -> List[R]:
+    """
+    Executa `funcao` para cada item com no máximo `limite` chamadas simultâneas,
+    preservando a ordem dos itens no resultado.
+    """
+    loop = asyncio.get_running_loop()
+    semaforo = asyncio.Semaphore(limite)
+
+    # Executor próprio: o padrão do asyncio limita as threads ao número de CPUs
+    with ThreadPoolExecutor(max_workers=limite) as executor:
+        async def executar(item: T) -> R:
+            async with semaforo:
+                # Leva o contexto (a etapa das métricas) para a thread
+                contexto = contextvars.copy_context()
+                return await loop.run_in_executor(executor, contexto.run, funcao, item)
+
+        return await asyncio.gather(*(executar(item) for item in itens))
+
+def executar_concorrente(funcao: Callable[[T], R], itens: Iterable[T], limite: int = LIMITE_CONCORRENCIA) -> List[R]:
+    return asyncio.run(mapear_concorrente(funcao, itens, limite))
+
+def retentar_dead_letter(caminho: str = ARQUIVO_DEAD_LETTER, limite: int = LIMITE_CONCORRENCIA) -> int:
+    """
+    Refaz as URLs do dead letter. As que responderem ficam no cache em disco,
+    então a próxima execução das cargas as lê de lá; as que falharem de novo
+    voltam para `caminho` no fim. Devolve quantas foram recuperadas.
+
+    O arquivo é renomeado para `<caminho>.processando` antes das tentativas:
+    uma execução interrompida deixa as URLs lá, e a próxima as refaz junto
+    com as que as cargas tiverem gravado em `caminho` nesse meio tempo.
+    """
+    em_processamento = f"{caminho}.processando"
+    if os.path.exists(caminho):
+        if os.path.exists(em_processamento):
+            acrescentar_dead_letter(em_processamento, ler_dead_letter(caminho))
+            os.remove(caminho)
+        else:
+            os.replace(caminho, em_processamento)
+
+    registros = {}
+    for registro in ler_dead_letter(em_processamento):
+        accept = registro.get("headers", {}).get("accept", "")
+        registros[(registro["url"], accept)] = registro
+    if not registros:
+        if os.path.exists(em_processamento):
+            os.remove(em_processamento)
+        print("Dead letter vazio.")
+        return 0
+
+    # Agendador sem arquivo de dead letter: as falhas são gravadas aqui, em `caminho`
+    agendador = AgendadorHTTP(arquivo_dead_letter=None)
+
+    def refazer(registro: Dict) -> bool:
+        try:
+            return get(registro["url"], headers=registro.get("headers"), agendador=agendador).status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    pendentes = list(registros.values())
+    resultados = executar_concorrente(refazer, pendentes, limite)
+    falhas = [registro for registro, recuperada in zip(pendentes, resultados) if not recuperada]
+    if falhas:
+        acrescentar_dead_letter(caminho, falhas)
+    os.remove(em_processamento)
+
+    recuperadas = len(pendentes) - len(falhas)
+    print(f"{recuperadas} de {len(registros)} URLs do dead letter recuperadas.")
+    return recuperadas
+
+if __name__ == "__main__":
+    retentar_dead_letter()
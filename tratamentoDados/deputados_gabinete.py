@@ -1,67 +1,30 @@
-from sqlmodel import SQLModel, Session, select
+from sqlmodel import Session, select
 from database import engine
-import json
+import os
 import requests
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Optional
+from typing import Iterator, Dict, Optional, Tuple
 
 from models.deputado import Deputado
 from models.gabinete import Gabinete
 from models.partido import Partido
+from tratamentoDados.cliente_http import LIMITE_CONCORRENCIA, executar_concorrente, get
+from tratamentoDados.leitor_json import DIRETORIO_DADOS, ler_registros_json
+from tratamentoDados.metricas import METRICAS, Progresso
+from tratamentoDados.parser_xml import analisar_xml, extrair_detalhes_deputado
 
-app = SQLModel()
+ARQUIVO_DEPUTADOS = os.path.join(DIRETORIO_DADOS, 'deputados_57.json')
 
-def carregar_deputados_json(caminho_arquivo: str) -> List[Dict]:
-    try:
-        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-            return dados.get("dados", [])
-    except FileNotFoundError:
-        print(f"Erro: O arquivo '{caminho_arquivo}' não foi encontrado.")
-        return []
-    except json.JSONDecodeError:
-        print(f"Erro: O arquivo '{caminho_arquivo}' não é um JSON válido.")
-        return []
+def carregar_deputados_json(caminho_arquivo: str) -> Iterator[Dict]:
+    return ler_registros_json(caminho_arquivo)
 
 def buscar_detalhes_deputado_xml(uri: str) -> Optional[Dict]:
     try:
         headers = {'accept': 'application/xml'}
-        response = requests.get(uri, headers=headers)
+        response = get(uri, headers=headers)
 
         if response.status_code == 200:
-            root = ET.fromstring(response.content)        
-       
-            # Dados do xml do deputado
-            dados = root.find('.//dados')
-            nome_civil = dados.findtext('nomeCivil')
-            nome_eleitoral = dados.findtext('ultimoStatus/nomeEleitoral')
-            sexo = dados.findtext('sexo')
-            sigla_partido = dados.findtext('ultimoStatus/siglaPartido')
-
-            # Dados do gabinete do deputado
-            gab_nome = dados.findtext('ultimoStatus/gabinete/nome')
-            gab_predio = dados.findtext('ultimoStatus/gabinete/predio')
-            gab_sala = dados.findtext('ultimoStatus/gabinete/sala')
-            gab_andar = dados.findtext('ultimoStatus/gabinete/andar')
-            gab_telefone = dados.findtext('ultimoStatus/gabinete/telefone')
-            gab_email = dados.findtext('ultimoStatus/gabinete/email')
-            
-            detalhes = {
-                "nome_civil": nome_civil,
-                "nome_eleitoral": nome_eleitoral,
-                "sexo": sexo,
-                "sigla_partido": sigla_partido,
-                "gabinete": {
-                    "nome": gab_nome,
-                    "predio": gab_predio,
-                    "sala": gab_sala,
-                    "andar": gab_andar,
-                    "telefone": gab_telefone,
-                    "email": gab_email
-                }
-            }
-
-            return detalhes
+            return analisar_xml(extrair_detalhes_deputado, response.content)
         else:
             print(f"  - Falha ao buscar dados da URI {uri}. Status: {response.status_code}")
             return None
@@ -73,64 +36,94 @@ def buscar_detalhes_deputado_xml(uri: str) -> Optional[Dict]:
         print(f"  - Falha ao analisar o XML da URI {uri}.")
         return None
 
-def main():
-    arquivo_json = 'data/deputados_57.json'
+def montar_deputado_gabinete(deputado: Dict, detalhes_json: Dict, id_partido: Optional[int]) -> Tuple[Deputado, Gabinete]:
+    """
+    Junta o registro resumido do deputado (da listagem da API ou do campo
+    `deputado_` de um voto, que têm o mesmo formato) com os detalhes do XML,
+    que completam UF, legislatura e foto quando o resumo não os traz. O
+    gabinete já sai ligado ao deputado.
+    """
+    deputado_combinado = Deputado(
+        id_dados_abertos=deputado.get('id'),
+        nome_civil=detalhes_json.get('nome_civil'),
+        nome_eleitoral=detalhes_json.get('nome_eleitoral'),
+        sigla_partido=detalhes_json.get("sigla_partido"),
+        id_partido=id_partido,
+        sigla_uf=deputado.get('siglaUf') or detalhes_json.get('sigla_uf'),
+        sexo=detalhes_json.get('sexo'),
+        id_legislativo=deputado.get('idLegislatura') or detalhes_json.get('id_legislatura'),
+        url_foto=deputado.get('urlFoto') or detalhes_json.get('url_foto')
+    )
+
+    gabinete = Gabinete(
+        nome = detalhes_json.get('gabinete', {}).get('nome'),
+        predio = detalhes_json.get('gabinete', {}).get('predio'),
+        sala = detalhes_json.get('gabinete', {}).get('sala'),
+        andar = detalhes_json.get('gabinete', {}).get('andar'),
+        telefone = detalhes_json.get('gabinete', {}).get('telefone'),
+        email = detalhes_json.get('gabinete', {}).get('email'),
+        deputado=deputado_combinado
+    )
+    return deputado_combinado, gabinete
+
+def main(limite_concorrencia: int = LIMITE_CONCORRENCIA) -> int:
+    """
+    Carrega os deputados da listagem que ainda não estão no banco. Os IDs já
+    gravados e o mapa sigla -> Partido.id são lidos uma única vez, os XMLs de
+    detalhes são buscados em paralelo e deputados e gabinetes vão para o
+    banco num único lote.
+    """
+    arquivo_json = ARQUIVO_DEPUTADOS
     deputados_base = carregar_deputados_json(arquivo_json)
-    
-    if not deputados_base:
-        return 
 
     with Session(engine) as session:
-        for deputado in deputados_base:
-            #Print para indicar o progresso
-            print("Deputado: ", deputado.get('nome'), " id: ", deputado.get("id"))   
-
-            dep_existente_stmt = select(Deputado).where(Deputado.id_dados_abertos == deputado.get('id'))
-            dep_existente = session.exec(dep_existente_stmt).first()
-            if dep_existente:
-                print(f"Deputado {deputado.get('id')} já existe no banco. Pulando inserção.")
-                continue
-  
-            uri_detalhes = deputado.get('uri')
-            if not uri_detalhes:
-                print(f"{deputado.get(id)} - URI não encontrada para este deputado. Pulando.")
-                continue
-            
-            detalhes_json = buscar_detalhes_deputado_xml(uri_detalhes)
-            
-            if detalhes_json:
-               
-                partido_stmt = select(Partido).where(Partido.sigla == detalhes_json.get("sigla_partido"))
-                partido_no_db = session.exec(partido_stmt).first()
-
-                deputado_combinado = Deputado(
-                    id_dados_abertos=deputado.get('id'),
-                    nome_civil=detalhes_json.get('nome_civil'),
-                    nome_eleitoral=detalhes_json.get('nome_eleitoral'),
-                    sigla_partido=detalhes_json.get("sigla_partido"),
-                    id_partido= partido_no_db.id,
-                    sigla_uf=deputado.get('siglaUf'),
-                    sexo=detalhes_json.get('sexo'),
-                    id_legislativo=deputado.get('idLegislatura'),
-                    url_foto=deputado.get('urlFoto')
-                )
-
-                session.add(deputado_combinado)
-
-                gabinete = Gabinete(
-                    nome = detalhes_json.get('gabinete', {}).get('nome'),
-                    predio = detalhes_json.get('gabinete', {}).get('predio'),
-                    sala = detalhes_json.get('gabinete', {}).get('sala'),
-                    andar = detalhes_json.get('gabinete', {}).get('andar'),
-                    telefone = detalhes_json.get('gabinete', {}).get('telefone'),
-                    email = detalhes_json.get('gabinete', {}).get('email'),
-                    deputado=deputado_combinado
-                )
-                
-                session.add(gabinete)
+        ids_existentes = set(session.exec(select(Deputado.id_dados_abertos)).all())
+        id_partido_por_sigla = dict(session.exec(select(Partido.sigla, Partido.id)).all())
+
+    pendentes = []
+    for deputado in deputados_base:
+        if deputado.get('id') in ids_existentes:
+            continue
+        if not deputado.get('uri'):
+            print(f"{deputado.get('id')} - URI não encontrada para este deputado. Pulando.")
+            continue
+        # A listagem repete deputados; vale a primeira ocorrência
+        ids_existentes.add(deputado.get('id'))
+        pendentes.append(deputado)
+
+    progresso = Progresso("deputados", len(pendentes))
+
+    def buscar(deputado: Dict) -> Optional[Dict]:
+        detalhes_json = buscar_detalhes_deputado_xml(deputado['uri'])
+        progresso.avancar()
+        return detalhes_json
+
+    detalhes = executar_concorrente(buscar, pendentes, limite_concorrencia)
+    progresso.concluir()
+
+    novos = []
+    sem_partido = []
+    for deputado, detalhes_json in zip(pendentes, detalhes):
+        if not detalhes_json:
+            continue
+        METRICAS.contar("registros_baixados")
+        # Partido fora da tabela (ex.: sigla nova) não impede a carga do deputado
+        id_partido = id_partido_por_sigla.get(detalhes_json.get("sigla_partido"))
+        if id_partido is None:
+            sem_partido.append(deputado.get('id'))
+        novos.extend(montar_deputado_gabinete(deputado, detalhes_json, id_partido))
 
+    with Session(engine) as session:
+        # O ORM agrupa os INSERTs de cada tabela em lotes (deputados, depois gabinetes)
+        session.add_all(novos)
         session.commit()
-        print("Commit realizado com sucesso!")
+
+    inseridos = len(novos) // 2
+    if sem_partido:
+        print(f"AVISO: {len(sem_partido)} deputados com partido fora da tabela de partidos (id_partido vazio): {sem_partido}")
+    print(f"Commit realizado com sucesso! {inseridos} deputados novos.")
+
+    return inseridos
 
         
 
@@ -212,4 +205,5 @@ def main():
 # </xml>
 
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
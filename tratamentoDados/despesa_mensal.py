@@ -0,0 +1,97 @@
+"""
+Resumo mensal das despesas (tabela despesa_mensal): soma, quantidade, menor e
+maior valor por (id_deputado, ano, mes, id_tipo_despesa).
+
+A carga de despesas (Despesa.carregar_despesas) mantém o resumo na mesma
+transação dos recibos: antes da mescla registra as chaves que a carga pode
+mudar e, depois dela, recalcula só essas chaves a partir de despesa.
+
+Uso (na raiz do projeto), para recalcular o resumo inteiro:
+    python -m tratamentoDados.despesa_mensal
+"""
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from database import engine
+
+# Tabela temporária com as chaves a recalcular na transação da carga
+TABELA_AFETADAS = "despesa_mensal_afetada"
+
+CHAVE_RESUMO = "id_deputado, ano, mes, id_tipo_despesa"
+
+_AGREGACAO = f"""
+    SELECT {CHAVE_RESUMO},
+           sum(valor_liquido), count(*), min(valor_liquido), max(valor_liquido)
+    FROM despesa
+"""
+
+def registrar_chaves_afetadas(conexao: Connection, tabela_carga: str):
+    """
+    Guarda as chaves do resumo que a mescla de `tabela_carga` em despesa pode
+    alterar: as dos recibos carregados, as que os recibos já gravados tinham
+    antes (o upsert pode mudar mês ou tipo) e as dos recibos sem documento dos
+    meses carregados, que são apagados (ver Despesa.apagar_despesas_sem_documento).
+    Deve rodar antes da mescla.
+
+    Os recibos já gravados são procurados pela chave natural inteira, com o
+    ano (ver Despesa.CHAVE_NATURAL_DESPESA): um recibo que mudou de ano não é
+    encontrado, entra como linha nova, e as chaves do ano antigo não mudam.
+    """
+    conexao.execute(text(f"""
+        CREATE TEMP TABLE {TABELA_AFETADAS} ON COMMIT DROP AS
+        SELECT {CHAVE_RESUMO} FROM {tabela_carga}
+        UNION
+        SELECT d.id_deputado, d.ano, d.mes, d.id_tipo_despesa
+        FROM despesa d
+        JOIN {tabela_carga} c
+          ON c.id_deputado = d.id_deputado AND c.cod_documento = d.cod_documento AND c.parcela = d.parcela AND c.ano = d.ano
+        UNION
+        SELECT d.id_deputado, d.ano, d.mes, d.id_tipo_despesa
+        FROM despesa d
+        JOIN (SELECT DISTINCT id_deputado, ano, mes FROM {tabela_carga}) m
+          ON m.id_deputado = d.id_deputado AND m.ano = d.ano AND m.mes = d.mes
+        WHERE d.cod_documento IS NULL
+    """))
+
+def recalcular_chaves_afetadas(conexao: Connection) -> int:
+    # Chaves que ficaram sem recibos somem do resumo; as demais são recalculadas
+    conexao.execute(text(f"""
+        DELETE FROM despesa_mensal r
+        USING {TABELA_AFETADAS} a
+        WHERE r.id_deputado = a.id_deputado AND r.ano = a.ano AND r.mes = a.mes AND r.id_tipo_despesa = a.id_tipo_despesa
+    """))
+    recalculadas = conexao.execute(text(f"""
+        INSERT INTO despesa_mensal ({CHAVE_RESUMO}, total, quantidade, valor_minimo, valor_maximo)
+        {_AGREGACAO}
+        WHERE ({CHAVE_RESUMO}) IN (SELECT {CHAVE_RESUMO} FROM {TABELA_AFETADAS})
+        GROUP BY {CHAVE_RESUMO}
+    """)).rowcount
+    conexao.execute(text(f"DROP TABLE {TABELA_AFETADAS}"))
+    return recalculadas
+
+def recalcular_ano(conexao: Connection, ano: int) -> int:
+    # Depois de anexar ou desanexar a partição de um ano (ver particoes.py)
+    conexao.execute(text("DELETE FROM despesa_mensal WHERE ano = :ano"), {"ano": ano})
+    return conexao.execute(text(f"""
+        INSERT INTO despesa_mensal ({CHAVE_RESUMO}, total, quantidade, valor_minimo, valor_maximo)
+        {_AGREGACAO}
+        WHERE ano = :ano
+        GROUP BY {CHAVE_RESUMO}
+    """), {"ano": ano}).rowcount
+
+def reconstruir_despesa_mensal(engine: Engine):
+    # Recalcula o resumo inteiro; só é preciso se despesa for alterada fora das cargas
+    inicio = time.perf_counter()
+    with engine.begin() as conexao:
+        conexao.execute(text("DELETE FROM despesa_mensal"))
+        linhas = conexao.execute(text(f"""
+            INSERT INTO despesa_mensal ({CHAVE_RESUMO}, total, quantidade, valor_minimo, valor_maximo)
+            {_AGREGACAO}
+            GROUP BY {CHAVE_RESUMO}
+        """)).rowcount
+    print(f"Resumo mensal de despesas reconstruído em {time.perf_counter() - inicio:.1f}s ({linhas} linhas).")
+
+if __name__ == "__main__":
+    reconstruir_despesa_mensal(engine)
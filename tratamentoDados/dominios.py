@@ -0,0 +1,44 @@
+"""
+Códigos das tabelas de domínio (models/dominios.py) para as cargas: tipo de
+voto, sigla do partido e tipo de despesa vão para as tabelas grandes como
+smallint, e o texto fica uma vez só na tabela de domínio.
+
+Um texto novo ganha o seu código numa transação própria e curta, fora da
+transação da carga: faixas de escrita paralelas (ver escrita_paralela) que
+encontrem o mesmo texto novo não esperam uma pela outra até o commit, nem
+entram em deadlock. Se a carga falhar depois, o código só fica sem uso.
+"""
+from typing import Dict, Optional, Type
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel
+
+class Dominio:
+    """
+    Texto -> código de uma tabela de domínio, lido uma vez e completado
+    conforme a carga encontra textos novos.
+    """
+
+    def __init__(self, engine: Engine, modelo: Type[SQLModel], coluna: str):
+        self.engine = engine
+        self.tabela = modelo.__table__
+        self.coluna = self.tabela.c[coluna]
+        with engine.connect() as conexao:
+            self.codigos: Dict[str, int] = dict(conexao.execute(select(self.coluna, self.tabela.c.id)).all())
+
+    def codigo(self, texto: Optional[str]) -> Optional[int]:
+        if texto is None:
+            return None
+        if texto not in self.codigos:
+            self.codigos[texto] = self._gravar(texto)
+        return self.codigos[texto]
+
+    def _gravar(self, texto: str) -> int:
+        # Só textos que não estavam no mapa chegam aqui: cada tentativa gasta
+        # um valor da sequência, e o código é smallint
+        with self.engine.begin() as conexao:
+            # Outro processo pode ter gravado o mesmo texto depois da leitura
+            conexao.execute(insert(self.tabela).values({self.coluna.name: texto}).on_conflict_do_nothing(index_elements=[self.coluna.name]))
+            return conexao.execute(select(self.tabela.c.id).where(self.coluna == texto)).scalar_one()
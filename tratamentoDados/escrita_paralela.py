@@ -0,0 +1,139 @@
+"""
+Escrita paralela das cargas grandes (despesas e votos). O trabalho é dividido
+em faixas contíguas de uma chave (id_deputado nas despesas, id da sessão nos
+votos) e cada faixa é gravada por um processo de escrita, com a sua própria
+conexão e uma transação por faixa. Como duas faixas nunca têm a mesma chave,
+o resultado final é o mesmo de uma carga serial.
+
+O número de processos vem de CAMARA_PROCESSOS_ESCRITA. Com 1 (o padrão) tudo
+roda no próprio processo, pelo caminho serial de sempre. Passar do número de
+núcleos do banco não adianta: as escritas passam a disputar CPU e disco.
+"""
+import json
+import multiprocessing
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from tratamentoDados import cliente_http, parser_xml
+from tratamentoDados.agendador_http import RAJADA_REQUISICOES, TAXA_REQUISICOES, AgendadorHTTP
+from tratamentoDados.metricas import METRICAS, em_etapa, etapa_atual, instrumentar_engine
+from tratamentoDados.staging import definir_search_path_staging, escrevendo_no_staging_ativo
+
+PROCESSOS_ESCRITA = int(os.environ.get("CAMARA_PROCESSOS_ESCRITA", 1))
+# Faixas menores que "uma por processo" equilibram melhor o trabalho entre os
+# processos e deixam cada transação mais curta
+FAIXAS_POR_PROCESSO = 4
+
+K = TypeVar("K", bound=Hashable)
+P = TypeVar("P")
+R = TypeVar("R")
+
+# Engine de cada processo de escrita, criado por _iniciar_processo
+_engine_processo: Optional[Engine] = None
+
+def dividir_em_faixas(pesos: Dict[K, int], quantidade: int) -> List[List[K]]:
+    """
+    Divide as chaves, em ordem crescente, em até `quantidade` faixas contíguas
+    de peso parecido (o peso de uma chave é quantas linhas ela tem). Uma chave
+    nunca fica em duas faixas. Chaves nulas vão para a primeira.
+    """
+    total = sum(pesos.values())
+    faixas: List[List[K]] = []
+    atual: List[K] = []
+    acumulado = 0
+    for chave in sorted(pesos, key=lambda chave: (chave is not None, chave)):
+        atual.append(chave)
+        acumulado += pesos[chave]
+        # Fecha a faixa quando o acumulado alcança a sua fração do total
+        if len(faixas) < quantidade - 1 and acumulado >= total * (len(faixas) + 1) / quantidade:
+            faixas.append(atual)
+            atual = []
+    if atual:
+        faixas.append(atual)
+    return faixas
+
+@contextmanager
+def particionar_em_arquivos(linhas: Iterable[Dict], chave: Callable[[Dict], Hashable], quantidade: int) -> Iterator[List[str]]:
+    """
+    Grava as linhas em até `quantidade` arquivos NDJSON temporários, um por
+    faixa de `chave`, mantendo dentro de cada faixa a ordem original (o upsert
+    em lote fica com a última ocorrência de cada chave). As linhas passam
+    antes por um arquivo único, para conhecer a distribuição das chaves sem
+    ficarem em memória. Os arquivos são apagados na saída.
+    """
+    with tempfile.TemporaryDirectory(prefix="camara_faixas_") as pasta:
+        caminho_todas = os.path.join(pasta, "todas.ndjson")
+        pesos: Counter = Counter()
+        with open(caminho_todas, "w", encoding="utf-8") as todas:
+            for linha in linhas:
+                pesos[chave(linha)] += 1
+                todas.write(json.dumps(linha, ensure_ascii=False) + "\n")
+
+        faixas = dividir_em_faixas(pesos, quantidade)
+        faixa_da_chave = {c: indice for indice, faixa in enumerate(faixas) for c in faixa}
+        caminhos = [os.path.join(pasta, f"faixa_{indice:03d}.ndjson") for indice in range(len(faixas))]
+        arquivos = [open(caminho, "w", encoding="utf-8") for caminho in caminhos]
+        try:
+            with open(caminho_todas, "r", encoding="utf-8") as todas:
+                for texto in todas:
+                    arquivos[faixa_da_chave[chave(json.loads(texto))]].write(texto)
+        finally:
+            for arquivo in arquivos:
+                arquivo.close()
+        os.remove(caminho_todas)
+
+        yield caminhos
+
+def _iniciar_processo(url: str, no_staging: bool, processos: int):
+    global _engine_processo
+    # Os processos de escrita já ocupam os núcleos; o parse roda neles mesmos
+    parser_xml.PROCESSOS_PARSER = 1
+    # O limite de taxa da API vale para a carga toda, então é dividido entre os processos
+    cliente_http._agendador_padrao = AgendadorHTTP(
+        taxa=TAXA_REQUISICOES / processos, rajada=max(1, RAJADA_REQUISICOES // processos)
+    )
+
+    _engine_processo = create_engine(url)
+    instrumentar_engine(_engine_processo)
+    if no_staging:
+        event.listen(_engine_processo, "connect", definir_search_path_staging)
+
+def _executar_faixa(funcao: Callable[[Engine, P], R], faixa: P, etapa: str):
+    # As métricas de cada faixa voltam ao processo principal junto com o resultado
+    METRICAS.limpar()
+    with em_etapa(etapa):
+        resultado = funcao(_engine_processo, faixa)
+    return resultado, METRICAS.exportar()
+
+def executar_em_faixas(funcao: Callable[[Engine, P], R], faixas: Sequence[P], engine: Engine, processos: int = PROCESSOS_ESCRITA) -> List[R]:
+    """
+    Executa `funcao(engine, faixa)` para cada faixa em até `processos`
+    processos, cada um com um engine próprio para o mesmo banco (e, se a
+    carga estiver escrevendo no staging, o mesmo search_path). `funcao`
+    precisa ser uma função de módulo, para chegar aos processos.
+
+    Devolve os resultados na ordem das faixas; as métricas dos processos
+    entram na etapa atual. Com um processo, roda tudo aqui, com `engine`.
+    """
+    if processos <= 1 or len(faixas) <= 1:
+        return [funcao(engine, faixa) for faixa in faixas]
+
+    url = engine.url.render_as_string(hide_password=False)
+    # spawn: um fork copiaria as conexões abertas do pool do processo principal
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(processos, len(faixas)), mp_context=contexto, initializer=_iniciar_processo,
+                             initargs=(url, escrevendo_no_staging_ativo(engine), processos)) as pool:
+        futuros = [pool.submit(_executar_faixa, funcao, faixa, etapa_atual()) for faixa in faixas]
+        resultados = []
+        for futuro in futuros:
+            resultado, metricas = futuro.result()
+            METRICAS.incorporar(metricas)
+            resultados.append(resultado)
+    return resultados
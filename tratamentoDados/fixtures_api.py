@@ -0,0 +1,281 @@
+"""
+Fixtures da API da Câmara para rodar as cargas sem rede: respostas gravadas
+por tratamentoDados/gravador_api.py e servidas de volta por um transport
+adapter do `requests`, com latência configurável.
+
+Uma pasta de fixtures tem:
+- `dados/`: as listagens lidas pelas cargas (deputados_57.json,
+  partidos_57.json, votacoes_2024.json);
+- `respostas/`: uma resposta por URL e Accept, no mesmo formato do cache HTTP
+  (corpo em `.bin` e status e cabeçalhos em `.json`).
+
+Para rodar o pipeline sobre elas (ex.: 10x o volume real, gerado com
+`escalar`):
+    python -m tratamentoDados.fixtures_api escalar data/fixtures_api data/fixtures_api_10x --fator 10
+    CAMARA_FIXTURES_DIR=data/fixtures_api_10x CAMARA_DADOS_DIR=data/fixtures_api_10x/dados \\
+    CAMARA_TAXA_REQUISICOES=1000 python -m tratamentoDados.pipeline
+
+Com as fixtures, o cache HTTP em disco não é usado: toda resposta paga a
+latência configurada, em qualquer execução. Com o limite de taxa no valor
+padrão, a medição reflete o agendador, e não a carga.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import time
+from http import HTTPStatus
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from tratamentoDados.cache_http import _CABECALHOS_GUARDADOS
+
+# Com a pasta definida, as sessões HTTP das cargas leem as respostas dela
+DIRETORIO_FIXTURES = os.environ.get("CAMARA_FIXTURES_DIR")
+# Latência simulada de cada resposta: base + variação aleatória (ms)
+LATENCIA_FIXTURES_MS = float(os.environ.get("CAMARA_FIXTURES_LATENCIA_MS", 100))
+VARIACAO_FIXTURES_MS = float(os.environ.get("CAMARA_FIXTURES_VARIACAO_MS", 50))
+
+# Distância entre os IDs de cada cópia sintética. Os IDs reais de deputados
+# têm seis dígitos e os sufixos das votações, no máximo cinco
+DESLOCAMENTO_ID_DEPUTADO = 10_000_000
+DESLOCAMENTO_ID_VOTACAO = 100_000
+
+def normalizar_url(url: str) -> str:
+    # A ordem dos parâmetros não muda a resposta da API
+    partes = urlsplit(url)
+    consulta = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+    return urlunsplit((partes.scheme, partes.netloc, partes.path, consulta, ""))
+
+class RepositorioFixtures:
+    """Respostas gravadas, endereçadas pelo hash da URL (normalizada) e do Accept."""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self.pasta_respostas = os.path.join(diretorio, "respostas")
+        self.pasta_dados = os.path.join(diretorio, "dados")
+
+    def _caminhos(self, url: str, accept: str) -> Tuple[str, str]:
+        chave = hashlib.sha256(f"{accept.lower()}\n{normalizar_url(url)}".encode("utf-8")).hexdigest()
+        pasta = os.path.join(self.pasta_respostas, chave[:2])
+        return os.path.join(pasta, f"{chave}.bin"), os.path.join(pasta, f"{chave}.json")
+
+    def salvar(self, url: str, accept: str, status: int, cabecalhos: Dict[str, str], corpo: bytes):
+        caminho_corpo, caminho_meta = self._caminhos(url, accept)
+        os.makedirs(os.path.dirname(caminho_corpo), exist_ok=True)
+        meta = {
+            "url": url,
+            "accept": accept,
+            "status": status,
+            "headers": {nome: valor for nome, valor in cabecalhos.items() if nome.lower() in _CABECALHOS_GUARDADOS},
+        }
+        with open(caminho_corpo, "wb") as f:
+            f.write(corpo)
+        with open(caminho_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def salvar_resposta(self, url: str, accept: str, response: requests.Response):
+        self.salvar(url, accept, response.status_code, dict(response.headers), response.content)
+
+    def ler(self, url: str, accept: str) -> Optional[Tuple[Dict, bytes]]:
+        caminho_corpo, caminho_meta = self._caminhos(url, accept)
+        try:
+            with open(caminho_meta, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(caminho_corpo, "rb") as f:
+                return meta, f.read()
+        except OSError:
+            return None
+
+    def iterar(self) -> Iterator[Tuple[Dict, bytes]]:
+        for pasta, _, arquivos in os.walk(self.pasta_respostas):
+            for nome in sorted(arquivos):
+                if nome.endswith(".json"):
+                    with open(os.path.join(pasta, nome), "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    with open(os.path.join(pasta, nome[:-5] + ".bin"), "rb") as f:
+                        yield meta, f.read()
+
+class AdaptadorReproducao(BaseAdapter):
+    """
+    Transport adapter que responde com as fixtures em vez de acessar a rede.
+    Cada resposta espera `latencia` mais até `variacao` segundos; se a espera
+    passar do timeout de leitura da requisição, levanta ReadTimeout como a
+    rede levantaria. URLs sem fixture recebem 404, e `If-None-Match` igual ao
+    ETag gravado recebe 304.
+    """
+
+    def __init__(self, repositorio: RepositorioFixtures, latencia: float = LATENCIA_FIXTURES_MS / 1000, variacao: float = VARIACAO_FIXTURES_MS / 1000):
+        super().__init__()
+        self.repositorio = repositorio
+        self.latencia = latencia
+        self.variacao = variacao
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        espera = self.latencia + random.uniform(0, self.variacao)
+        limite = timeout[1] if isinstance(timeout, tuple) else timeout
+        if limite is not None and espera > limite:
+            time.sleep(limite)
+            raise requests.exceptions.ReadTimeout(f"Fixture de {request.url} demorou mais que {limite}s", request=request)
+        time.sleep(espera)
+
+        gravada = self.repositorio.ler(request.url, request.headers.get("accept", ""))
+        response = requests.Response()
+        if gravada is None:
+            response.status_code = 404
+            response.headers = CaseInsensitiveDict({"content-type": "application/json"})
+            response._content = json.dumps({"status": 404, "title": "Resposta não gravada nas fixtures"}).encode("utf-8")
+        else:
+            meta, corpo = gravada
+            response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+            etag = response.headers.get("etag")
+            if etag and request.headers.get("if-none-match") == etag:
+                response.status_code = 304
+                response._content = b""
+            else:
+                response.status_code = meta["status"]
+                response._content = corpo
+
+        response.reason = HTTPStatus(response.status_code).phrase
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+# Recursos que mudam de ID nas cópias sintéticas; os demais (partidos e
+# proposições) são os mesmos em todas as cópias
+_URL_DEPUTADO = re.compile(r"/deputados/(\d+)(?:/despesas)?$")
+_URL_VOTACAO = re.compile(r"/votacoes/([^/?]+)(?:/votos)?$")
+
+def id_deputado_copia(id_deputado: int, copia: int) -> int:
+    return int(id_deputado) + copia * DESLOCAMENTO_ID_DEPUTADO
+
+def id_votacao_copia(id_votacao: str, copia: int) -> str:
+    # IDs de votação têm o formato "<proposição>-<sequencial>"
+    prefixo, _, sufixo = str(id_votacao).rpartition("-")
+    if prefixo and sufixo.isdigit():
+        return f"{prefixo}-{int(sufixo) + copia * DESLOCAMENTO_ID_VOTACAO}"
+    return f"{id_votacao}{copia:03d}"
+
+def _trocar_deputado(texto: str, antigo, novo) -> str:
+    texto = re.sub(rf"/deputados/{antigo}(?!\d)", f"/deputados/{novo}", texto)
+    return texto.replace(f"<id>{antigo}</id>", f"<id>{novo}</id>")
+
+def _trocar_votacao(texto: str, antigo: str, novo: str) -> str:
+    texto = re.sub(rf"/votacoes/{re.escape(antigo)}(?![\w-])", f"/votacoes/{novo}", texto)
+    return texto.replace(f"<id>{antigo}</id>", f"<id>{novo}</id>")
+
+def _copiar_votos(corpo: bytes, id_votacao: str, copia: int, deputados: set) -> bytes:
+    # Os votos da cópia N são dos deputados da cópia N
+    votos = json.loads(corpo)
+    novo_id = id_votacao_copia(id_votacao, copia)
+    for voto in votos.get("dados", []):
+        deputado = voto.get("deputado_") or {}
+        if deputado.get("id") in deputados:
+            novo = id_deputado_copia(deputado["id"], copia)
+            deputado["uri"] = _trocar_deputado(deputado.get("uri") or "", deputado["id"], novo)
+            deputado["id"] = novo
+        if voto.get("uriVotacao"):
+            voto["uriVotacao"] = _trocar_votacao(voto["uriVotacao"], id_votacao, novo_id)
+    return _trocar_votacao(json.dumps(votos, ensure_ascii=False), id_votacao, novo_id).encode("utf-8")
+
+def _ler_lista(caminho: str) -> Dict:
+    if not os.path.exists(caminho):
+        return {"dados": []}
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def gravar_lista(caminho: str, lista: Dict):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(lista, f, ensure_ascii=False)
+
+def escalar_fixtures(origem: str, destino: str, fator: int) -> Dict[str, int]:
+    """
+    Gera em `destino` as fixtures de `origem` multiplicadas por `fator`: cada
+    cópia tem deputados (com despesas) e votações (com votos) novos, com IDs
+    deslocados, enquanto partidos e proposições continuam os mesmos. A cópia 0
+    é a original. Devolve quantas respostas e registros de listagem foram
+    escritos.
+    """
+    if fator < 1:
+        raise ValueError("O fator precisa ser pelo menos 1.")
+    fonte = RepositorioFixtures(origem)
+    alvo = RepositorioFixtures(destino)
+    os.makedirs(alvo.pasta_dados, exist_ok=True)
+    totais = {"respostas": 0, "deputados": 0, "votacoes": 0}
+
+    deputados = _ler_lista(os.path.join(fonte.pasta_dados, "deputados_57.json"))
+    votacoes = _ler_lista(os.path.join(fonte.pasta_dados, "votacoes_2024.json"))
+    ids_deputados = {deputado["id"] for deputado in deputados["dados"]}
+
+    deputados_escalados, votacoes_escaladas = [], []
+    for copia in range(fator):
+        for deputado in deputados["dados"]:
+            novo = id_deputado_copia(deputado["id"], copia)
+            deputados_escalados.append({**deputado, "id": novo, "uri": _trocar_deputado(deputado.get("uri") or "", deputado["id"], novo)})
+        for votacao in votacoes["dados"]:
+            novo = id_votacao_copia(votacao["id"], copia)
+            votacoes_escaladas.append({**votacao, "id": novo, "uri": _trocar_votacao(votacao.get("uri") or "", str(votacao["id"]), novo)})
+
+    gravar_lista(os.path.join(alvo.pasta_dados, "deputados_57.json"), {**deputados, "dados": deputados_escalados})
+    gravar_lista(os.path.join(alvo.pasta_dados, "votacoes_2024.json"), {**votacoes, "dados": votacoes_escaladas})
+    partidos = os.path.join(fonte.pasta_dados, "partidos_57.json")
+    if os.path.exists(partidos):
+        shutil.copyfile(partidos, os.path.join(alvo.pasta_dados, "partidos_57.json"))
+    totais["deputados"] = len(deputados_escalados)
+    totais["votacoes"] = len(votacoes_escaladas)
+
+    for meta, corpo in fonte.iterar():
+        url, accept = meta["url"], meta["accept"]
+        caminho = urlsplit(url).path
+        deputado = _URL_DEPUTADO.search(caminho)
+        votacao = _URL_VOTACAO.search(caminho)
+        copias = range(fator) if deputado or votacao else range(1)
+
+        for copia in copias:
+            nova_url, novo_corpo = url, corpo
+            if copia and deputado:
+                antigo = int(deputado.group(1))
+                novo = id_deputado_copia(antigo, copia)
+                nova_url = _trocar_deputado(url, antigo, novo)
+                novo_corpo = _trocar_deputado(corpo.decode("utf-8"), antigo, novo).encode("utf-8")
+            elif copia and votacao:
+                antigo = votacao.group(1)
+                novo = id_votacao_copia(antigo, copia)
+                nova_url = _trocar_votacao(url, antigo, novo)
+                if caminho.endswith("/votos") and meta["status"] == 200:
+                    novo_corpo = _copiar_votos(corpo, antigo, copia, ids_deputados)
+                else:
+                    novo_corpo = _trocar_votacao(corpo.decode("utf-8"), antigo, novo).encode("utf-8")
+            alvo.salvar(nova_url, accept, meta["status"], meta.get("headers", {}), novo_corpo)
+            totais["respostas"] += 1
+
+    return totais
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    escalar = subcomandos.add_parser("escalar", help="Multiplica o volume das fixtures com cópias sintéticas.")
+    escalar.add_argument("origem")
+    escalar.add_argument("destino")
+    escalar.add_argument("--fator", type=int, default=10)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    totais = escalar_fixtures(args.origem, args.destino, args.fator)
+    print(
+        f"{totais['respostas']} respostas, {totais['deputados']} deputados e {totais['votacoes']} votações "
+        f"gravados em {args.destino} em {time.perf_counter() - inicio:.1f}s."
+    )
@@ -0,0 +1,129 @@
+"""
+Grava numa pasta de fixtures (ver tratamentoDados/fixtures_api.py) as
+respostas da API que as cargas consultam: detalhes de partidos e deputados,
+todas as páginas de despesas de cada deputado, o XML de cada votação, as
+proposições afetadas por elas e os votos. As listagens da pasta de dados vão
+junto, cortadas nos primeiros --limite registros.
+
+As requisições passam pelo agendador (limite de taxa e retentativas), mas não
+pelo cache em disco: a ideia é gravar o que a API responde agora.
+
+Uso (na raiz do projeto):
+    python -m tratamentoDados.gravador_api data/fixtures_api --limite 50
+"""
+import argparse
+import os
+import threading
+import time
+from itertools import islice
+from typing import Dict, List, Optional, Set
+
+import requests
+
+from tratamentoDados.Despesa import url_despesas_deputado
+from tratamentoDados.cliente_http import (
+    LIMITE_CONCORRENCIA, criar_sessao_http, executar_concorrente, obter_agendador, proxima_pagina
+)
+from tratamentoDados.fixtures_api import RepositorioFixtures, gravar_lista
+from tratamentoDados.leitor_json import DIRETORIO_DADOS, ler_registros_json
+from tratamentoDados.parser_xml import extrair_proposicoes_afetadas
+from tratamentoDados.sessao_proposicao import url_proposicao
+from tratamentoDados.voto_individual import url_votos_sessao
+
+XML = "application/xml"
+JSON = "application/json"
+
+# Respostas que valem como fixture; as demais são falhas da API no momento
+STATUS_GRAVADOS = {200, 404}
+
+class Gravador:
+    def __init__(self, destino: str, sessao: requests.Session):
+        self.repositorio = RepositorioFixtures(destino)
+        self.sessao = sessao
+        self.agendador = obter_agendador()
+        self.falhas = 0
+        self._trava = threading.Lock()
+
+    def _falhou(self):
+        with self._trava:
+            self.falhas += 1
+
+    def gravar(self, url: str, accept: str) -> Optional[requests.Response]:
+        try:
+            response = self.agendador.get(self.sessao, url, headers={"accept": accept})
+        except requests.exceptions.RequestException as e:
+            print(f"  - Erro de conexão ao acessar {url}: {e}")
+            self._falhou()
+            return None
+        if response.status_code not in STATUS_GRAVADOS:
+            print(f"  - Falha ao buscar {url}. Status: {response.status_code}")
+            self._falhou()
+            return None
+        self.repositorio.salvar_resposta(url, accept, response)
+        return response
+
+    def gravar_despesas(self, id_deputado: int) -> int:
+        # Todas as páginas, seguindo os links `next` como a carga faz
+        url, paginas = url_despesas_deputado(id_deputado), 0
+        while url:
+            response = self.gravar(url, JSON)
+            if response is None or response.status_code != 200:
+                break
+            paginas += 1
+            url = proxima_pagina(response.json())
+        return paginas
+
+    def gravar_votacao(self, votacao: Dict) -> Set[str]:
+        # Devolve as proposições afetadas, gravadas depois sem repetição
+        self.gravar(url_votos_sessao(votacao["id"]), JSON)
+        response = self.gravar(votacao["uri"], XML)
+        if response is None or response.status_code != 200:
+            return set()
+        return set(extrair_proposicoes_afetadas(response.content)["proposicoes_afetadas_ids"])
+
+def copiar_lista(nome: str, origem: str, destino: str, limite: Optional[int]) -> List[Dict]:
+    registros = list(islice(ler_registros_json(os.path.join(origem, nome)), limite))
+    gravar_lista(os.path.join(destino, nome), {"dados": registros})
+    return registros
+
+def gravar_fixtures(destino: str, origem_dados: str = DIRETORIO_DADOS, limite: Optional[int] = None,
+                    limite_concorrencia: int = LIMITE_CONCORRENCIA) -> Dict[str, int]:
+    repositorio = RepositorioFixtures(destino)
+    os.makedirs(repositorio.pasta_dados, exist_ok=True)
+    partidos = copiar_lista("partidos_57.json", origem_dados, repositorio.pasta_dados, limite)
+    deputados = copiar_lista("deputados_57.json", origem_dados, repositorio.pasta_dados, limite)
+    votacoes = copiar_lista("votacoes_2024.json", origem_dados, repositorio.pasta_dados, limite)
+
+    with criar_sessao_http(limite_concorrencia) as sessao:
+        gravador = Gravador(destino, sessao)
+
+        print(f"Gravando {len(partidos)} partidos e {len(deputados)} deputados...")
+        executar_concorrente(lambda partido: gravador.gravar(partido["uri"], XML), [p for p in partidos if p.get("uri")], limite_concorrencia)
+        executar_concorrente(lambda deputado: gravador.gravar(deputado["uri"], XML), [d for d in deputados if d.get("uri")], limite_concorrencia)
+        paginas = executar_concorrente(lambda deputado: gravador.gravar_despesas(deputado["id"]), deputados, limite_concorrencia)
+
+        print(f"Gravando {len(votacoes)} votações com votos e proposições...")
+        afetadas = executar_concorrente(gravador.gravar_votacao, [v for v in votacoes if v.get("uri")], limite_concorrencia)
+        proposicoes = sorted(set().union(*afetadas))
+        executar_concorrente(lambda proposicao_id: gravador.gravar(url_proposicao(proposicao_id), JSON), proposicoes, limite_concorrencia)
+
+    return {
+        "partidos": len(partidos),
+        "deputados": len(deputados),
+        "paginas_despesas": sum(paginas),
+        "votacoes": len(votacoes),
+        "proposicoes": len(proposicoes),
+        "falhas": gravador.falhas,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("destino", help="Pasta das fixtures.")
+    parser.add_argument("--dados", default=DIRETORIO_DADOS, help=f"Pasta com as listagens de origem (padrão: {DIRETORIO_DADOS}).")
+    parser.add_argument("--limite", type=int, default=None, help="Registros de cada listagem (padrão: todos).")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    totais = gravar_fixtures(args.destino, args.dados, args.limite)
+    print(f"Fixtures gravadas em {args.destino} em {time.perf_counter() - inicio:.1f}s: "
+          + ", ".join(f"{nome} {total}" for nome, total in totais.items()))
@@ -0,0 +1,123 @@
+import json
+import os
+from typing import Any, Iterator, Optional, TextIO
+
+TAMANHO_BLOCO = 1 << 16
+
+# Pasta com as listagens lidas pelas cargas (deputados, partidos, votações);
+# trocada para rodar as cargas sobre as fixtures gravadas (ver fixtures_api)
+DIRETORIO_DADOS = os.environ.get("CAMARA_DADOS_DIR", "data")
+
+_decoder = json.JSONDecoder()
+_ESPACOS = " \t\r\n"
+_CONTINUACAO_NUMERO = "0123456789+-.eE"
+
+class _Leitor:
+    """
+    Buffer deslizante sobre o arquivo: só guarda o trecho ainda não consumido
+    e decodifica um valor JSON por vez com `raw_decode`.
+    """
+
+    def __init__(self, arquivo: TextIO, tamanho_bloco: int):
+        self.arquivo = arquivo
+        self.tamanho_bloco = tamanho_bloco
+        self.texto = ""
+        self.pos = 0
+        self.fim = False
+
+    def _ler_bloco(self) -> bool:
+        if self.fim:
+            return False
+        bloco = self.arquivo.read(self.tamanho_bloco)
+        if not bloco:
+            self.fim = True
+            return False
+        # Descarta o que já foi consumido antes de crescer o buffer
+        self.texto = self.texto[self.pos:] + bloco
+        self.pos = 0
+        return True
+
+    def proximo_caractere(self) -> str:
+        while True:
+            while self.pos < len(self.texto) and self.texto[self.pos] in _ESPACOS:
+                self.pos += 1
+            if self.pos < len(self.texto):
+                return self.texto[self.pos]
+            if not self._ler_bloco():
+                raise json.JSONDecodeError("Fim inesperado do arquivo", self.texto, self.pos)
+
+    def consumir(self, esperado: str):
+        caractere = self.proximo_caractere()
+        if caractere not in esperado:
+            raise json.JSONDecodeError(f"Esperado um de {esperado!r}", self.texto, self.pos)
+        self.pos += 1
+        return caractere
+
+    def decodificar_valor(self) -> Any:
+        self.proximo_caractere()
+        while True:
+            try:
+                valor, fim = _decoder.raw_decode(self.texto, self.pos)
+            except json.JSONDecodeError:
+                # O valor pode só estar cortado no fim do buffer
+                if self._ler_bloco():
+                    continue
+                raise
+            # Um número cortado no fim do buffer (ex.: "12." de "12.5") é
+            # decodificado só em parte; nesse caso é preciso ler mais
+            if self.texto[fim:].strip(_CONTINUACAO_NUMERO) == "" and self._ler_bloco():
+                continue
+            self.pos = fim
+            return valor
+
+def _iterar_array(leitor: _Leitor) -> Iterator[Any]:
+    leitor.consumir("[")
+    if leitor.proximo_caractere() == "]":
+        leitor.pos += 1
+        return
+    while True:
+        yield leitor.decodificar_valor()
+        if leitor.consumir(",]") == "]":
+            return
+
+def iterar_registros_json(caminho_arquivo: str, chave: Optional[str] = "dados", tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[Any]:
+    """
+    Lê um arquivo JSON incrementalmente, entregando um registro por vez.
+
+    Aceita os dois formatos usados pelos scripts de carga:
+    - objeto com a lista em `chave` (ex.: `{"dados": [...], "links": [...]}`),
+      como nos arquivos baixados da API;
+    - array no nível raiz (ex.: o arquivo de despesas por deputado), em que cada
+      elemento é entregue inteiro.
+
+    Os demais campos do objeto raiz são decodificados e descartados. Se a chave
+    não existir, nada é entregue.
+    """
+    with open(caminho_arquivo, "r", encoding="utf-8") as arquivo:
+        leitor = _Leitor(arquivo, tamanho_bloco)
+
+        if leitor.proximo_caractere() == "[":
+            yield from _iterar_array(leitor)
+            return
+
+        leitor.consumir("{")
+        if leitor.proximo_caractere() == "}":
+            return
+        while True:
+            nome = leitor.decodificar_valor()
+            leitor.consumir(":")
+            if nome == chave and leitor.proximo_caractere() == "[":
+                yield from _iterar_array(leitor)
+            else:
+                leitor.decodificar_valor()
+            if leitor.consumir(",}") == "}":
+                return
+
+def ler_registros_json(caminho_arquivo: str, chave: Optional[str] = "dados") -> Iterator[Any]:
+    # Mesmo tratamento de erro que os scripts de carga já faziam com json.load
+    try:
+        yield from iterar_registros_json(caminho_arquivo, chave)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{caminho_arquivo}' não foi encontrado.")
+    except json.JSONDecodeError:
+        print(f"Erro: O arquivo '{caminho_arquivo}' não é um JSON válido.")
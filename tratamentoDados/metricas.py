@@ -0,0 +1,235 @@
+"""
+Métricas das cargas: contadores (registros baixados, requisições,
+retentativas, acertos do cache) e tempos (requisições HTTP, escritas no
+banco) agrupados pela etapa em execução, mais o relatório JSON gravado a cada
+execução do pipeline para comparar o tempo de carga entre versões.
+
+A etapa é guardada num ContextVar: `executar_concorrente` copia o contexto
+para as suas threads, então as requisições feitas por elas contam para a
+etapa que as disparou.
+"""
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from log.logger_config import get_logger
+
+DIRETORIO_RELATORIOS = os.environ.get("CAMARA_RELATORIOS_DIR", "log/relatorios")
+# Intervalo mínimo (segundos) entre duas linhas de progresso de uma tarefa
+INTERVALO_PROGRESSO = float(os.environ.get("CAMARA_INTERVALO_PROGRESSO", 10))
+SEM_ETAPA = "geral"
+
+PERCENTIS = (50, 90, 99)
+# Comandos contados como escrita no banco; o resto entra como leitura
+_COMANDOS_ESCRITA = ("INSERT", "UPDATE", "DELETE", "COPY", "CREATE", "ALTER", "DROP", "ANALYZE")
+
+logger = get_logger("carga_logger", "log/carga.log")
+
+_etapa_atual: contextvars.ContextVar[str] = contextvars.ContextVar("etapa_atual", default=SEM_ETAPA)
+
+def etapa_atual() -> str:
+    return _etapa_atual.get()
+
+@contextmanager
+def em_etapa(nome: str) -> Iterator[None]:
+    token = _etapa_atual.set(nome)
+    try:
+        yield
+    finally:
+        _etapa_atual.reset(token)
+
+def percentil(ordenadas: Sequence[float], p: float) -> float:
+    # Nearest-rank sobre amostras já ordenadas
+    if not ordenadas:
+        return 0.0
+    posicao = max(0, math.ceil(p / 100 * len(ordenadas)) - 1)
+    return ordenadas[posicao]
+
+def resumir_tempos(amostras: List[float]) -> Dict:
+    ordenadas = sorted(amostras)
+    resumo = {
+        "amostras": len(ordenadas),
+        "total_s": round(sum(ordenadas), 3),
+        "media_ms": round(sum(ordenadas) / len(ordenadas) * 1000, 2) if ordenadas else 0.0,
+    }
+    for p in PERCENTIS:
+        resumo[f"p{p}_ms"] = round(percentil(ordenadas, p) * 1000, 2)
+    resumo["max_ms"] = round(ordenadas[-1] * 1000, 2) if ordenadas else 0.0
+    return resumo
+
+class Metricas:
+    """
+    Contadores e amostras de tempo por etapa, seguros para várias threads.
+    Os tempos ficam inteiros em memória (um float por operação) para que os
+    percentis saiam exatos.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._contadores: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._tempos: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+
+    def contar(self, evento: str, quantidade: int = 1):
+        with self._trava:
+            self._contadores[etapa_atual()][evento] += quantidade
+
+    def registrar_tempo(self, operacao: str, segundos: float):
+        with self._trava:
+            self._tempos[etapa_atual()][operacao].append(segundos)
+
+    @contextmanager
+    def medir(self, operacao: str) -> Iterator[None]:
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(operacao, time.perf_counter() - inicio)
+
+    def resumo(self) -> Dict[str, Dict]:
+        with self._trava:
+            etapas = set(self._contadores) | set(self._tempos)
+            return {
+                etapa: {
+                    "contadores": dict(self._contadores[etapa]),
+                    "tempos": {operacao: resumir_tempos(amostras) for operacao, amostras in self._tempos[etapa].items()},
+                }
+                for etapa in sorted(etapas)
+            }
+
+    def exportar(self) -> Dict[str, Dict]:
+        # Contadores e amostras brutos, para juntar aos de outro processo
+        with self._trava:
+            return {
+                "contadores": {etapa: dict(eventos) for etapa, eventos in self._contadores.items()},
+                "tempos": {etapa: {operacao: list(amostras) for operacao, amostras in operacoes.items()}
+                           for etapa, operacoes in self._tempos.items()},
+            }
+
+    def incorporar(self, exportadas: Dict[str, Dict]):
+        # Soma o que foi medido num processo de escrita (ver escrita_paralela)
+        with self._trava:
+            for etapa, eventos in exportadas["contadores"].items():
+                for evento, quantidade in eventos.items():
+                    self._contadores[etapa][evento] += quantidade
+            for etapa, operacoes in exportadas["tempos"].items():
+                for operacao, amostras in operacoes.items():
+                    self._tempos[etapa][operacao].extend(amostras)
+
+    def limpar(self):
+        with self._trava:
+            self._contadores.clear()
+            self._tempos.clear()
+
+# Uma instância por processo, como o cache e o agendador HTTP
+METRICAS = Metricas()
+
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_metricas = time.perf_counter()
+
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_inicio_metricas", None)
+    if inicio is None:
+        return
+    operacao = "escrita_banco" if statement.lstrip().upper().startswith(_COMANDOS_ESCRITA) else "leitura_banco"
+    METRICAS.registrar_tempo(operacao, time.perf_counter() - inicio)
+
+def instrumentar_engine(engine: Engine):
+    """
+    Mede o tempo de cada comando enviado pelo engine. O COPY das cargas em
+    lote não passa pelos eventos do SQLAlchemy e é medido em carga_em_lote.
+    """
+    if not event.contains(engine, "before_cursor_execute", _antes_de_executar):
+        event.listen(engine, "before_cursor_execute", _antes_de_executar)
+        event.listen(engine, "after_cursor_execute", _depois_de_executar)
+
+class Progresso:
+    """
+    Andamento de uma tarefa longa sem uma linha por item: escreve (na tela e
+    em log/carga.log) no máximo uma linha a cada `intervalo` segundos, com a
+    vazão e, se o total for conhecido, a previsão de término.
+    """
+
+    def __init__(self, descricao: str, total: Optional[int] = None, intervalo: float = INTERVALO_PROGRESSO):
+        self.descricao = descricao
+        self.total = total
+        self.intervalo = intervalo
+        self.feitos = 0
+        self.inicio = time.perf_counter()
+        self._ultimo_registro = self.inicio
+        self._trava = threading.Lock()
+
+    def _mensagem(self, agora: float) -> str:
+        decorrido = agora - self.inicio
+        vazao = self.feitos / decorrido if decorrido > 0 else 0.0
+        mensagem = f"[{etapa_atual()}] {self.descricao}: {self.feitos}"
+        if self.total:
+            mensagem += f"/{self.total} ({self.feitos / self.total:.0%})"
+        mensagem += f" em {decorrido:.0f}s, {vazao:.1f}/s"
+        if self.total and vazao > 0 and self.feitos < self.total:
+            mensagem += f", faltam ~{(self.total - self.feitos) / vazao:.0f}s"
+        return mensagem
+
+    def _registrar(self, mensagem: str):
+        print(mensagem)
+        logger.info(mensagem)
+
+    def avancar(self, quantidade: int = 1):
+        with self._trava:
+            self.feitos += quantidade
+            agora = time.perf_counter()
+            if agora - self._ultimo_registro < self.intervalo:
+                return
+            self._ultimo_registro = agora
+            mensagem = self._mensagem(agora)
+        self._registrar(mensagem)
+
+    def concluir(self):
+        with self._trava:
+            mensagem = self._mensagem(time.perf_counter())
+        self._registrar(mensagem + " (concluído)")
+
+def montar_relatorio(resultados: Sequence, inicio: datetime, duracao_total: float, usar_staging: bool) -> Dict:
+    """
+    Junta os resultados das etapas do pipeline (ResultadoEtapa) com as
+    métricas coletadas durante a execução.
+    """
+    resumo = METRICAS.resumo()
+    etapas = {}
+    for resultado in resultados:
+        metricas = resumo.pop(resultado.nome, {"contadores": {}, "tempos": {}})
+        etapas[resultado.nome] = {
+            "situacao": resultado.situacao,
+            "duracao_s": round(resultado.duracao, 3),
+            "registros_gravados": resultado.linhas,
+            "registros_por_segundo": round(resultado.linhas / resultado.duracao, 1) if resultado.linhas and resultado.duracao else None,
+            "erro": resultado.erro,
+            **metricas,
+        }
+
+    return {
+        "inicio": inicio.isoformat(timespec="seconds"),
+        "duracao_s": round(duracao_total, 3),
+        "staging": usar_staging,
+        "situacao": "ok" if all(resultado.situacao == "ok" for resultado in resultados) else "falhou",
+        "etapas": etapas,
+        # Preparação e publicação do staging e o que rodou fora das etapas
+        "outros": resumo,
+    }
+
+def gravar_relatorio(relatorio: Dict, diretorio: str = DIRETORIO_RELATORIOS) -> str:
+    os.makedirs(diretorio, exist_ok=True)
+    inicio = datetime.fromisoformat(relatorio["inicio"])
+    caminho = os.path.join(diretorio, f"carga_{inicio:%Y%m%d_%H%M%S}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    return caminho
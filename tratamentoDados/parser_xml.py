@@ -0,0 +1,122 @@
+"""
+Análise dos XMLs da API fora das threads de download. As funções `extrair_*`
+são puras (bytes -> dict) para poderem rodar num pool de processos: com os
+downloads concorrentes, o parse passa a ser o gargalo e, em threads, ficaria
+preso ao GIL.
+"""
+import atexit
+import io
+import multiprocessing
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, TypeVar
+
+# Processos do pool de parse; com 1 (ou numa máquina de um núcleo) o parse
+# roda na própria thread, sem o custo de enviar os bytes a outro processo
+PROCESSOS_PARSER = int(os.environ.get("CAMARA_PROCESSOS_PARSER", os.cpu_count() or 1))
+# A partir deste tamanho (bytes) o XML da sessão é lido com iterparse, que
+# não monta a árvore inteira mas é mais lento que fromstring + findall
+LIMITE_ITERPARSE = int(os.environ.get("CAMARA_LIMITE_ITERPARSE", 1024 * 1024))
+
+R = TypeVar("R")
+
+_trava_pool = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+def extrair_detalhes_deputado(conteudo: bytes) -> Dict:
+    root = ET.fromstring(conteudo)
+
+    # Dados do xml do deputado
+    dados = root.find('.//dados')
+    return {
+        "nome_civil": dados.findtext('nomeCivil'),
+        "nome_eleitoral": dados.findtext('ultimoStatus/nomeEleitoral'),
+        "sexo": dados.findtext('sexo'),
+        "sigla_partido": dados.findtext('ultimoStatus/siglaPartido'),
+        "sigla_uf": dados.findtext('ultimoStatus/siglaUf'),
+        "id_legislatura": dados.findtext('ultimoStatus/idLegislatura'),
+        "url_foto": dados.findtext('ultimoStatus/urlFoto'),
+        # Dados do gabinete do deputado
+        "gabinete": {
+            "nome": dados.findtext('ultimoStatus/gabinete/nome'),
+            "predio": dados.findtext('ultimoStatus/gabinete/predio'),
+            "sala": dados.findtext('ultimoStatus/gabinete/sala'),
+            "andar": dados.findtext('ultimoStatus/gabinete/andar'),
+            "telefone": dados.findtext('ultimoStatus/gabinete/telefone'),
+            "email": dados.findtext('ultimoStatus/gabinete/email')
+        }
+    }
+
+def extrair_detalhes_partido(conteudo: bytes) -> Dict:
+    root = ET.fromstring(conteudo)
+
+    dados = root.find('.//dados')
+    return {
+        "uri_logo": dados.findtext('urlLogo'),
+        "id_legislativo": dados.findtext('status/idLegislatura'),
+        "situacao": dados.findtext('status/situacao'),
+        "total_membros": dados.findtext('status/totalMembros'),
+        "total_posse_legislatura": dados.findtext('status/totalPosse')
+    }
+
+def extrair_proposicoes_afetadas(conteudo: bytes) -> Dict:
+    """
+    IDs das proposições afetadas pela sessão. Documentos com mais de
+    LIMITE_ITERPARSE bytes são lidos com iterparse, com o mesmo resultado.
+    """
+    if len(conteudo) > LIMITE_ITERPARSE:
+        return {"proposicoes_afetadas_ids": _proposicoes_afetadas_iterparse(conteudo)}
+
+    root = ET.fromstring(conteudo)
+    return {
+        "proposicoes_afetadas_ids": [
+            elem.text for elem in root.findall('.//proposicoesAfetadas/proposicoesAfetadas/id') if elem.text
+        ]
+    }
+
+def _proposicoes_afetadas_iterparse(conteudo: bytes) -> List[str]:
+    """
+    Equivale a `findall('.//proposicoesAfetadas/proposicoesAfetadas/id')`, mas
+    com iterparse: cada proposição é descartada assim que o seu id é lido, e
+    a árvore do documento nunca fica inteira em memória.
+    """
+    proposicoes_afetadas_ids: List[str] = []
+    caminho: List[str] = []
+
+    for evento, elem in ET.iterparse(io.BytesIO(conteudo), events=("start", "end")):
+        if evento == "start":
+            caminho.append(elem.tag)
+            continue
+
+        if caminho[-3:] == ["proposicoesAfetadas", "proposicoesAfetadas", "id"] and elem.text:
+            proposicoes_afetadas_ids.append(elem.text)
+        caminho.pop()
+        if elem.tag == "proposicoesAfetadas":
+            elem.clear()
+
+    return proposicoes_afetadas_ids
+
+def _obter_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if PROCESSOS_PARSER <= 1:
+        return None
+    with _trava_pool:
+        if _pool is None:
+            # spawn: as cargas já têm threads rodando, e um fork copiaria
+            # travas seguradas por elas
+            _pool = ProcessPoolExecutor(max_workers=PROCESSOS_PARSER, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown)
+        return _pool
+
+def analisar_xml(funcao: Callable[[bytes], R], conteudo: bytes) -> R:
+    """
+    Executa `funcao(conteudo)` no pool de processos e espera o resultado.
+    Pode ser chamada de várias threads ao mesmo tempo; erros de parse
+    (ET.ParseError) chegam ao chamador como se o parse fosse local.
+    """
+    pool = _obter_pool()
+    if pool is None:
+        return funcao(conteudo)
+    return pool.submit(funcao, conteudo).result()
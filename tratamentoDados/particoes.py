@@ -0,0 +1,155 @@
+"""
+Partições por ano de despesa (PARTITION BY RANGE (ano)) e votoindividual
+(PARTITION BY RANGE (data_hora_sessao), a data da sessão). As consultas
+filtradas por ano só leem a partição do ano, e um ano inteiro entra ou sai da
+tabela com ATTACH ou DETACH PARTITION, em vez de um INSERT ou DELETE linha a
+linha.
+
+- As cargas criam a partição de um ano novo antes de gravar nele
+  (`garantir_particoes`); não há partição DEFAULT, então uma linha de um ano
+  sem partição é um erro.
+- `anexar_ano` transforma numa partição um ano carregado à parte, numa
+  tabela comum criada com
+  `CREATE TABLE despesa_2023_carga (LIKE despesa INCLUDING DEFAULTS INCLUDING GENERATED)`.
+- `desanexar_ano` tira o ano da tabela e o deixa como tabela comum, para
+  arquivar; `remover_ano` também a apaga.
+
+As marcas de sincronização não mudam: um ano desanexado não é baixado de novo.
+
+Uso (na raiz do projeto):
+    python -m tratamentoDados.particoes listar despesa
+    python -m tratamentoDados.particoes criar despesa 2025
+    python -m tratamentoDados.particoes anexar despesa 2023 despesa_2023_carga
+    python -m tratamentoDados.particoes desanexar votoindividual 2022
+    python -m tratamentoDados.particoes remover despesa 2022
+"""
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from database import engine
+from tratamentoDados.despesa_mensal import recalcular_ano
+from tratamentoDados.visoes_materializadas import atualizar_visoes
+
+# Tabela particionada -> coluna da chave de partição
+TABELAS_PARTICIONADAS: Dict[str, str] = {
+    "despesa": "ano",
+    "votoindividual": "data_hora_sessao",
+}
+
+def nome_particao(tabela: str, ano: int) -> str:
+    return f"{tabela}_{ano}"
+
+def _limites(tabela: str, ano: int) -> Tuple[str, str]:
+    # Início (incluído) e fim (excluído) do ano, como literais SQL da chave
+    if TABELAS_PARTICIONADAS[tabela] == "ano":
+        return str(ano), str(ano + 1)
+    return f"'{ano}-01-01'", f"'{ano + 1}-01-01'"
+
+def particoes(conexao: Connection, tabela: str) -> List[Tuple[str, str]]:
+    """
+    (nome, limites) de cada partição de `tabela`. Sem schema, a tabela é a
+    que o search_path encontrar primeiro (a do staging durante uma carga).
+    """
+    return conexao.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:tabela AS regclass)
+        ORDER BY c.relname
+    """), {"tabela": tabela}).all()
+
+def garantir_particoes(conexao: Connection, tabela: str, anos: Iterable[Optional[int]]) -> List[str]:
+    """
+    Cria as partições de `tabela` que ainda faltam para `anos`, no mesmo
+    schema da tabela. Criar uma partição trava a tabela inteira até o fim da
+    transação, então as cargas paralelas criam as suas antes de abrir as faixas.
+    """
+    existentes = {nome for nome, _ in particoes(conexao, tabela)}
+    faltantes = sorted({ano for ano in anos if ano is not None and nome_particao(tabela, ano) not in existentes})
+    if not faltantes:
+        return []
+
+    schema = conexao.execute(text("""
+        SELECT n.nspname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.oid = CAST(:tabela AS regclass)
+    """), {"tabela": tabela}).scalar()
+    criadas = []
+    for ano in faltantes:
+        inicio, fim = _limites(tabela, ano)
+        conexao.execute(text(
+            f"CREATE TABLE {schema}.{nome_particao(tabela, ano)} PARTITION OF {schema}.{tabela} FOR VALUES FROM ({inicio}) TO ({fim})"
+        ))
+        criadas.append(f"{schema}.{nome_particao(tabela, ano)}")
+    print(f"Partições criadas: {', '.join(criadas)}.")
+    return criadas
+
+def anexar_ano(engine: Engine, tabela: str, ano: int, origem: str):
+    """
+    Transforma a tabela comum `origem` (mesmas colunas de `tabela`, só com
+    linhas do ano) na partição do ano. A restrição CHECK é validada antes do
+    ATTACH, que assim não precisa varrer a tabela segurando o lock.
+    """
+    nome = nome_particao(tabela, ano)
+    coluna = TABELAS_PARTICIONADAS[tabela]
+    inicio, fim = _limites(tabela, ano)
+    with engine.begin() as conexao:
+        conexao.execute(text(f"ALTER TABLE {origem} ADD CONSTRAINT {nome}_limites CHECK ({coluna} >= {inicio} AND {coluna} < {fim})"))
+        if origem != nome:
+            conexao.execute(text(f"ALTER TABLE {origem} RENAME TO {nome}"))
+        conexao.execute(text(f"ALTER TABLE {tabela} ATTACH PARTITION {nome} FOR VALUES FROM ({inicio}) TO ({fim})"))
+        conexao.execute(text(f"ALTER TABLE {nome} DROP CONSTRAINT {nome}_limites"))
+        if tabela == "despesa":
+            recalcular_ano(conexao, ano)
+    atualizar_visoes(engine)
+    print(f"{nome} anexada a {tabela}.")
+
+def desanexar_ano(engine: Engine, tabela: str, ano: int) -> str:
+    """
+    Tira o ano de `tabela` com DETACH PARTITION CONCURRENTLY, sem bloquear as
+    leituras da API. A partição continua no banco como tabela comum.
+    """
+    nome = nome_particao(tabela, ano)
+    # O CONCURRENTLY não roda dentro de uma transação
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conexao:
+        conexao.execute(text(f"ALTER TABLE {tabela} DETACH PARTITION {nome} CONCURRENTLY"))
+    if tabela == "despesa":
+        with engine.begin() as conexao:
+            recalcular_ano(conexao, ano)
+    atualizar_visoes(engine)
+    print(f"{nome} desanexada de {tabela}.")
+    return nome
+
+def remover_ano(engine: Engine, tabela: str, ano: int):
+    nome = desanexar_ano(engine, tabela, ano)
+    with engine.begin() as conexao:
+        conexao.execute(text(f"DROP TABLE {nome}"))
+    print(f"{nome} removida.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerencia as partições por ano de despesa e votoindividual.")
+    parser.add_argument("acao", choices=["listar", "criar", "anexar", "desanexar", "remover"])
+    parser.add_argument("tabela", choices=list(TABELAS_PARTICIONADAS))
+    parser.add_argument("ano", type=int, nargs="?")
+    parser.add_argument("origem", nargs="?", help="Tabela com o ano já carregado (só para anexar).")
+    args = parser.parse_args()
+    if args.acao != "listar" and args.ano is None:
+        parser.error("informe o ano")
+
+    if args.acao == "listar":
+        with engine.connect() as conexao:
+            for nome, limites in particoes(conexao, args.tabela):
+                print(f"{nome}: {limites}")
+    elif args.acao == "criar":
+        with engine.begin() as conexao:
+            garantir_particoes(conexao, args.tabela, [args.ano])
+    elif args.acao == "anexar":
+        if not args.origem:
+            parser.error("informe a tabela de origem")
+        anexar_ano(engine, args.tabela, args.ano, args.origem)
+    elif args.acao == "desanexar":
+        desanexar_ano(engine, args.tabela, args.ano)
+    else:
+        remover_ano(engine, args.tabela, args.ano)
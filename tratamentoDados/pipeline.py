@@ -0,0 +1,173 @@
+"""
+Executa as cargas da pasta tratamentoDados na ordem das dependências entre
+elas, rodando em paralelo as etapas independentes.
+
+Por padrão as cargas escrevem numa cópia das tabelas (ver
+tratamentoDados/staging.py), publicada de uma vez no fim se todas as etapas
+derem certo; com --sem-staging escrevem direto nas tabelas da API. A cópia é
+do banco inteiro a cada execução: em cargas incrementais pequenas, é ela que
+domina o tempo, e --sem-staging evita esse custo.
+
+Cada execução grava um relatório JSON em log/relatorios (ver
+tratamentoDados/metricas.py) com o tempo, a vazão, as latências HTTP e de
+escrita no banco, as retentativas e os acertos do cache de cada etapa.
+
+As despesas e os votos podem ser gravados por vários processos em paralelo
+com CAMARA_PROCESSOS_ESCRITA (ver tratamentoDados/escrita_paralela.py).
+
+No fim, as visões materializadas dos rankings do painel são recalculadas
+(ver tratamentoDados/visoes_materializadas.py).
+
+Uso (na raiz do projeto):
+    python -m tratamentoDados.pipeline
+    python -m tratamentoDados.pipeline despesas votos
+    python -m tratamentoDados.pipeline --sem-staging
+"""
+import argparse
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from database import engine
+from tratamentoDados import Despesa, Partido, deputados_gabinete, sessao_proposicao, voto_individual
+from tratamentoDados.metricas import em_etapa, gravar_relatorio, instrumentar_engine, montar_relatorio
+from tratamentoDados.staging import escrevendo_no_staging, preparar_staging, publicar_staging
+from tratamentoDados.visoes_materializadas import atualizar_visoes
+
+class Etapa(NamedTuple):
+    nome: str
+    executar: Callable[[], int]
+    depende_de: Tuple[str, ...] = ()
+
+class ResultadoEtapa(NamedTuple):
+    nome: str
+    situacao: str
+    duracao: float = 0.0
+    linhas: Optional[int] = None
+    erro: Optional[str] = None
+
+def etapa_despesas() -> int:
+    # Com o arquivo anual da CEAP disponível, o ano inteiro sai dele; senão,
+    # baixa só os meses pendentes de cada deputado e carrega o arquivo gerado
+    if os.path.exists(Despesa.ARQUIVO_CEAP):
+        return Despesa.main_ceap()
+    Despesa.salvando_despesas_localmente_ndjson()
+    return Despesa.main()
+
+# Sessões e proposições não dependem dos deputados, então correm junto com
+# eles e com as despesas; os votos precisam das sessões e dos deputados
+ETAPAS: List[Etapa] = [
+    Etapa("partidos", Partido.main),
+    Etapa("deputados", deputados_gabinete.main, ("partidos",)),
+    Etapa("despesas", etapa_despesas, ("deputados",)),
+    Etapa("sessoes", sessao_proposicao.main),
+    Etapa("votos", voto_individual.main, ("deputados", "sessoes")),
+]
+
+def _executar_etapa(etapa: Etapa) -> ResultadoEtapa:
+    print(f"\n>>> Iniciando etapa '{etapa.nome}'")
+    inicio = time.perf_counter()
+    # Requisições e escritas feitas pela etapa (e pelas suas threads) contam para ela
+    with em_etapa(etapa.nome):
+        linhas = etapa.executar()
+    duracao = time.perf_counter() - inicio
+    print(f">>> Etapa '{etapa.nome}' concluída em {duracao:.1f}s")
+    return ResultadoEtapa(etapa.nome, "ok", duracao, linhas)
+
+def executar_pipeline(etapas: Sequence[Etapa] = ETAPAS, max_paralelas: int = 3) -> List[ResultadoEtapa]:
+    """
+    Executa as etapas assim que todas as suas dependências terminam. Se uma
+    etapa falhar, as que dependem dela são puladas e as demais seguem.
+    Dependências fora de `etapas` são consideradas já carregadas.
+    """
+    nomes = {etapa.nome for etapa in etapas}
+    pendentes = {etapa.nome: etapa for etapa in etapas}
+    resultados: Dict[str, ResultadoEtapa] = {}
+    em_execucao: Dict[Future, Etapa] = {}
+    inicios: Dict[str, float] = {}
+
+    with ThreadPoolExecutor(max_workers=max_paralelas) as executor:
+        while pendentes or em_execucao:
+            for nome, etapa in list(pendentes.items()):
+                dependencias = [dep for dep in etapa.depende_de if dep in nomes]
+                if any(dep in resultados and resultados[dep].situacao != "ok" for dep in dependencias):
+                    resultados[nome] = ResultadoEtapa(nome, "pulada", erro="dependência falhou")
+                    del pendentes[nome]
+                elif all(dep in resultados for dep in dependencias):
+                    inicios[nome] = time.perf_counter()
+                    em_execucao[executor.submit(_executar_etapa, etapa)] = etapa
+                    del pendentes[nome]
+
+            if not em_execucao:
+                if pendentes:
+                    raise ValueError(f"Dependências circulares entre as etapas: {sorted(pendentes)}")
+                continue
+
+            concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidas:
+                etapa = em_execucao.pop(futuro)
+                try:
+                    resultados[etapa.nome] = futuro.result()
+                except Exception as e:
+                    duracao = time.perf_counter() - inicios[etapa.nome]
+                    print(f">>> ERRO na etapa '{etapa.nome}': {repr(e)}")
+                    resultados[etapa.nome] = ResultadoEtapa(etapa.nome, "falhou", duracao, erro=repr(e))
+
+    return [resultados[etapa.nome] for etapa in etapas]
+
+def imprimir_relatorio(resultados: List[ResultadoEtapa], duracao_total: float):
+    print("\n=== Relatório da carga ===")
+    print(f"{'Etapa':<12} {'Situação':<8} {'Tempo':>9} {'Linhas':>10}")
+    for resultado in resultados:
+        linhas = "-" if resultado.linhas is None else str(resultado.linhas)
+        print(f"{resultado.nome:<12} {resultado.situacao:<8} {resultado.duracao:8.1f}s {linhas:>10}")
+        if resultado.erro:
+            print(f"    {resultado.erro}")
+    print(f"Tempo total: {duracao_total:.1f}s")
+
+def main(nomes_etapas: Optional[Sequence[str]] = None, usar_staging: bool = True) -> List[ResultadoEtapa]:
+    etapas = [etapa for etapa in ETAPAS if not nomes_etapas or etapa.nome in nomes_etapas]
+    data_inicio = datetime.now()
+    inicio = time.perf_counter()
+    instrumentar_engine(engine)
+
+    if usar_staging:
+        with em_etapa("preparar_staging"):
+            preparar_staging(engine)
+    with escrevendo_no_staging(engine) if usar_staging else nullcontext():
+        resultados = executar_pipeline(etapas)
+
+    if usar_staging:
+        if all(resultado.situacao == "ok" for resultado in resultados):
+            with em_etapa("publicar_staging"):
+                publicar_staging(engine)
+        else:
+            # A API continua com os dados da última carga completa; o staging
+            # fica para inspeção e é recriado na próxima execução
+            print("AVISO: Houve etapas com falha; o staging não foi publicado.")
+    else:
+        # Sem staging as tabelas já foram alteradas, mesmo se alguma etapa falhou
+        with em_etapa("atualizar_visoes"):
+            atualizar_visoes(engine)
+
+    duracao_total = time.perf_counter() - inicio
+    imprimir_relatorio(resultados, duracao_total)
+    caminho = gravar_relatorio(montar_relatorio(resultados, data_inicio, duracao_total, usar_staging))
+    print(f"Relatório da execução gravado em {caminho}.")
+    return resultados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    nomes_validos = [etapa.nome for etapa in ETAPAS]
+    parser.add_argument("etapas", nargs="*", help=f"Etapas a executar, entre {', '.join(nomes_validos)} (padrão: todas).")
+    parser.add_argument("--sem-staging", action="store_true", help="Escreve direto nas tabelas lidas pela API.")
+    args = parser.parse_args()
+    desconhecidas = set(args.etapas) - set(nomes_validos)
+    if desconhecidas:
+        parser.error(f"etapas desconhecidas: {', '.join(sorted(desconhecidas))}")
+    resultados = main(args.etapas, usar_staging=not args.sem_staging)
+    if any(resultado.situacao != "ok" for resultado in resultados):
+        raise SystemExit(1)
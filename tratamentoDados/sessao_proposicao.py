@@ -1,43 +1,39 @@
 import datetime
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Iterator, List, Dict, Optional, Set, Tuple
 import requests
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
-from sqlmodel import SQLModel, Session
+from sqlalchemy import insert, select
+from sqlmodel import Session
 import json
+import os
+from models.estado_sincronizacao import CHAVE_DATA_HORA_REGISTRO, FONTE_SESSAO_PROPOSICAO, FONTE_SESSAO_VOTACAO
 from models.proposicao import Proposicao
 from models.sessao_votacao import SessaoVotacao
 from database import engine
 import xml.etree.ElementTree as ET
 from models.votacao_proposicao import VotacaoProposicao
+from tratamentoDados.cliente_http import LIMITE_CONCORRENCIA, URL_BASE_API, criar_sessao_http, executar_concorrente, get
+from tratamentoDados.leitor_json import DIRETORIO_DADOS, ler_registros_json
+from tratamentoDados.metricas import METRICAS
+from tratamentoDados.parser_xml import analisar_xml, extrair_proposicoes_afetadas
+from tratamentoDados.sincronizacao import gravar_marcas, ler_marcas, marcar_processados
 
-def carregar_sessao_json(caminho_arquivo: str) -> List[Dict]:
-    try:
-        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-            return dados.get("dados", [])
-    except FileNotFoundError:
-        print(f"Erro: O arquivo '{caminho_arquivo}' não foi encontrado.")
-        return []
-    except json.JSONDecodeError:
-        print(f"Erro: O arquivo '{caminho_arquivo}' não é um JSON válido.")
-        return []
+# Sessões tratadas por vez: cada bloco vira poucas consultas e um commit
+TAMANHO_BLOCO_SESSOES = 500
+
+ARQUIVO_SESSOES = os.path.join(DIRETORIO_DADOS, 'votacoes_2024.json')
 
-def buscar_detalhes_sessao_xml(uri: str) -> Optional[Dict]:
+def carregar_sessao_json(caminho_arquivo: str) -> Iterator[Dict]:
+    return ler_registros_json(caminho_arquivo)
+
+def buscar_detalhes_sessao_xml(uri: str, sessao_http: Optional[requests.Session] = None) -> Optional[Dict]:
     try:
         headers = {'accept': 'application/xml'}
-        response = requests.get(uri, headers=headers, timeout=15)
+        response = get(uri, headers=headers, timeout=15, sessao=sessao_http)
         response.raise_for_status()
+        METRICAS.contar("registros_baixados")
 
-        root = ET.fromstring(response.content)
-        
-        proposicoes_afetadas_ids: List[str] = []
-
-        for prop_afetada_elem in root.findall('.//proposicoesAfetadas/proposicoesAfetadas/id'):
-            if prop_afetada_elem.text:
-                proposicoes_afetadas_ids.append(prop_afetada_elem.text)
-        
-        return {"proposicoes_afetadas_ids": proposicoes_afetadas_ids}
+        return analisar_xml(extrair_proposicoes_afetadas, response.content)
 
     except requests.exceptions.RequestException as e:
         print(f"  - Erro de conexão ao acessar {uri}: {e}")
@@ -46,12 +42,16 @@ def buscar_detalhes_sessao_xml(uri: str) -> Optional[Dict]:
         print(f"  - Falha ao analisar o XML da URI {uri}.")
         return None
 
-def buscar_detalhes_proposicao_api(proposicao_id: str) -> Optional[Dict]:
+def url_proposicao(proposicao_id: str) -> str:
+    return f'{URL_BASE_API}/proposicoes/{proposicao_id}'
+
+def buscar_detalhes_proposicao_api(proposicao_id: str, sessao_http: Optional[requests.Session] = None) -> Optional[Dict]:
     try:
-        url = f'https://dadosabertos.camara.leg.br/api/v2/proposicoes/{proposicao_id}'
+        url = url_proposicao(proposicao_id)
         headers = {'accept': 'application/json'}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get(url, headers=headers, timeout=10, sessao=sessao_http)
         response.raise_for_status()
+        METRICAS.contar("registros_baixados")
         return response.json().get('dados', {})
     except requests.exceptions.RequestException as e:
         print(f"ERRO: Falha na requisição da proposição {proposicao_id}: {e}.")
@@ -61,121 +61,260 @@ def buscar_detalhes_proposicao_api(proposicao_id: str) -> Optional[Dict]:
         return None
 
 
-def main():
-    arquivo_json = 'data/votacoes_2024.json'
-    sessoes_base = carregar_sessao_json(arquivo_json)
-    
-    if not sessoes_base:
-        print('Sem sessões para processar. Encerrando.')
-        return 
+def converter_data_hora(valor: Optional[str]) -> Optional[datetime.datetime]:
+    # A API manda as datas em ISO 8601 sem fuso, ex.: '2024-12-18T20:13:05'
+    return datetime.datetime.fromisoformat(valor) if valor else None
 
-    total_sessoes = len(sessoes_base)
-    for i, sessao_dict in enumerate(sessoes_base):
-        id_sessao_json = sessao_dict.get('id')
-        print(f"\n--- Processando sessão {i+1}/{total_sessoes} (ID JSON: {id_sessao_json}) ---")
+def montar_sessao_votacao(sessao_dict: Dict) -> Dict:
+    return {
+        "id_dados_abertos": sessao_dict['id'],
+        "data_hora_registro": converter_data_hora(sessao_dict.get('dataHoraRegistro')),
+        "descricao": sessao_dict.get('descricao'),
+        "sigla_orgao": sessao_dict.get('siglaOrgao'),
+        "descricao_ultima_abertura_votacao": sessao_dict.get('ultimaAberturaVotacao', {}).get('descricao'),
+        "aprovacao": str(sessao_dict['aprovacao']) if sessao_dict.get('aprovacao') is not None else None,
+        "uri": sessao_dict['uri']
+    }
 
-        # Inicia uma nova sessão para cada item do JSON.
-        with Session(engine) as session:
-            try:
-                # 1. VERIFICAR/CRIAR SESSÃO DE VOTAÇÃO
-                uri_detalhes = sessao_dict.get('uri')
-                if not uri_detalhes:
-                    print(f"DEBUG: URI de detalhes não encontrada. Pulando.")
-                    continue
+def montar_proposicao(dados_prop: Dict) -> Dict:
+    return {
+        "id_dados_abertos": str(dados_prop.get('id')),
+        "sigla_tipo": dados_prop.get('siglaTipo'),
+        "ano": dados_prop.get('ano'),
+        "ementa": dados_prop.get('ementa'),
+        "data_apresentacao": dados_prop.get('dataApresentacao'),
+        "status": (dados_prop.get('statusProposicao') or {}).get('descricaoSituacao'),
+        "url_inteiro_teor": dados_prop.get('urlInteiroTeor')
+    }
 
-                # Verifica se a sessão já existe no banco
-                sessao_row = session.exec(
-                    select(SessaoVotacao).where(SessaoVotacao.id_dados_abertos == id_sessao_json)
-                ).first()
+def gravar_sessoes(session: Session, sessoes: List[Dict]) -> Tuple[Dict[str, int], int]:
+    """
+    Garante que todas as sessões do bloco existam no banco e devolve o mapa
+    id_dados_abertos -> id e quantas foram inseridas, com uma consulta e um
+    único INSERT.
+    """
+    ids_json = [sessao_dict['id'] for sessao_dict in sessoes]
+    ids_db = dict(session.exec(
+        select(SessaoVotacao.id_dados_abertos, SessaoVotacao.id).where(SessaoVotacao.id_dados_abertos.in_(ids_json))
+    ).all())
 
-                if sessao_row:
-                    nova_sessao = sessao_row.SessaoVotacao
-                    print(f"DEBUG: Sessão {id_sessao_json} já existe no DB (ID: {nova_sessao.id}). Usando existente.")
-                else:
-                    print(f"DEBUG: Sessão {id_sessao_json} não encontrada. Criando...")
-                    nova_sessao = SessaoVotacao(
-                        id_dados_abertos=sessao_dict['id'],
-                        data_hora_registro=sessao_dict.get('dataHoraRegistro'),
-                        descricao=sessao_dict.get('descricao'),
-                        sigla_orgao=sessao_dict.get('siglaOrgao'),
-                        descricao_ultima_abertura_votacao=sessao_dict.get('ultimaAberturaVotacao', {}).get('descricao'),
-                        aprovacao=str(sessao_dict['aprovacao']) if sessao_dict.get('aprovacao') is not None else None,
-                        uri=sessao_dict['uri']
-                    )
-                    session.add(nova_sessao)
-                    session.flush() 
-                    print(f"DEBUG: Sessão {id_sessao_json} adicionada (DB ID: {nova_sessao.id}).")
-
-                # 2. BUSCAR DETALHES E PROPOSIÇÕES ASSOCIADAS
-                detalhes_xml = buscar_detalhes_sessao_xml(uri_detalhes)
+    novas = {}
+    for sessao_dict in sessoes:
+        if sessao_dict['id'] not in ids_db:
+            novas[sessao_dict['id']] = montar_sessao_votacao(sessao_dict)
+
+    if novas:
+        inseridas = session.execute(
+            insert(SessaoVotacao).values(list(novas.values())).returning(SessaoVotacao.id_dados_abertos, SessaoVotacao.id)
+        ).all()
+        ids_db.update(dict(inseridas))
+        print(f"DEBUG: {len(novas)} sessões novas adicionadas.")
+
+    return ids_db, len(novas)
+
+def resolver_proposicoes(session: Session, sessao_http: requests.Session, ids_proposicoes: Set[str], cache: Dict[str, int], falhas: Set[str], limite_concorrencia: int) -> int:
+    """
+    Completa o `cache` (id_dados_abertos -> id) com as proposições pedidas:
+    primeiro procura no banco, depois busca as que faltam na API em paralelo
+    e insere todas de uma vez. IDs que falharam na API ficam em `falhas` e não
+    são consultados de novo nesta execução. Devolve quantas foram inseridas.
+    """
+    pendentes = ids_proposicoes - cache.keys() - falhas
+    if not pendentes:
+        return 0
+
+    cache.update(dict(session.exec(
+        select(Proposicao.id_dados_abertos, Proposicao.id).where(Proposicao.id_dados_abertos.in_(pendentes))
+    ).all()))
+
+    faltantes = sorted(pendentes - cache.keys())
+    if not faltantes:
+        return 0
+
+    print(f"DEBUG: Buscando {len(faltantes)} proposições na API...")
+    respostas = executar_concorrente(
+        lambda prop_id: buscar_detalhes_proposicao_api(prop_id, sessao_http),
+        faltantes,
+        limite_concorrencia
+    )
+
+    novas = {}
+    for prop_id, dados_prop in zip(faltantes, respostas):
+        if not dados_prop:
+            print(f"  AVISO: Falha ao buscar dados da proposição {prop_id}. Link não será criado.")
+            falhas.add(prop_id)
+            continue
+        novas[prop_id] = montar_proposicao(dados_prop)
+
+    if novas:
+        inseridas = session.execute(
+            insert(Proposicao).values(list(novas.values())).returning(Proposicao.id_dados_abertos, Proposicao.id)
+        ).all()
+        cache.update(dict(inseridas))
+        # A API pode devolver o ID em outro formato; o link usa o ID vindo do XML
+        for prop_id, linha in novas.items():
+            if prop_id not in cache and linha["id_dados_abertos"] in cache:
+                cache[prop_id] = cache[linha["id_dados_abertos"]]
+    return len(novas)
+
+def gravar_links(session: Session, links: Set[tuple]) -> int:
+    if not links:
+        return 0
+
+    ids_votacao = {id_votacao for id_votacao, _ in links}
+    existentes = set(session.exec(
+        select(VotacaoProposicao.id_votacao, VotacaoProposicao.id_proposicao).where(VotacaoProposicao.id_votacao.in_(ids_votacao))
+    ).all())
+
+    novos = [
+        {"id_votacao": id_votacao, "id_proposicao": id_proposicao}
+        for id_votacao, id_proposicao in sorted(links - existentes)
+    ]
+    if novos:
+        session.execute(insert(VotacaoProposicao), novos)
+    return len(novos)
+
+def processar_bloco(sessoes: List[Dict], sessao_http: requests.Session, cache: Dict[str, int], falhas: Set[str], limite_concorrencia: int, processadas: Set[str]) -> int:
+    # Devolve quantas linhas novas (sessões, proposições e links) o bloco gravou
+    with Session(engine) as session:
+        try:
+            # 1. VERIFICAR/CRIAR AS SESSÕES DE VOTAÇÃO DO BLOCO
+            ids_sessoes, total_sessoes = gravar_sessoes(session, sessoes)
+
+            # 2. BUSCAR EM PARALELO AS PROPOSIÇÕES AFETADAS DE CADA SESSÃO
+            detalhes = executar_concorrente(
+                lambda sessao_dict: buscar_detalhes_sessao_xml(sessao_dict['uri'], sessao_http),
+                sessoes,
+                limite_concorrencia
+            )
+
+            proposicoes_por_sessao = {}
+            com_xml = []
+            for sessao_dict, detalhes_xml in zip(sessoes, detalhes):
                 if not detalhes_xml:
-                    print(f"AVISO: Não foi possível obter detalhes XML para URI {uri_detalhes}. Pulando proposições desta sessão.")
-                    session.commit()
+                    print(f"AVISO: Não foi possível obter detalhes XML para URI {sessao_dict['uri']}. Pulando proposições desta sessão.")
+                    continue
+                proposicoes_por_sessao[ids_sessoes[sessao_dict['id']]] = detalhes_xml['proposicoes_afetadas_ids']
+                com_xml.append(sessao_dict)
+
+            # 3. RESOLVER TODAS AS PROPOSIÇÕES DISTINTAS DO BLOCO DE UMA VEZ
+            ids_proposicoes = {prop_id for ids in proposicoes_por_sessao.values() for prop_id in ids}
+            total_proposicoes = resolver_proposicoes(session, sessao_http, ids_proposicoes, cache, falhas, limite_concorrencia)
+
+            # 4. CRIAR OS LINKS ASSOCIATIVOS EM LOTE
+            links = {
+                (id_votacao, cache[prop_id])
+                for id_votacao, ids in proposicoes_por_sessao.items()
+                for prop_id in ids
+                if prop_id in cache
+            }
+            total_links = gravar_links(session, links)
+
+            # 5. MARCAR AS SESSÕES CONCLUÍDAS, NA MESMA TRANSAÇÃO DOS DADOS
+            # Sessões cujo XML ou alguma proposição falhou ficam sem marca e
+            # são refeitas na próxima carga
+            concluidas = [
+                sessao_dict for sessao_dict in com_xml
+                if all(prop_id in cache for prop_id in proposicoes_por_sessao[ids_sessoes[sessao_dict['id']]])
+            ]
+            ids_concluidas = [str(sessao_dict['id']) for sessao_dict in concluidas]
+            marcar_processados(session, FONTE_SESSAO_PROPOSICAO, ids_concluidas)
+
+            # 6. COMMIT DO BLOCO
+            session.commit()
+            processadas.update(ids_concluidas)
+            print(f"SUCESSO: {len(sessoes)} sessões, {len(ids_proposicoes)} proposições e {total_links} links novos gravados.")
+            return total_sessoes + total_proposicoes + total_links
+
+        except Exception as e:
+            print(f"ERRO CRÍTICO ao processar bloco de sessões: {repr(e)}")
+            print("Realizando rollback e INTERROMPENDO a execução.")
+            session.rollback()
+            raise
+
+def main(limite_concorrencia: int = LIMITE_CONCORRENCIA, tamanho_bloco: int = TAMANHO_BLOCO_SESSOES) -> int:
+    """
+    Carrega as sessões de votação em blocos. Para cada bloco, os XMLs das
+    sessões e as proposições ainda desconhecidas são buscados em paralelo, e
+    sessões, proposições e links são gravados em lote. As proposições já
+    resolvidas ficam em cache entre os blocos, então cada uma é consultada
+    uma única vez por execução.
+
+    A carga é incremental: sessões concluídas em execuções anteriores ficam
+    marcadas em EstadoSincronizacao e não são buscadas de novo, e as sessões
+    com dataHoraRegistro até a marca de FONTE_SESSAO_VOTACAO nem entram nos
+    blocos. Ao fim da carga a marca avança até a última data antes da
+    primeira sessão que ficou pendente, então nenhuma sessão pendente fica
+    para trás da marca.
+    """
+    arquivo_json = ARQUIVO_SESSOES
+    sessoes_base = carregar_sessao_json(arquivo_json)
+
+    with Session(engine) as session:
+        processadas = set(ler_marcas(session, FONTE_SESSAO_PROPOSICAO))
+        marca = converter_data_hora(ler_marcas(session, FONTE_SESSAO_VOTACAO).get(CHAVE_DATA_HORA_REGISTRO))
+    print(f"DEBUG: {len(processadas)} sessões já processadas em cargas anteriores; marca de data: {marca}.")
+
+    # Datas das sessões depois da marca: concluídas e a menor das pendentes
+    datas_concluidas: List[datetime.datetime] = []
+    primeira_pendente: Optional[datetime.datetime] = None
+
+    cache_proposicoes: Dict[str, int] = {}
+    falhas_proposicoes: Set[str] = set()
+    total_sessoes = 0
+    linhas_gravadas = 0
+
+    with criar_sessao_http(limite_concorrencia) as sessao_http:
+        while True:
+            # As sessões são lidas do arquivo aos poucos, um bloco por vez
+            lidas = list(islice(sessoes_base, tamanho_bloco))
+            if not lidas:
+                break
+
+            bloco = []
+            for sessao_dict in lidas:
+                data = converter_data_hora(sessao_dict.get('dataHoraRegistro'))
+                if marca and data and data <= marca:
                     continue
-                
-                ids_proposicoes = detalhes_xml['proposicoes_afetadas_ids']
-                if not ids_proposicoes:
-                    print("DEBUG: Sessão não possui proposições afetadas.")
-                    session.commit() # Salva a sessão mesmo sem proposições
+                if str(sessao_dict.get('id')) in processadas:
+                    if data:
+                        datas_concluidas.append(data)
+                    continue
+                if not sessao_dict.get('uri'):
+                    print(f"DEBUG: URI de detalhes não encontrada para a sessão {sessao_dict.get('id')}. Pulando.")
+                    if data:
+                        primeira_pendente = min(data, primeira_pendente or data)
+                    continue
+                bloco.append(sessao_dict)
+            if not bloco:
+                continue
+
+            total_sessoes += len(bloco)
+            print(f"\n--- Processando bloco de {len(bloco)} sessões ({total_sessoes} até agora) ---")
+            linhas_gravadas += processar_bloco(bloco, sessao_http, cache_proposicoes, falhas_proposicoes, limite_concorrencia, processadas)
+
+            for sessao_dict in bloco:
+                data = converter_data_hora(sessao_dict.get('dataHoraRegistro'))
+                if not data:
                     continue
+                if str(sessao_dict['id']) in processadas:
+                    datas_concluidas.append(data)
+                else:
+                    primeira_pendente = min(data, primeira_pendente or data)
+
+    # O arquivo não vem ordenado por data: a marca só passa por sessões
+    # concluídas, até a primeira pendente. Sessões sem data não movem a marca
+    # e dependem só das marcas por ID
+    nova_marca = max((data for data in datas_concluidas if primeira_pendente is None or data < primeira_pendente), default=None)
+    if nova_marca:
+        with Session(engine) as session:
+            gravar_marcas(session, FONTE_SESSAO_VOTACAO, {CHAVE_DATA_HORA_REGISTRO: nova_marca.isoformat()})
+            session.commit()
+        print(f"DEBUG: marca de data das sessões avançou para {nova_marca}.")
+
+    if total_sessoes == 0:
+        print('Sem sessões para processar. Encerrando.')
+    return linhas_gravadas
 
-                # 3. PROCESSAR CADA PROPOSIÇÃO E CRIAR O LINK
-                for prop_id in ids_proposicoes:
-                    print(f"  -> Processando proposição afetada ID: {prop_id}")
-
-                    proposicao_row = session.exec(
-                        select(Proposicao).where(Proposicao.id_dados_abertos == prop_id)
-                    ).first()
-
-                    if proposicao_row:
-                        nova_proposicao = proposicao_row.Proposicao
-                        print(f"  DEBUG: Proposição {prop_id} já existe no DB (ID: {nova_proposicao.id}).")
-                    else:
-                        print(f"  DEBUG: Proposição {prop_id} não encontrada. Buscando na API...")
-                        dados_prop = buscar_detalhes_proposicao_api(prop_id)
-                        if not dados_prop:
-                            print(f"  AVISO: Falha ao buscar dados da proposição {prop_id}. Link não será criado.")
-                            continue 
-                        
-                        nova_proposicao = Proposicao(
-                            id_dados_abertos=str(dados_prop.get('id')),
-                            sigla_tipo=dados_prop.get('siglaTipo'),
-                            ano=dados_prop.get('ano'),
-                            ementa=dados_prop.get('ementa'),
-                            data_apresentacao=dados_prop.get('dataApresentacao'),
-                            status=dados_prop.get('statusProposicao', {}).get('descricaoSituacao'),
-                            url_inteiro_teor=dados_prop.get('urlInteiroTeor')
-                        )
-                        session.add(nova_proposicao)
-                        session.flush()
-                        print(f"  DEBUG: Proposição {prop_id} adicionada (DB ID: {nova_proposicao.id}).")
-
-                    # 4. CRIAR O LINK ASSOCIATIVO
-                    existing_link = session.exec(
-                        select(VotacaoProposicao).where(
-                            VotacaoProposicao.id_votacao == nova_sessao.id,
-                            VotacaoProposicao.id_proposicao == nova_proposicao.id
-                        )
-                    ).first()
-
-                    if existing_link:
-                        print(f"  DEBUG: Link Votação-Proposição já existe.")
-                    else:
-                        tabela_associativa = VotacaoProposicao(
-                            id_votacao=nova_sessao.id,
-                            id_proposicao=nova_proposicao.id,
-                        )
-                        session.add(tabela_associativa)
-                        print(f"  DEBUG: Link Votação-Proposição adicionado à sessão.")
-                
-                # 5. COMMIT FINAL DA TRANSAÇÃO DA SESSÃO
-                print(f"SUCESSO: Finalizando processamento da sessão {id_sessao_json}. Commitando no banco de dados...")
-                session.commit()
-
-            except Exception as e:
-                print(f"ERRO CRÍTICO ao processar sessão {id_sessao_json}: {repr(e)}")
-                print("Realizando rollback e INTERROMPENDO a execução.")
-                session.rollback()
-                raise 
-
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from models.estado_sincronizacao import EstadoSincronizacao
+
+# Valor gravado para chaves que só indicam "já processado"
+PROCESSADO = "ok"
+
+def ler_marcas(conexao, fonte: str) -> Dict[str, Optional[str]]:
+    """
+    Devolve todas as marcas de uma fonte como chave -> valor. `conexao` pode
+    ser uma Session ou uma Connection, para ler na transação da própria carga.
+    """
+    linhas = conexao.execute(
+        select(EstadoSincronizacao.chave, EstadoSincronizacao.valor).where(EstadoSincronizacao.fonte == fonte)
+    ).all()
+    return dict(linhas)
+
+def gravar_marcas(conexao, fonte: str, marcas: Dict[str, Optional[str]]):
+    # Upsert em lote; deve rodar na mesma transação que grava os dados
+    if not marcas:
+        return
+
+    statement = insert(EstadoSincronizacao).values([
+        {"fonte": fonte, "chave": chave, "valor": valor, "atualizado_em": func.now()}
+        for chave, valor in marcas.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=["fonte", "chave"],
+        set_={"valor": statement.excluded.valor, "atualizado_em": func.now()}
+    )
+    conexao.execute(statement)
+
+def marcar_processados(conexao, fonte: str, chaves: Iterable[str]):
+    gravar_marcas(conexao, fonte, {str(chave): PROCESSADO for chave in chaves})
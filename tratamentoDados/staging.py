@@ -0,0 +1,246 @@
+"""
+Área de staging das cargas: todas as tabelas que as cargas escrevem são
+copiadas para o schema `staging`, as cargas escrevem nelas (via search_path)
+e, no fim, as cópias trocam de lugar com as tabelas de `public` numa
+transação curta. A API continua lendo as tabelas antigas durante toda a carga
+e passa a ver as novas de uma vez, sem estados intermediários.
+
+Custo: a cópia é completa a cada execução, inclusive de votoindividual e
+despesa, com os índices e as visões materializadas recalculados. O tempo de
+preparar_staging cresce com o tamanho do banco, não com o que a carga traz de
+novo; numa carga incremental pequena ele domina o tempo total. Para essas
+cargas, `pipeline --sem-staging` escreve direto em public, e a API vê as
+linhas novas (e uma carga interrompida) enquanto a carga roda.
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from tratamentoDados.particoes import particoes
+from tratamentoDados.visoes_materializadas import VISOES, criar_visoes
+
+SCHEMA_STAGING = "staging"
+SCHEMA_ANTIGO = "antigo"
+
+# Tabelas escritas pelas cargas. As marcas de sincronização vão junto, para
+# nunca ficarem à frente dos dados publicados. Ordem: referenciadas primeiro.
+# As tabelas de domínio (models/dominios.py) só ganham linhas e ficam em
+# public: um código criado por uma carga no staging não muda nada do que a API lê.
+TABELAS_STAGING = [
+    "partido", "deputado", "gabinete", "proposicao", "sessaovotacao", "votacaoproposicao",
+    "votoindividual", "despesa", "despesa_mensal", "estadosincronizacao",
+]
+
+# Quanto a troca espera por consultas longas da API antes de tentar de novo
+TEMPO_ESPERA_TROCA = "5s"
+TENTATIVAS_TROCA = 5
+
+def _definicoes_indices(conexao: Connection, tabela: str) -> List[str]:
+    # Índices que não pertencem a constraints (essas recriam os seus). Numa
+    # tabela particionada o índice sai como ON ONLY; sem o ONLY, ele é criado
+    # também em cada partição
+    linhas = conexao.execute(text("""
+        SELECT pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = ('public.' || :tabela)::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """), {"tabela": tabela}).scalars().all()
+    return [
+        definicao.replace(f" ON ONLY public.{tabela} ", f" ON {SCHEMA_STAGING}.{tabela} ").replace(f" ON public.{tabela} ", f" ON {SCHEMA_STAGING}.{tabela} ")
+        for definicao in linhas
+    ]
+
+def _definicoes_constraints(conexao: Connection, tabela: str) -> List[Tuple[str, str]]:
+    # Chaves primárias e únicas antes das estrangeiras, que dependem delas
+    return conexao.execute(text("""
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = ('public.' || :tabela)::regclass AND contype IN ('p', 'u', 'f', 'c')
+        ORDER BY CASE contype WHEN 'p' THEN 0 WHEN 'u' THEN 1 WHEN 'c' THEN 2 ELSE 3 END
+    """), {"tabela": tabela}).all()
+
+def _colunas_gravaveis(conexao: Connection, tabela: str) -> List[str]:
+    # Colunas geradas (como `ano`) são calculadas pelo banco e não entram no INSERT
+    return conexao.execute(text("""
+        SELECT quote_ident(attname)
+        FROM pg_attribute
+        WHERE attrelid = ('public.' || :tabela)::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        ORDER BY attnum
+    """), {"tabela": tabela}).scalars().all()
+
+def _chave_particao(conexao: Connection, tabela: str) -> Optional[str]:
+    # Ex.: 'RANGE (ano)'; None para tabelas não particionadas
+    return conexao.execute(text("SELECT pg_get_partkeydef(CAST(:tabela AS regclass))"), {"tabela": f"public.{tabela}"}).scalar()
+
+def _sequencia(conexao: Connection, tabela: str) -> Optional[str]:
+    # Tabelas de chave composta (como despesa_mensal) não têm a coluna id
+    return conexao.execute(text("""
+        SELECT pg_get_serial_sequence(:tabela, attname)
+        FROM pg_attribute
+        WHERE attrelid = CAST(:tabela AS regclass) AND attname = 'id' AND NOT attisdropped
+    """), {"tabela": f"public.{tabela}"}).scalar()
+
+def _referencias_de_fora(conexao: Connection, tabelas: List[str]) -> List[Tuple[str, str]]:
+    # (tabela, referenciada) das chaves estrangeiras de tabelas fora do
+    # staging para tabelas copiadas
+    return conexao.execute(text("""
+        SELECT c.conrelid::regclass::text, c.confrelid::regclass::text
+        FROM pg_constraint c
+        JOIN pg_class t ON t.oid = c.conrelid
+        JOIN pg_class r ON r.oid = c.confrelid
+        WHERE c.contype = 'f' AND c.conparentid = 0
+          AND t.relnamespace = 'public'::regnamespace AND r.relnamespace = 'public'::regnamespace
+          AND r.relname = ANY(:tabelas) AND NOT t.relname = ANY(:tabelas)
+        ORDER BY 1, 2
+    """), {"tabelas": tabelas}).all()
+
+def preparar_staging(engine: Engine, tabelas: List[str] = TABELAS_STAGING):
+    """
+    Recria o schema de staging com uma cópia de cada tabela (dados, defaults,
+    índices, constraints e partições), pronta para receber as cargas
+    incrementais.
+
+    Toda tabela que referencia uma das copiadas precisa ser copiada também:
+    na troca, a chave estrangeira continuaria apontando para a tabela antiga
+    e seria apagada junto com ela.
+    """
+    inicio = time.perf_counter()
+    with engine.begin() as conexao:
+        de_fora = _referencias_de_fora(conexao, tabelas)
+        if de_fora:
+            referencias = ", ".join(f"{tabela} -> {referenciada}" for tabela, referenciada in de_fora)
+            raise ValueError(f"Tabelas fora do staging referenciam tabelas copiadas: {referencias}")
+
+        # As definições são lidas com o search_path padrão: referências a
+        # outras tabelas saem sem schema e, abaixo, apontam para o staging
+        # quando a tabela referenciada também foi copiada
+        indices = {tabela: _definicoes_indices(conexao, tabela) for tabela in tabelas}
+        constraints = {tabela: _definicoes_constraints(conexao, tabela) for tabela in tabelas}
+        chaves_particao = {tabela: _chave_particao(conexao, tabela) for tabela in tabelas}
+        particoes_tabelas = {tabela: particoes(conexao, f"public.{tabela}") for tabela in tabelas}
+
+        conexao.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA_STAGING} CASCADE"))
+        conexao.execute(text(f"CREATE SCHEMA {SCHEMA_STAGING}"))
+        conexao.execute(text(f"SET LOCAL search_path TO {SCHEMA_STAGING}, public"))
+
+        for tabela in tabelas:
+            # Os defaults continuam usando as sequências de public, então os
+            # ids gerados no staging nunca colidem com os já publicados
+            particionamento = f" PARTITION BY {chaves_particao[tabela]}" if chaves_particao[tabela] else ""
+            conexao.execute(text(
+                f"CREATE TABLE {SCHEMA_STAGING}.{tabela} (LIKE public.{tabela} INCLUDING DEFAULTS INCLUDING GENERATED){particionamento}"
+            ))
+            for particao, limites in particoes_tabelas[tabela]:
+                conexao.execute(text(f"CREATE TABLE {SCHEMA_STAGING}.{particao} PARTITION OF {SCHEMA_STAGING}.{tabela} {limites}"))
+            colunas = ", ".join(_colunas_gravaveis(conexao, tabela))
+            conexao.execute(text(f"INSERT INTO {SCHEMA_STAGING}.{tabela} ({colunas}) SELECT {colunas} FROM public.{tabela}"))
+
+        # Índices e constraints depois da cópia: construir de uma vez é bem
+        # mais rápido do que manter a cada linha inserida
+        for tabela in tabelas:
+            for nome, definicao in constraints[tabela]:
+                conexao.execute(text(f"ALTER TABLE {SCHEMA_STAGING}.{tabela} ADD CONSTRAINT {nome} {definicao}"))
+            for definicao in indices[tabela]:
+                conexao.execute(text(definicao))
+            conexao.execute(text(f"ANALYZE {SCHEMA_STAGING}.{tabela}"))
+
+    print(f"Staging preparado em {time.perf_counter() - inicio:.1f}s ({', '.join(tabelas)}).")
+
+# Engines do processo que estão escrevendo no staging (ver escrita_paralela,
+# que repassa isso aos processos de escrita)
+_engines_no_staging: Set[int] = set()
+
+def definir_search_path_staging(dbapi_connection, _):
+    # Listener de "connect": a conexão procura as tabelas primeiro no staging
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET search_path TO {SCHEMA_STAGING}, public")
+    cursor.close()
+    # Sem o commit, o rollback da devolução ao pool desfaria o SET
+    dbapi_connection.commit()
+
+def escrevendo_no_staging_ativo(engine: Engine) -> bool:
+    return id(engine) in _engines_no_staging
+
+@contextmanager
+def escrevendo_no_staging(engine: Engine) -> Iterator[None]:
+    """
+    Enquanto ativo, toda conexão nova do engine procura as tabelas primeiro no
+    schema de staging. As tabelas que não foram copiadas continuam em public.
+    """
+    # Conexões antigas do pool ainda apontam para public
+    engine.dispose()
+    event.listen(engine, "connect", definir_search_path_staging)
+    _engines_no_staging.add(id(engine))
+    try:
+        yield
+    finally:
+        _engines_no_staging.discard(id(engine))
+        event.remove(engine, "connect", definir_search_path_staging)
+        engine.dispose()
+
+def _trocar(conexao: Connection, tabelas: List[str], visoes: List[str]):
+    conexao.execute(text(f"SET LOCAL lock_timeout = '{TEMPO_ESPERA_TROCA}'"))
+    conexao.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA_ANTIGO} CASCADE"))
+    conexao.execute(text(f"CREATE SCHEMA {SCHEMA_ANTIGO}"))
+
+    # A sequência pertence à coluna id e mudaria de schema junto com a tabela
+    sequencias = {tabela: _sequencia(conexao, tabela) for tabela in tabelas}
+    for tabela, sequencia in sequencias.items():
+        if sequencia:
+            conexao.execute(text(f"ALTER SEQUENCE {sequencia} OWNED BY NONE"))
+
+    # As partições são tabelas próprias e não mudam de schema junto com a
+    # tabela particionada; as do staging podem incluir anos novos
+    for tabela in tabelas:
+        antigas = [tabela] + [particao for particao, _ in particoes(conexao, f"public.{tabela}")]
+        novas = [tabela] + [particao for particao, _ in particoes(conexao, f"{SCHEMA_STAGING}.{tabela}")]
+        for nome in antigas:
+            conexao.execute(text(f"ALTER TABLE public.{nome} SET SCHEMA {SCHEMA_ANTIGO}"))
+        for nome in novas:
+            conexao.execute(text(f"ALTER TABLE {SCHEMA_STAGING}.{nome} SET SCHEMA public"))
+
+    for tabela, sequencia in sequencias.items():
+        if sequencia:
+            conexao.execute(text(f"ALTER SEQUENCE {sequencia} OWNED BY public.{tabela}.id"))
+
+    # As visões de public ainda apontam para as tabelas que foram para
+    # `antigo`; as do staging já foram calculadas sobre as recém-publicadas
+    for visao in visoes:
+        conexao.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS public.{visao}"))
+        conexao.execute(text(f"ALTER MATERIALIZED VIEW {SCHEMA_STAGING}.{visao} SET SCHEMA public"))
+
+    conexao.execute(text(f"DROP SCHEMA {SCHEMA_ANTIGO} CASCADE"))
+    conexao.execute(text(f"DROP SCHEMA {SCHEMA_STAGING} CASCADE"))
+
+def publicar_staging(engine: Engine, tabelas: List[str] = TABELAS_STAGING, visoes: List[str] = VISOES):
+    """
+    Troca as tabelas de public pelas do staging numa única transação. A troca
+    só precisa de um lock exclusivo rápido; se uma consulta longa da API
+    estiver segurando a tabela, desiste depois de TEMPO_ESPERA_TROCA e tenta
+    de novo, em vez de enfileirar todos os leitores atrás dela.
+
+    As visões materializadas são calculadas antes, no staging, e trocam de
+    lugar na mesma transação: a API nunca vê agregados de outra carga.
+    """
+    criar_visoes(engine, SCHEMA_STAGING)
+    for tentativa in range(1, TENTATIVAS_TROCA + 1):
+        inicio = time.perf_counter()
+        try:
+            with engine.begin() as conexao:
+                _trocar(conexao, tabelas, visoes)
+        except OperationalError as e:
+            if "lock timeout" not in str(e) or tentativa == TENTATIVAS_TROCA:
+                raise
+            print(f"AVISO: Tabelas ocupadas pela API, tentando a troca de novo ({tentativa}/{TENTATIVAS_TROCA})...")
+            time.sleep(tentativa)
+            continue
+        print(f"Staging publicado em {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+        return
+
+def descartar_staging(engine: Engine):
+    with engine.begin() as conexao:
+        conexao.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA_STAGING} CASCADE"))
@@ -0,0 +1,102 @@
+"""
+Visões materializadas dos rankings do painel (index.html). Os endpoints
+leem as linhas já agregadas em vez de somar despesa_mensal e votoindividual a
+cada requisição.
+
+- Carga direto em public (--sem-staging): as visões são atualizadas com
+  REFRESH ... CONCURRENTLY no fim da carga. A API continua lendo a versão
+  anterior enquanto a nova é calculada.
+- Carga com staging: as visões são recriadas no schema de staging, sobre as
+  tabelas novas, e trocam de lugar junto com elas (ver staging.py).
+
+A hora de cada atualização fica em EstadoSincronizacao e os endpoints a
+devolvem no cabeçalho X-Dados-Atualizados-Em.
+
+Uso (na raiz do projeto), para atualizar sem rodar uma carga:
+    python -m tratamentoDados.visoes_materializadas
+"""
+import time
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import Table, text
+from sqlalchemy.engine import Connection, Engine
+
+from database import engine
+from models.estado_sincronizacao import FONTE_VISAO_MATERIALIZADA
+from models.visoes import AlinhamentoPartido, DespesaPorDeputado, GastoPorUf
+from tratamentoDados.sincronizacao import gravar_marcas
+
+# Consultas das visões, sem schema: as tabelas são resolvidas pelo search_path
+# (public, ou o staging antes de public). Mesma definição das migrações
+# 9c4e2a7d1b58, e3a8f5c21d47, b7d3e91f4a62 e a1c5e7f93b20.
+CONSULTAS: Dict[Table, str] = {
+    # As de despesa partem do resumo mensal, não dos recibos (a média continua por recibo)
+    DespesaPorDeputado: """
+        SELECT ano, id_deputado, sum(total) AS total_despesas, sum(quantidade)::bigint AS quantidade
+        FROM despesa_mensal
+        GROUP BY ano, id_deputado
+    """,
+    GastoPorUf: """
+        SELECT r.ano, dep.sigla_uf,
+               sum(r.total) AS total_gasto,
+               sum(r.total) / sum(r.quantidade) AS media_gasto,
+               sum(r.quantidade)::bigint AS quantidade,
+               count(DISTINCT dep.id) AS total_deputados
+        FROM deputado dep
+        JOIN despesa_mensal r ON r.id_deputado = dep.id
+        GROUP BY r.ano, dep.sigla_uf
+    """,
+    # Alinhamento: 'Sim' em votação aprovada ou 'Não' em rejeitada
+    AlinhamentoPartido: """
+        SELECT v.ano, p.id AS id_partido, p.sigla, p.nome_completo,
+               sum(CASE WHEN (t.descricao = 'Sim' AND s.aprovacao = '1')
+                          OR (t.descricao = 'Não' AND s.aprovacao = '0') THEN 1 ELSE 0 END) AS votos_alinhados,
+               count(v.id) AS votos_totais_decisivos
+        FROM partido p
+        JOIN deputado dep ON dep.id_partido = p.id
+        JOIN votoindividual v ON v.id_deputado = dep.id
+        JOIN tipovoto t ON t.id = v.id_tipo_voto
+        JOIN sessaovotacao s ON s.id = v.id_votacao
+        WHERE t.descricao IN ('Sim', 'Não') AND s.aprovacao IN ('1', '0') AND v.ano IS NOT NULL
+        GROUP BY v.ano, p.id, p.sigla, p.nome_completo
+    """,
+}
+
+VISOES = [visao.name for visao in CONSULTAS]
+
+def _indice_unico(visao: Table, schema: str) -> str:
+    colunas = ", ".join(coluna.name for coluna in visao.primary_key)
+    return f"CREATE UNIQUE INDEX ix_{visao.name}_chave ON {schema}.{visao.name} ({colunas})"
+
+def _marcar_atualizacao(conexao: Connection):
+    # Gravada na estadosincronizacao do search_path: no staging, é publicada junto com as visões
+    agora = datetime.now().astimezone().isoformat(timespec="seconds")
+    gravar_marcas(conexao, FONTE_VISAO_MATERIALIZADA, {nome: agora for nome in VISOES})
+
+def criar_visoes(engine: Engine, schema: str):
+    """
+    Cria (ou recria) as visões em `schema`, calculadas sobre as tabelas que o
+    search_path `schema, public` encontrar primeiro.
+    """
+    inicio = time.perf_counter()
+    with engine.begin() as conexao:
+        conexao.execute(text(f"SET LOCAL search_path TO {schema}, public"))
+        for visao, consulta in CONSULTAS.items():
+            conexao.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {schema}.{visao.name}"))
+            conexao.execute(text(f"CREATE MATERIALIZED VIEW {schema}.{visao.name} AS {consulta}"))
+            conexao.execute(text(_indice_unico(visao, schema)))
+        _marcar_atualizacao(conexao)
+    print(f"Visões materializadas criadas em {schema} em {time.perf_counter() - inicio:.1f}s.")
+
+def atualizar_visoes(engine: Engine):
+    # CONCURRENTLY: sem bloquear as leituras da API (usa o índice único de cada visão)
+    inicio = time.perf_counter()
+    with engine.begin() as conexao:
+        for nome in VISOES:
+            conexao.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY public.{nome}"))
+        _marcar_atualizacao(conexao)
+    print(f"Visões materializadas atualizadas em {time.perf_counter() - inicio:.1f}s.")
+
+if __name__ == "__main__":
+    atualizar_visoes(engine)
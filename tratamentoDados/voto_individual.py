@@ -1,120 +1,345 @@
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
 from sqlmodel import Session
 from database import engine
 import requests
-from typing import Optional
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Sequence, Set, Tuple
 
 # Assumindo que os seus modelos estão definidos nestes ficheiros
 from models.voto_individual import VotoIndividual
 from models.sessao_votacao import SessaoVotacao
 from models.deputado import Deputado
+from models.gabinete import Gabinete
+from models.dominios import SiglaPartido, TipoVoto
+from models.estado_sincronizacao import FONTE_VOTO_INDIVIDUAL, EstadoSincronizacao
+from models.partido import Partido
+from tratamentoDados.cliente_http import LIMITE_CONCORRENCIA, URL_BASE_API, executar_concorrente, get
+from tratamentoDados.escrita_paralela import FAIXAS_POR_PROCESSO, PROCESSOS_ESCRITA, dividir_em_faixas, executar_em_faixas
+from tratamentoDados.deputados_gabinete import buscar_detalhes_deputado_xml, montar_deputado_gabinete
+from tratamentoDados.dominios import Dominio
+from tratamentoDados.metricas import METRICAS, Progresso
+from tratamentoDados.particoes import garantir_particoes
+from tratamentoDados.sessao_proposicao import converter_data_hora
+from tratamentoDados.sincronizacao import marcar_processados
+from utils.api_camara import uri_deputado
 
-def main():
+def url_votos_sessao(id_sessao: str) -> str:
+    return f'{URL_BASE_API}/votacoes/{id_sessao}/votos'
+
+class SessaoPendente(NamedTuple):
+    # O que a carga usa de uma SessaoVotacao, leve o bastante para ir a outro processo
+    id: int
+    id_dados_abertos: str
+    data_hora_registro: datetime
+
+class DominiosVoto(NamedTuple):
+    # Códigos de tipovoto e siglapartido (ver tratamentoDados/dominios.py)
+    tipos_voto: Dominio
+    siglas_partido: Dominio
+
+def carregar_dominios_voto(destino: Engine) -> DominiosVoto:
+    return DominiosVoto(Dominio(destino, TipoVoto, "descricao"), Dominio(destino, SiglaPartido, "sigla"))
+
+class ResultadoVotos(NamedTuple):
+    enviados: int
+    # Deputados fora do banco (id -> dados do voto) e, por sessão, os votos
+    # que esperam por eles
+    desconhecidos: Dict[int, Dict]
+    pendentes: Dict[int, Tuple[SessaoPendente, List[Dict]]]
+    sem_deputado: int
+
+# Anos de votoindividual com partição já conferida nesta carga: a consulta ao
+# catálogo roda uma vez por ano, não a cada lote de votos. main() refaz o
+# conjunto a cada carga
+_anos_com_particao: Set[int] = set()
+
+def carregar_mapa_deputados(session: Session) -> Dict[int, Deputado]:
+    # Uma única consulta substitui um SELECT por voto
+    deputados = session.exec(select(Deputado)).scalars().all()
+    return {deputado.id_dados_abertos: deputado for deputado in deputados}
+
+def inserir_votos(session: Session, votos: List[Dict]):
+    # O índice único (id_votacao, id_deputado, data_hora_sessao) descarta os
+    # votos já gravados, então recarregar uma sessão inteira não gera
+    # duplicados nem escritas
+    # main() já criou as partições de todas as sessões; um processo de escrita
+    # só confere no catálogo um ano que ainda não viu
+    anos = {voto["data_hora_sessao"].year for voto in votos} - _anos_com_particao
+    if anos:
+        garantir_particoes(session.connection(), "votoindividual", anos)
+        _anos_com_particao.update(anos)
+    statement = insert(VotoIndividual).on_conflict_do_nothing(
+        index_elements=["id_votacao", "id_deputado", "data_hora_sessao"]
+    )
+    session.execute(statement, votos)
+
+def montar_voto(sessao_db: SessaoPendente, voto_api: Dict, deputado_db: Deputado, dominios: DominiosVoto) -> Dict:
+    # As URIs do deputado e da sessão não são gravadas: a API as monta a partir dos ids
+    return {
+        "id_votacao": sessao_db.id,
+        "id_deputado": deputado_db.id,
+        "id_tipo_voto": dominios.tipos_voto.codigo(voto_api.get('tipoVoto')),
+        "data_hora_registro": converter_data_hora(voto_api.get("dataRegistroVoto")) or sessao_db.data_hora_registro,
+        # Chave de partição: a data da sessão não muda entre recargas
+        "data_hora_sessao": sessao_db.data_hora_registro,
+        "id_sigla_partido": dominios.siglas_partido.codigo(deputado_db.sigla_partido),
+    }
+
+# Colunas NOT NULL que só os dados da API preenchem: um deputado sem alguma
+# delas derrubaria o flush do lote inteiro
+CAMPOS_OBRIGATORIOS_DEPUTADO = ("nome_eleitoral", "sigla_partido", "sigla_uf")
+CAMPOS_OBRIGATORIOS_GABINETE = ("sala",)
+
+def campos_faltantes(deputado: Deputado, gabinete: Gabinete) -> List[str]:
+    return (
+        [campo for campo in CAMPOS_OBRIGATORIOS_DEPUTADO if getattr(deputado, campo) is None]
+        + [f"gabinete.{campo}" for campo in CAMPOS_OBRIGATORIOS_GABINETE if getattr(gabinete, campo) is None]
+    )
+
+def resolver_deputados_desconhecidos(session: Session, desconhecidos: Dict[int, Dict], limite_concorrencia: int = LIMITE_CONCORRENCIA) -> Dict[int, Deputado]:
+    """
+    Busca em paralelo, de uma vez, os detalhes dos deputados que apareceram
+    nos votos mas não estão no banco, e os grava com o gabinete como em
+    deputados_gabinete.py. Devolve os gravados por id_dados_abertos; os que
+    falharem na API ou vierem sem algum campo obrigatório ficam de fora, e as
+    sessões com votos deles ficam sem marca.
+    """
+    ids = sorted(desconhecidos)
+    print(f"Buscando {len(ids)} deputados que não estavam no banco...")
+    detalhes = executar_concorrente(
+        lambda id_api: buscar_detalhes_deputado_xml(desconhecidos[id_api].get('uri') or uri_deputado(id_api)),
+        ids,
+        limite_concorrencia
+    )
+    partidos = dict(session.exec(select(Partido.sigla, Partido.id)).all())
+
+    novos = {}
+    incompletos = {}
+    for id_api, detalhes_json in zip(ids, detalhes):
+        if not detalhes_json:
+            continue
+        METRICAS.contar("registros_baixados")
+        info = desconhecidos[id_api]
+        # Ex-deputados podem vir sem último status no XML; o voto traz os dois campos
+        detalhes_json["sigla_partido"] = detalhes_json.get("sigla_partido") or info.get("siglaPartido")
+        detalhes_json["nome_eleitoral"] = detalhes_json.get("nome_eleitoral") or info.get("nome")
+        deputado, gabinete = montar_deputado_gabinete(info, detalhes_json, partidos.get(detalhes_json["sigla_partido"]))
+        faltantes = campos_faltantes(deputado, gabinete)
+        if faltantes:
+            incompletos[id_api] = faltantes
+            continue
+        session.add(deputado)
+        session.add(gabinete)
+        novos[id_api] = deputado
+
+    for id_api, faltantes in incompletos.items():
+        print(f"AVISO: Deputado {id_api} sem {', '.join(faltantes)} na API; não foi gravado e suas sessões ficam pendentes.")
+
+    session.flush()
+    return novos
+
+def completar_sessoes_pendentes(session: Session, pendentes: Dict[int, Tuple[SessaoPendente, List[Dict]]], deputados_por_id_api: Dict[int, Deputado],
+                                dominios: DominiosVoto) -> Tuple[int, List[str]]:
+    # Grava os votos que aguardavam deputados; devolve quantos foram enviados
+    # e as sessões que ficaram completas
+    novos_votos = []
+    concluidas = []
+    for sessao_db, votos_api in pendentes.values():
+        resolvidos = [voto_api for voto_api in votos_api if voto_api['deputado_']['id'] in deputados_por_id_api]
+        novos_votos.extend(
+            montar_voto(sessao_db, voto_api, deputados_por_id_api[voto_api['deputado_']['id']], dominios)
+            for voto_api in resolvidos
+        )
+        if len(resolvidos) == len(votos_api):
+            concluidas.append(sessao_db.id_dados_abertos)
+
+    if novos_votos:
+        inserir_votos(session, novos_votos)
+    return len(novos_votos), concluidas
+
+def carregar_votos_sessoes(destino: Engine, sessoes: Sequence[SessaoPendente]) -> ResultadoVotos:
+    """
+    Busca e grava os votos de uma faixa de sessões, com commits a cada 50
+    sessões. Pode rodar num processo de escrita (ver escrita_paralela).
     """
-    Este script busca os votos individuais para cada sessão de votação,
-    verifica se os deputados existem na base de dados,
-    e insere os registos de votos na tabela VotoIndividual.
-    """    
     # Contador para fazer commits periódicos
     sessoes_processadas = 0
-    
-    with Session(engine) as session:
-        # 1. Buscar todas as sessões de votação da nossa base de dados
-        statement_sessoes = select(SessaoVotacao)
-        # .all() retorna uma lista de objetos Row
-        todas_sessoes_rows = session.exec(statement_sessoes).all()
-        total_sessoes = len(todas_sessoes_rows)
-        print(f"DEBUG: Encontradas {total_sessoes} sessões de votação para processar.")
-
-        for i, sessao_row in enumerate(todas_sessoes_rows):
-            # CORREÇÃO: Extrai a instância do modelo do objeto Row pelo índice [0]
-            sessao_db = sessao_row[0]
-            
-            print(f"\n--- Processando Sessão {i+1}/{total_sessoes} ---")
+    votos_enviados = 0
+    # Sessões concluídas desde o último commit, marcadas junto com os votos
+    sessoes_concluidas = []
+    # Votos descartados, resumidos no fim em vez de uma linha por voto
+    votos_sem_deputado = 0
+    deputados_desconhecidos: Dict[int, Dict] = {}
+    votos_pendentes: Dict[int, Tuple[SessaoPendente, List[Dict]]] = {}
+
+    # Os deputados do mapa continuam válidos depois dos commits parciais;
+    # expirados, cada acesso voltaria ao banco
+    with Session(destino, expire_on_commit=False) as session:
+        deputados_por_id_api = carregar_mapa_deputados(session)
+        dominios = carregar_dominios_voto(destino)
+        progresso = Progresso("sessões de votação", len(sessoes))
+
+        for sessao_db in sessoes:
+            progresso.avancar()
 
             try:
                 # 2. Construir a URL e buscar os votos na API para a sessão atual
-                url = f'https://dadosabertos.camara.leg.br/api/v2/votacoes/{sessao_db.id_dados_abertos}/votos'
+                url = url_votos_sessao(sessao_db.id_dados_abertos)
                 headers = {'accept': 'application/json'}
-                
-                print(f"DEBUG: Buscando votos na URL: {url}")
-                response = requests.get(url, headers=headers, timeout=10)
+                response = get(url, headers=headers, timeout=10)
                 response.raise_for_status()  # Lança um erro para status HTTP 4xx/5xx
                 
                 votos_api = response.json().get('dados', [])
+                METRICAS.contar("registros_baixados", len(votos_api))
                 if not votos_api:
-                    print("INFO: Esta sessão não possui registos de votos individuais na API. Pulando.")
+                    # Sessão sem registos de votos individuais na API
+                    sessoes_concluidas.append(sessao_db.id_dados_abertos)
                     continue
-                
-                print(f"DEBUG: Encontrados {len(votos_api)} votos para esta sessão.")
+
+                novos_votos = []
 
                 # 3. Iterar sobre cada voto recebido da API
                 for voto_api in votos_api:
                     deputado_info = voto_api.get('deputado_')
-                    if not deputado_info:
-                        print("AVISO: Voto sem informação do deputado. Pulando.")
+                    if not deputado_info or not deputado_info.get('id'):
+                        votos_sem_deputado += 1
                         continue
 
                     id_deputado_api = deputado_info.get('id')
-                    if not id_deputado_api:
-                        print(f"AVISO: Voto com info de deputado, mas sem ID. Pulando. Info: {deputado_info}")
-                        continue
-                    
-                    # 4. Verificar se o deputado já existe na nossa base de dados
-                    deputado_row = session.exec(
-                        select(Deputado).where(Deputado.id_dados_abertos == id_deputado_api)
-                    ).first()
-
-                    if deputado_row:
-                        # CORREÇÃO: Extrai a instância do modelo do objeto Row pelo índice [0]
-                        deputado_db = deputado_row[0]
-                    else:
-                        # 5. Se o deputado não existe, cria um novo registo
-                        print(f"  -> INFO: Deputado ID {id_deputado_api} não encontrado.")
-                        break
                     
-                    # 6. Verificar se este voto específico já foi inserido para evitar duplicados
-                    voto_existente = session.exec(
-                        select(VotoIndividual).where(
-                            VotoIndividual.id_votacao == sessao_db.id,
-                            VotoIndividual.id_deputado == deputado_db.id
-                        )
-                    ).first()
-
-                    if voto_existente:
-                        print(f"  -> INFO: Voto para o deputado nesta sessão já existe. Pulando.")
+                    # 4. Verificar se o deputado já existe na nossa base de dados;
+                    # se não, o voto espera até o deputado ser buscado no fim
+                    deputado_db = deputados_por_id_api.get(id_deputado_api)
+                    if not deputado_db:
+                        deputados_desconhecidos.setdefault(id_deputado_api, deputado_info)
+                        votos_pendentes.setdefault(sessao_db.id, (sessao_db, []))[1].append(voto_api)
                         continue
+                    
+                    # 5. Montar o novo voto com todos os dados
+                    novos_votos.append(montar_voto(sessao_db, voto_api, deputado_db, dominios))
 
-                    # 7. Criar a nova instância de VotoIndividual com todos os dados
-                    novo_voto = VotoIndividual(
-                        id_votacao=sessao_db.id,
-                        id_deputado=deputado_db.id,
-                        tipo_voto=voto_api.get('tipoVoto'),
-                        data_hora_registro=voto_api.get("dataRegistroVoto"),
-                        sigla_partido_deputado=deputado_db.sigla_partido,
-                        uri_deputado=deputado_info.get('uri'),
-                        uri_sessao_votacao=sessao_db.uri
-                    )
-                    session.add(novo_voto)
-                    print(f"  -> DEBUG: Voto do Dep. {deputado_db.nome_eleitoral} ({voto_api.get('tipoVoto')}) adicionado à sessão.")
+                # 6. Inserir todos os votos da sessão em um único lote
+                if novos_votos:
+                    inserir_votos(session, novos_votos)
+                    votos_enviados += len(novos_votos)
+
+                # Sessões com votos pendentes são marcadas depois de completadas
+                if sessao_db.id not in votos_pendentes:
+                    sessoes_concluidas.append(sessao_db.id_dados_abertos)
 
             except requests.exceptions.RequestException as e:
                 print(f"ERRO: Falha de conexão ao buscar votos para a sessão {sessao_db.id_dados_abertos}: {e}")
                 continue
             except Exception as e:
                 print(f"ERRO INESPERADO ao processar a sessão {sessao_db.id_dados_abertos}: {repr(e)}")
-                break
+                # Votos e marcas desde o último commit são descartados juntos:
+                # essas sessões continuam pendentes para a próxima carga
+                session.rollback()
+                raise
 
             sessoes_processadas += 1
-            # 8. Fazer commit a cada 50 sessões para salvar o progresso
+            # 7. Fazer commit a cada 50 sessões para salvar o progresso
             if sessoes_processadas % 50 == 0:
-                print(f"\n--- COMMIT PARCIAL: Salvando {sessoes_processadas} sessões processadas na base de dados... ---")
+                marcar_processados(session, FONTE_VOTO_INDIVIDUAL, sessoes_concluidas)
                 session.commit()
-                print("--- SUCESSO: Dados salvos. Continuando... ---")
+                sessoes_concluidas = []
 
-        # 9. Commit final para salvar quaisquer registos restantes
-        print("\n--- PROCESSAMENTO CONCLUÍDO: Realizando commit final... ---")
+        # 8. Commit final para salvar quaisquer registos restantes
+        marcar_processados(session, FONTE_VOTO_INDIVIDUAL, sessoes_concluidas)
         session.commit()
-        print("--- SUCESSO: Todos os votos foram carregados com êxito! ---")
+        progresso.concluir()
+
+    return ResultadoVotos(votos_enviados, deputados_desconhecidos, votos_pendentes, votos_sem_deputado)
+
+def main(processos: int = PROCESSOS_ESCRITA) -> int:
+    """
+    Este script busca os votos individuais para cada sessão de votação,
+    verifica se os deputados existem na base de dados,
+    e insere os registos de votos na tabela VotoIndividual.
+
+    Os deputados são carregados uma única vez e os votos de cada sessão são
+    enviados em um único lote, ignorando os que já existem no banco.
+
+    Votos de deputados que ainda não estão no banco ficam guardados até o fim
+    da passada; então esses deputados são buscados na API de uma vez, em
+    paralelo, gravados com o gabinete, e as sessões afetadas são completadas
+    na mesma execução.
+
+    A carga é incremental: cada sessão concluída é marcada em
+    EstadoSincronizacao junto com seus votos, e as sessões já marcadas não
+    são consultadas de novo na API.
+
+    Com mais de um processo de escrita, as sessões são divididas em faixas de
+    id gravadas em paralelo (ver escrita_paralela); os deputados
+    desconhecidos continuam sendo gravados só aqui, depois das faixas.
+    """    
+    # 1. Carregar todas as sessões de votação ainda não processadas
+    with Session(engine) as session:
+        ja_processadas = select(EstadoSincronizacao.chave).where(EstadoSincronizacao.fonte == FONTE_VOTO_INDIVIDUAL)
+        pendentes = select(SessaoVotacao.id, SessaoVotacao.id_dados_abertos, SessaoVotacao.data_hora_registro).where(
+            SessaoVotacao.id_dados_abertos.not_in(ja_processadas)
+        )
+        # A data da sessão é a chave de partição dos votos: sem ela, a sessão fica de fora
+        sessoes_sem_data = session.execute(select(func.count()).select_from(pendentes.where(SessaoVotacao.data_hora_registro.is_(None)).subquery())).scalar()
+        todas_sessoes = [
+            SessaoPendente(*linha) for linha in session.exec(
+                pendentes.where(SessaoVotacao.data_hora_registro.is_not(None)).order_by(SessaoVotacao.id)
+            ).all()
+        ]
+    print(f"DEBUG: Encontradas {len(todas_sessoes)} sessões de votação para processar.")
+
+    # Partições dos anos das sessões criadas antes das faixas: criar uma trava
+    # a tabela, e os processos de escrita esperariam uns pelos outros
+    anos = {s.data_hora_registro.year for s in todas_sessoes}
+    with engine.begin() as conexao:
+        garantir_particoes(conexao, "votoindividual", anos)
+    # O que foi conferido numa carga anterior não vale mais: remover_ano,
+    # desanexar_ano ou a troca do staging podem ter levado partições
+    _anos_com_particao.clear()
+    _anos_com_particao.update(anos)
+
+    if processos > 1:
+        faixas = dividir_em_faixas(dict.fromkeys(todas_sessoes, 1), processos * FAIXAS_POR_PROCESSO)
+        print(f"Gravando os votos em {len(faixas)} faixas de sessões com {processos} processos...")
+    else:
+        faixas = [todas_sessoes]
+    resultados = executar_em_faixas(carregar_votos_sessoes, faixas, engine, processos)
+
+    votos_enviados = sum(resultado.enviados for resultado in resultados)
+    votos_sem_deputado = sum(resultado.sem_deputado for resultado in resultados)
+    deputados_desconhecidos: Dict[int, Dict] = {}
+    votos_pendentes: Dict[int, Tuple[SessaoPendente, List[Dict]]] = {}
+    for resultado in resultados:
+        for id_api, deputado_info in resultado.desconhecidos.items():
+            deputados_desconhecidos.setdefault(id_api, deputado_info)
+        votos_pendentes.update(resultado.pendentes)
+
+    # 9. Buscar os deputados desconhecidos e completar as suas sessões.
+    # Sessões que ainda ficarem incompletas (deputado que falhou na API)
+    # ficam sem marca e são refeitas na próxima carga
+    if deputados_desconhecidos:
+        with Session(engine, expire_on_commit=False) as session:
+            deputados_por_id_api = carregar_mapa_deputados(session)
+            novos_deputados = resolver_deputados_desconhecidos(session, deputados_desconhecidos)
+            deputados_por_id_api.update(novos_deputados)
+            enviados, concluidas = completar_sessoes_pendentes(session, votos_pendentes, deputados_por_id_api, carregar_dominios_voto(engine))
+            votos_enviados += enviados
+            marcar_processados(session, FONTE_VOTO_INDIVIDUAL, concluidas)
+            session.commit()
+        print(
+            f"{len(novos_deputados)} de {len(deputados_desconhecidos)} deputados desconhecidos gravados; "
+            f"{enviados} votos pendentes enviados, {len(concluidas)} de {len(votos_pendentes)} sessões completadas."
+        )
+
+    if votos_sem_deputado:
+        print(f"AVISO: {votos_sem_deputado} votos sem informação (ou sem ID) do deputado foram ignorados.")
+    if sessoes_sem_data:
+        print(f"AVISO: {sessoes_sem_data} sessões sem data de registro ficaram sem votos.")
+    print(f"SUCESSO: {votos_enviados} votos enviados ao banco.")
+
+    return votos_enviados
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+# Endereços da API de Dados Abertos da Câmara, usados tanto pelas cargas
+# (tratamentoDados) quanto pela API, sem que uma importe a outra
+
+URL_BASE_API = "https://dadosabertos.camara.leg.br/api/v2"
+
+def uri_deputado(id_dados_abertos: int) -> str:
+    return f"{URL_BASE_API}/deputados/{id_dados_abertos}"
+
+def uri_votacao(id_dados_abertos: str) -> str:
+    return f"{URL_BASE_API}/votacoes/{id_dados_abertos}"
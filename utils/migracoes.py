@@ -0,0 +1,64 @@
+"""
+Reescrita de tabelas nas migrações do Alembic (alembic/versions). Mudar a
+chave de partição, ou trocar colunas sem deixar o texto antigo ocupando as
+páginas, exige criar a tabela de novo: ela é preenchida sem índices e toma o
+lugar da antiga, com a mesma sequência do id, então os ids não mudam.
+
+As migrações já aplicadas dependem deste comportamento: uma mudança aqui
+precisa manter o resultado delas.
+"""
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from alembic import op
+
+def colunas_gravaveis(tabela: str) -> str:
+    # Sem as colunas geradas (votoindividual.ano), calculadas pelo banco
+    return op.get_bind().execute(sa.text("""
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+        FROM pg_attribute
+        WHERE attrelid = CAST(:tabela AS regclass) AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+    """), {"tabela": tabela}).scalar()
+
+def particoes_atuais(tabela: str) -> List[Tuple[str, str]]:
+    # (nome, limites) de cada partição, para recriá-las iguais
+    return op.get_bind().execute(sa.text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:tabela AS regclass)
+    """), {"tabela": tabela}).all()
+
+def particoes_por_ano(tabela: str, anos: Iterable[int], limites: str) -> List[Tuple[str, str]]:
+    # `limites` com {ano} e {proximo}, ex.: "FROM ({ano}) TO ({proximo})"
+    return [(f"{tabela}_{ano}", f"FOR VALUES {limites.format(ano=ano, proximo=ano + 1)}") for ano in anos]
+
+def recriar_tabela(tabela: str, colunas: str, consulta: str, chave: Optional[str] = None, coluna_nova: Optional[str] = None,
+                   alteracoes: Optional[str] = None, particoes: Sequence[Tuple[str, str]] = ()) -> None:
+    """
+    Recria `tabela` com a mesma estrutura (LIKE, com defaults e colunas
+    geradas), mais a definição `coluna_nova` (necessária quando é ela a
+    chave) e depois `alteracoes` (o corpo de um ALTER TABLE), e a preenche
+    com `INSERT INTO ... (colunas) consulta`.
+
+    Com `chave`, a tabela nova é particionada por RANGE dela, com as
+    `particoes` (nome, limites) dadas, e a chave primária passa a ser
+    (id, chave). Chaves estrangeiras, índices e visões que dependiam da
+    tabela ficam por conta da migração.
+    """
+    nova = f"{tabela}_nova"
+    op.execute(f"ALTER SEQUENCE {tabela}_id_seq OWNED BY NONE")
+    extra = f", {coluna_nova}" if coluna_nova else ""
+    particionamento = f" PARTITION BY RANGE ({chave})" if chave else ""
+    op.execute(f"CREATE TABLE {nova} (LIKE {tabela} INCLUDING DEFAULTS INCLUDING GENERATED{extra}){particionamento}")
+    if alteracoes:
+        op.execute(f"ALTER TABLE {nova} {alteracoes}")
+    for particao, limites in particoes:
+        op.execute(f"CREATE TABLE {particao}_nova PARTITION OF {nova} {limites}")
+    op.execute(f"INSERT INTO {nova} ({colunas}) {consulta}")
+    op.execute(f"DROP TABLE {tabela}")
+    op.execute(f"ALTER TABLE {nova} RENAME TO {tabela}")
+    for particao, _ in particoes:
+        op.execute(f"ALTER TABLE {particao}_nova RENAME TO {particao}")
+    op.execute(f"ALTER SEQUENCE {tabela}_id_seq OWNED BY {tabela}.id")
+    op.create_primary_key(f"{tabela}_pkey", tabela, ["id", chave] if chave else ["id"])
@@ -1,13 +1,31 @@
-from sqlmodel import select, func
-from models.despesa import Despesa
+from datetime import datetime
+
+from fastapi import Response
+from sqlmodel import Session, and_, select
+from models.estado_sincronizacao import FONTE_VISAO_MATERIALIZADA, EstadoSincronizacao
+from models.visoes import DespesaPorDeputado
+
+CABECALHO_ATUALIZACAO = "X-Dados-Atualizados-Em"
 
 def get_despesas_deputado_2024_subquery():
-    despesas_subquery = (
-        select(
-            Despesa.id_deputado,
-            func.sum(Despesa.valor_liquido).label("total_despesas")
-        )
-        .group_by(Despesa.id_deputado)
-        .subquery() 
+    # Total de 2024 por deputado, já agregado na visão materializada (id_deputado, total_despesas)
+    return (
+        select(DespesaPorDeputado.c.id_deputado, DespesaPorDeputado.c.total_despesas)
+        .where(DespesaPorDeputado.c.ano == 2024)
+        .subquery()
     )
-    return despesas_subquery
\ No newline at end of file
+
+def informar_atualizacao(response: Response, session: Session, visao) -> None:
+    # Hora em que a carga recalculou a visão usada pelo endpoint
+    atualizada_em = session.exec(
+        select(EstadoSincronizacao.valor)
+        .where(EstadoSincronizacao.fonte == FONTE_VISAO_MATERIALIZADA, EstadoSincronizacao.chave == visao.name)
+    ).first()
+    if atualizada_em:
+        response.headers[CABECALHO_ATUALIZACAO] = atualizada_em
+
+def filtro_ano(coluna, ano: int):
+    # Intervalo em vez de EXTRACT/cast na coluna: assim o índice B-tree da
+    # coluna continua sendo usado e, na chave de partição de uma tabela
+    # particionada (votoindividual.data_hora_sessao), só a partição do ano é lida
+    return and_(coluna >= datetime(ano, 1, 1), coluna < datetime(ano + 1, 1, 1))